@@ -0,0 +1,240 @@
+""" Measures the throughput and latency of the API calls, end to end.
+
+Each operation (``job_create``, ``job_list``, ``job_progress``,
+``output_progress``, ``input_progress``, ``report_all``) sends
+``--requests`` requests to a local stub server replaying the test fixtures,
+serially, from ``--threads`` threads, and from ``--concurrency`` asyncio
+tasks. The server answers after ``--latency`` seconds plus up to
+``--jitter``, and fails a fraction ``--error-rate`` of the requests.
+
+Results are printed, and saved as JSON with ``--output``. ``--compare``
+checks them against a previous run, and exits with status 1 if an
+operation got slower than ``--tolerance``::
+
+    $ python benchmarks/bench_api.py --output baseline.json
+    $ python benchmarks/bench_api.py --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+from stub_server import StubServer
+from zencoder import Zencoder
+from zencoder.aio import AsyncReport, AsyncZencoder
+from zencoder.core import Report
+from zencoder.retry import RetryPolicy
+
+INPUT = 's3://zencodertesting/test.mov'
+
+def operations(zen, report):
+    """ Returns the operations to measure, by name, as functions of no
+    arguments. ``zen`` and ``report`` may be sync or async clients. """
+    return [
+        ('job_create', lambda: zen.job.create(INPUT)),
+        ('job_list', lambda: zen.job.list(per_page=50)),
+        ('job_progress', lambda: zen.job.progress(1234)),
+        ('output_progress', lambda: zen.output.progress(1234)),
+        ('input_progress', lambda: zen.input.progress(1234)),
+        ('report_all', lambda: report.all()),
+    ]
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+def summarize(operation, mode, workers, latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        'operation': operation,
+        'mode': mode,
+        'workers': workers,
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'elapsed': round(elapsed, 4),
+        'throughput': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'mean_ms': ms(sum(latencies) / len(latencies) if latencies else None),
+        'p50_ms': ms(percentile(latencies, 0.5)),
+        'p90_ms': ms(percentile(latencies, 0.9)),
+        'p99_ms': ms(percentile(latencies, 0.99)),
+    }
+
+def run_threads(call, requests, threads):
+    """ Sends ``requests`` calls from ``threads`` threads. Returns the
+    latencies of the successful calls, the number of errors and the elapsed
+    time. """
+    remaining = [requests]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not remaining[0]:
+                    return
+                remaining[0] -= 1
+            start = time.time()
+            try:
+                ok = call().code < 400
+            except Exception:
+                ok = False
+            elapsed = time.time() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return latencies, errors[0], time.time() - start
+
+async def run_tasks(call, requests, concurrency):
+    """ Asynchronous version of ``run_threads``. """
+    remaining = [requests]
+    latencies = []
+    errors = [0]
+
+    async def worker():
+        while remaining[0]:
+            remaining[0] -= 1
+            start = time.time()
+            try:
+                ok = (await call()).code < 400
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.time() - start)
+            else:
+                errors[0] += 1
+
+    start = time.time()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return latencies, errors[0], time.time() - start
+
+def bench_sync(server, args, selected):
+    results = []
+    pool_size = max(args.threads, 1)
+    zen = Zencoder('key', base_url=server.base_url, pool_maxsize=pool_size,
+                   retry=RetryPolicy(backoff_factor=0) if args.retry else None)
+    report = Report(server.base_url, 'key', session=zen.session)
+
+    for name, call in operations(zen, report):
+        if name not in selected:
+            continue
+        for mode, threads in (('serial', 1), ('threaded', args.threads)):
+            run_threads(call, args.warmup, threads)
+            results.append(summarize(name, mode, threads,
+                                     *run_threads(call, args.requests, threads)))
+    zen.close()
+    return results
+
+async def bench_async(server, args, selected):
+    results = []
+    zen = AsyncZencoder('key', base_url=server.base_url,
+                        pool_maxsize=args.concurrency,
+                        retry=RetryPolicy(backoff_factor=0) if args.retry else None)
+    report = AsyncReport(server.base_url, 'key', session=zen.session)
+
+    for name, call in operations(zen, report):
+        if name not in selected:
+            continue
+        await run_tasks(call, args.warmup, args.concurrency)
+        results.append(summarize(name, 'async', args.concurrency,
+                                 *(await run_tasks(call, args.requests,
+                                                   args.concurrency))))
+    await zen.close()
+    return results
+
+def compare(results, baseline, tolerance):
+    """ Prints the change of throughput and p50 latency since ``baseline``.
+    Returns the number of regressions. """
+    previous = dict(((r['operation'], r['mode']), r) for r in baseline['results'])
+    regressions = 0
+    print('\n{0:<18}{1:<10}{2:>14}{3:>14}'.format(
+        'operation', 'mode', 'throughput', 'p50'))
+    for result in results:
+        before = previous.get((result['operation'], result['mode']))
+        if not before or not before['throughput'] or not result['throughput']:
+            continue
+        throughput = result['throughput'] / before['throughput'] - 1
+        p50 = result['p50_ms'] / before['p50_ms'] - 1
+        regressed = throughput < -tolerance or p50 > tolerance
+        regressions += regressed
+        print('{0:<18}{1:<10}{2:>+13.1%}{3:>+13.1%}{4}'.format(
+            result['operation'], result['mode'], throughput, p50,
+            '  REGRESSION' if regressed else ''))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--warmup', type=int, default=10)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.005)
+    parser.add_argument('--jitter', type=float, default=0.005)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--retry', action='store_true',
+                        help='retry failed requests')
+    parser.add_argument('--operations', nargs='*',
+                        help='operations to measure (default: all)')
+    parser.add_argument('--output', help='save the results to this JSON file')
+    parser.add_argument('--compare', help='JSON results of a previous run')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    selected = set(args.operations or
+                   [name for name, _ in operations(None, None)])
+
+    with StubServer(latency=args.latency, jitter=args.jitter,
+                    error_rate=args.error_rate, seed=args.seed) as server:
+        results = bench_sync(server, args, selected)
+        loop = asyncio.new_event_loop()
+        try:
+            results += loop.run_until_complete(bench_async(server, args, selected))
+        finally:
+            loop.close()
+
+    results.sort(key=lambda r: (r['operation'], r['mode']))
+    print('{0:<18}{1:<10}{2:>8}{3:>8}{4:>12}{5:>10}{6:>10}{7:>10}'.format(
+        'operation', 'mode', 'reqs', 'errors', 'req/s', 'p50 ms', 'p90 ms',
+        'p99 ms'))
+    for r in results:
+        print('{0:<18}{1:<10}{2:>8}{3:>8}{4:>12}{5:>10}{6:>10}{7:>10}'.format(
+            r['operation'], r['mode'], r['requests'], r['errors'],
+            r['throughput'], r['p50_ms'], r['p90_ms'], r['p99_ms']))
+
+    if args.output:
+        config = dict(vars(args), python=platform.python_version(),
+                      platform=platform.platform(),
+                      timestamp=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+        config.pop('output')
+        config.pop('compare')
+        with open(args.output, 'w') as f:
+            json.dump({'config': config, 'results': results}, f, indent=2,
+                      sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+""" Measures replaying API traffic from a cassette.
+
+Writes a cassette of ``--jobs`` job progress responses (the
+``job_progress.json`` fixture), then measures the time to open it, raw
+``Cassette.lookup`` calls per second, and ``job.progress`` calls per second
+through a client replaying it, compared with a local stub server.
+
+    $ python benchmarks/bench_cassette.py --jobs 100000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+from stub_server import StubServer, load_fixture
+from zencoder import Zencoder
+from zencoder.cassette import Cassette, CassetteWriter, ReplayAdapter
+from zencoder.cassette import request_hash
+
+BASE_URL = 'http://127.0.0.1:8000/'
+
+def progress_url(job_id):
+    return '{0}jobs/{1}/progress'.format(BASE_URL, job_id)
+
+def write_cassette(path, jobs):
+    content = load_fixture('fixtures/job_progress.json')
+    headers = {'Content-Type': 'application/json'}
+    with CassetteWriter(path) as writer:
+        for job_id in range(jobs):
+            writer.write(request_hash('GET', progress_url(job_id)), 200,
+                         headers, content, 0.05)
+
+def calls_per_second(call, count):
+    start = time.time()
+    for i in range(count):
+        call(i)
+    return count / (time.time() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=100000)
+    parser.add_argument('--lookups', type=int, default=1000000)
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'progress.cassette')
+    try:
+        start = time.time()
+        write_cassette(path, args.jobs)
+        print('write {0} records:      {1:>10.2f} s ({2:.1f} MB)'.format(
+            args.jobs, time.time() - start, os.path.getsize(path) / 1e6))
+
+        start = time.time()
+        cassette = Cassette(path)
+        print('open:                   {0:>10.3f} s'.format(time.time() - start))
+
+        urls = [progress_url(i % args.jobs) for i in range(min(args.lookups, 100000))]
+        rate = calls_per_second(
+            lambda i: cassette.lookup('GET', urls[i % len(urls)]), args.lookups)
+        print('Cassette.lookup:        {0:>10.0f} /s'.format(rate))
+
+        zen = Zencoder('key', base_url=BASE_URL,
+                       adapter=ReplayAdapter(cassette))
+        rate = calls_per_second(lambda i: zen.job.progress(i % args.jobs),
+                                args.calls)
+        print('job.progress (replay):  {0:>10.0f} /s'.format(rate))
+
+        with StubServer() as server:
+            zen = Zencoder('key', base_url=server.base_url)
+            calls = min(args.calls, 2000)
+            rate = calls_per_second(lambda i: zen.job.progress(i), calls)
+            zen.close()
+        print('job.progress (server):  {0:>10.0f} /s'.format(rate))
+
+        cassette.close()
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == '__main__':
+    main()
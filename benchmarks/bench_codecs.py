@@ -0,0 +1,60 @@
+""" Benchmarks the installed JSON codecs against the API fixtures.
+
+For every fixture in ``test/fixtures``, measures the time to decode the
+response bytes and to re-encode the decoded body with each codec.
+
+    $ python benchmarks/bench_codecs.py --number 20000
+"""
+
+import argparse
+import glob
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from zencoder.codec import available_codecs, get_codec
+
+FIXTURES = os.path.join(os.path.dirname(__file__), '..', 'test', 'fixtures')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+
+    codecs = [get_codec(name) for name in available_codecs()]
+
+    print('{0:<24}{1:>8}  {2}'.format(
+        'fixture', 'bytes',
+        '  '.join('{0:>16}'.format(c.name + ' loads/dumps') for c in codecs)))
+
+    totals = dict((c.name, [0.0, 0.0]) for c in codecs)
+    for path in sorted(glob.glob(os.path.join(FIXTURES, '*.json'))):
+        with open(path, 'rb') as f:
+            content = f.read()
+
+        columns = []
+        for codec in codecs:
+            body = codec.loads(content)
+            loads = timeit.timeit(lambda: codec.loads(content),
+                                  number=args.number)
+            dumps = timeit.timeit(lambda: codec.dumps(body),
+                                  number=args.number)
+            totals[codec.name][0] += loads
+            totals[codec.name][1] += dumps
+            # microseconds per call
+            columns.append('{0:>7.2f} /{1:>7.2f}'.format(
+                loads / args.number * 1e6, dumps / args.number * 1e6))
+
+        print('{0:<24}{1:>8}  {2}'.format(
+            os.path.basename(path), len(content), '  '.join(columns)))
+
+    baseline = totals['json'][0]
+    for codec in codecs:
+        print('{0:<8} total decode {1:.3f}s ({2:.1f}x json)'.format(
+            codec.name, totals[codec.name][0],
+            baseline / totals[codec.name][0]))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+""" Compares the memory of ``zencoder.models.JobInfo`` and plain dicts.
+
+Decodes ``--count`` jobs (the ``job_list`` fixture, repeated) and keeps them
+alive as plain dictionaries, as ``JobInfo`` models whose timestamps were
+never accessed, and as fully decoded models.
+
+    $ python benchmarks/bench_models.py --count 10000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from zencoder.models import JobInfo
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'test', 'fixtures',
+                       'job_list.json')
+
+def decode_all(job):
+    job.created_at, job.updated_at, job.finished_at, job.submitted_at
+    if job.input_media_file is not None:
+        job.input_media_file.created_at
+    for output in job.output_media_files or []:
+        output.created_at
+
+def measure(content, count, build):
+    gc.collect()
+    tracemalloc.start()
+    jobs = build(json.loads(content))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(jobs) == count
+    del jobs
+    return current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=10000)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'rb') as f:
+        items = json.loads(f.read())
+    content = json.dumps([items[i % len(items)] for i in range(args.count)])
+
+    def models(body):
+        return JobInfo.from_body(body)
+
+    def decoded(body):
+        jobs = JobInfo.from_body(body)
+        for job in jobs:
+            decode_all(job)
+        return jobs
+
+    results = [
+        ('dict', measure(content, args.count,
+                         lambda body: [item['job'] for item in body])),
+        ('JobInfo', measure(content, args.count, models)),
+        ('JobInfo decoded', measure(content, args.count, decoded)),
+    ]
+
+    print('{0:<18}{1:>14}{2:>14}{3:>12}'.format(
+        'mode', 'retained MB', 'peak MB', 'B/job'))
+    for name, (current, peak) in results:
+        print('{0:<18}{1:>14.1f}{2:>14.1f}{3:>12.0f}'.format(
+            name, current / 1e6, peak / 1e6, current / float(args.count)))
+
+if __name__ == '__main__':
+    main()
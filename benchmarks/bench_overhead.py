@@ -0,0 +1,99 @@
+""" Measures the per-call overhead of the client, without any network.
+
+Requests go to an adapter answering every request with the
+``job_progress.json`` fixture, so the time per ``job.progress`` call is the
+time spent in the client and requests. Also times the steps that used to
+run on every call: building the headers and formatting the URL.
+
+    $ python benchmarks/bench_overhead.py --calls 20000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from stub_server import load_fixture
+from zencoder import Zencoder
+from zencoder.core import __version__
+
+class CannedAdapter(BaseAdapter):
+    """ Answers every request with ``content``. """
+    def __init__(self, content):
+        super(CannedAdapter, self).__init__()
+        self.content = content
+
+    def send(self, request, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers = CaseInsensitiveDict(
+            {'Content-Type': 'application/json'})
+        response._content = self.content
+        response._content_consumed = True
+        response.request = request
+        response.url = request.url
+        return response
+
+    def close(self):
+        pass
+
+def rebuilt_headers(api_key):
+    # what ``HTTPBackend.headers`` did on every call
+    return {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'Zencoder-Api-Key': api_key,
+        'User-Agent': 'zencoder-py v{0}'.format(__version__)
+    }
+
+def per_call(function, calls):
+    """ Returns the microseconds per call of ``function``. """
+    return min(timeit.repeat(function, number=calls, repeat=3)) / calls * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    args = parser.parse_args()
+
+    adapter = CannedAdapter(load_fixture('fixtures/job_progress.json'))
+    zen = Zencoder('key', adapter=adapter)
+    job = zen.job
+
+    print('{0:<36}{1:>10}'.format('step', 'us/call'))
+    print('{0:<36}{1:>10.3f}'.format(
+        'headers, rebuilt', per_call(lambda: rebuilt_headers('key'), args.calls)))
+    print('{0:<36}{1:>10.3f}'.format(
+        'headers, precomputed', per_call(lambda: job.request_headers(),
+                                         args.calls)))
+    print('{0:<36}{1:>10.3f}'.format(
+        'url, concatenated',
+        per_call(lambda: job.base_url + '/%s/progress' % str(1234), args.calls)))
+    print('{0:<36}{1:>10.3f}'.format(
+        'url, template', per_call(lambda: job.urls['progress'](1234),
+                                  args.calls)))
+
+    calls = max(args.calls // 10, 1)
+    print('{0:<36}{1:>10.1f}'.format(
+        'job.progress', per_call(lambda: job.progress(1234), calls)))
+
+    prepared = Zencoder('key', adapter=adapter, prepared_requests=True)
+    print('{0:<36}{1:>10.1f}'.format(
+        'job.progress, prepared_requests',
+        per_call(lambda: prepared.job.progress(1234), calls)))
+
+    slim = Zencoder('key', adapter=adapter, prepared_requests=True,
+                    slim_responses=True)
+    print('{0:<36}{1:>10.1f}'.format(
+        'job.progress, prepared + slim',
+        per_call(lambda: slim.job.progress(1234), calls)))
+
+if __name__ == '__main__':
+    main()
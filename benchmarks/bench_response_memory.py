@@ -0,0 +1,69 @@
+""" Compares the memory retained by ``Response`` and ``SlimResponse``.
+
+Processes ``--count`` simulated ``job_progress`` responses with
+``HTTPBackend.process`` in both modes and keeps every result alive, as a
+long-running poller holding on to its latest responses would.
+
+    $ python benchmarks/bench_response_memory.py --count 100000
+"""
+
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from zencoder.core import HTTPBackend
+
+FIXTURE = os.path.join(os.path.dirname(__file__), '..', 'test', 'fixtures',
+                       'job_progress.json')
+
+def simulated_response(content):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = content
+    response.headers['Content-Type'] = 'application/json; charset=utf-8'
+    response.headers['ETag'] = '"1b2cf535f27731c974343645a3985328"'
+    response.headers['Cache-Control'] = 'max-age=0, private, must-revalidate'
+    response.headers['Server'] = 'nginx'
+    response.headers['X-Request-Id'] = '8f6e8ab1-a1f0-4a6c-9c8e-1f0d2a3b4c5d'
+    return response
+
+def measure(backend, content, count):
+    gc.collect()
+    tracemalloc.start()
+    responses = [backend.process(simulated_response(content))
+                 for _ in range(count)]
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del responses
+    return current, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=100000)
+    args = parser.parse_args()
+
+    with open(FIXTURE, 'rb') as f:
+        content = f.read()
+
+    results = {}
+    for name, slim in (('Response', False), ('SlimResponse', True)):
+        backend = HTTPBackend('http://localhost/', 'key', slim_responses=slim)
+        results[name] = measure(backend, content, args.count)
+
+    print('{0:<14}{1:>14}{2:>14}{3:>12}'.format(
+        'mode', 'retained MB', 'peak MB', 'B/resp'))
+    for name, (current, peak) in results.items():
+        print('{0:<14}{1:>14.1f}{2:>14.1f}{3:>12.0f}'.format(
+            name, current / 1e6, peak / 1e6, current / float(args.count)))
+
+    ratio = results['Response'][0] / float(results['SlimResponse'][0])
+    print('SlimResponse retains {0:.1f}x less memory'.format(ratio))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+""" Measures request coalescing under a thundering herd.
+
+``--threads`` threads ask for the same ``job.progress`` at the same moment,
+``--rounds`` times, against a local stub server answering after
+``--latency`` seconds; once without and once with ``single_flight``.
+
+    $ python benchmarks/bench_single_flight.py --threads 100
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+from stub_server import StubServer
+from zencoder import Zencoder
+
+def herd(zen, threads, rounds):
+    barrier = threading.Barrier(threads)
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(rounds):
+            barrier.wait()
+            start = time.time()
+            zen.job.progress(12345)
+            with lock:
+                latencies.append(time.time() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.time() - start, sorted(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    print('{0:<16}{1:>10}{2:>12}{3:>12}{4:>12}'.format(
+        'mode', 'requests', 'elapsed s', 'p50 ms', 'p99 ms'))
+
+    for name, single_flight in (('no coalescing', None), ('single_flight', True)):
+        with StubServer(latency=args.latency) as server:
+            zen = Zencoder('key', base_url=server.base_url,
+                           pool_maxsize=args.threads,
+                           single_flight=single_flight)
+            elapsed, latencies = herd(zen, args.threads, args.rounds)
+            zen.close()
+
+            print('{0:<16}{1:>10}{2:>12.2f}{3:>12.1f}{4:>12.1f}'.format(
+                name, len(server.requests), elapsed,
+                latencies[len(latencies) // 2] * 1000,
+                latencies[int(len(latencies) * 0.99)] * 1000))
+
+if __name__ == '__main__':
+    main()
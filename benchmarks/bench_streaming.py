@@ -0,0 +1,60 @@
+""" Compares the peak memory of ``Job.list`` with and without ``stream=True``.
+
+A local stub server answers a page of ``--jobs`` jobs (the ``job_list``
+fixture, repeated); the jobs are counted once decoded whole, and once
+streamed.
+
+    $ python benchmarks/bench_streaming.py --jobs 20000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+from stub_server import StubServer, load_fixture
+from zencoder import Zencoder
+
+def measure(zen, count, stream):
+    gc.collect()
+    tracemalloc.start()
+    start = time.time()
+    if stream:
+        jobs = sum(1 for _ in zen.job.list(per_page=count, stream=True))
+    else:
+        jobs = len(zen.job.list(per_page=count).body)
+    elapsed = time.time() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert jobs == count
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=20000)
+    args = parser.parse_args()
+
+    items = json.loads(load_fixture('fixtures/job_list.json').decode('utf-8'))
+    content = json.dumps([items[i % len(items)]
+                          for i in range(args.jobs)]).encode('utf-8')
+
+    print('page: {0} jobs, {1:.1f} MB'.format(args.jobs, len(content) / 1e6))
+    print('{0:<12}{1:>12}{2:>14}'.format('mode', 'elapsed s', 'peak MB'))
+
+    with StubServer() as server:
+        server.respond('GET', r'^/jobs$', 200, content)
+        zen = Zencoder('key', base_url=server.base_url)
+        for name, stream in (('buffered', False), ('stream', True)):
+            elapsed, peak = measure(zen, args.jobs, stream)
+            print('{0:<12}{1:>12.2f}{2:>14.1f}'.format(name, elapsed, peak / 1e6))
+        zen.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+""" Compares the per-request overhead of the transports.
+
+Sends ``--requests`` ``job.progress`` calls to a local stub server through
+each transport (requests, urllib3 and httpx when installed), serially and
+from ``--threads`` threads. The server answers immediately, so the time per
+call is mostly client and transport overhead.
+
+    $ python benchmarks/bench_transports.py --requests 5000
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'test'))
+
+from stub_server import StubServer
+from zencoder import Zencoder
+from zencoder.transport import RequestsTransport, Urllib3Transport
+from zencoder.transport import HttpxTransport
+
+def transports(pool_maxsize):
+    yield 'requests', lambda: RequestsTransport(pool_maxsize=pool_maxsize)
+    yield 'urllib3', lambda: Urllib3Transport(pool_maxsize=pool_maxsize)
+    try:
+        import httpx
+    except ImportError:
+        return
+    limits = httpx.Limits(max_connections=pool_maxsize)
+    yield 'httpx', lambda: HttpxTransport(limits=limits)
+
+def serial(zen, requests):
+    latencies = []
+    for i in range(requests):
+        start = time.time()
+        zen.job.progress(i)
+        latencies.append(time.time() - start)
+    return sorted(latencies)
+
+def threaded(zen, requests, threads):
+    per_thread = requests // threads
+
+    def worker():
+        for i in range(per_thread):
+            zen.job.progress(i)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.time()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return per_thread * threads / (time.time() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    print('{0:<12}{1:>14}{2:>14}{3:>14}{4:>16}'.format(
+        'transport', 'mean us', 'p50 us', 'p99 us', 'threaded req/s'))
+
+    with StubServer() as server:
+        for name, transport in transports(args.threads):
+            zen = Zencoder('key', base_url=server.base_url,
+                           transport=transport())
+            serial(zen, 50)
+            latencies = serial(zen, args.requests)
+            rate = threaded(zen, args.requests, args.threads)
+            zen.close()
+
+            print('{0:<12}{1:>14.0f}{2:>14.0f}{3:>14.0f}{4:>16.0f}'.format(
+                name, sum(latencies) / len(latencies) * 1e6,
+                latencies[len(latencies) // 2] * 1e6,
+                latencies[int(len(latencies) * 0.99)] * 1e6, rate))
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,8 @@ setup(name='zencoder',
       author_email='alex.schworer@gmail.com',
       url='http://github.com/schworer/zencoder-py',
       license="MIT License",
-      install_requires=['requests>=1.0'],
+      install_requires=['requests>=1.0',
+                        'futures; python_version < "3.2"'],
       tests_require=['mock', 'nose'],
       packages=['zencoder'],
       platforms='any',
@@ -24,6 +25,9 @@ setup(name='zencoder',
           'Programming Language :: Python :: 2.7',
           'Programming Language :: Python :: 3.3',
           'Programming Language :: Python :: 3.4',
+          'Programming Language :: Python :: 3.6',
+          'Programming Language :: Python :: 3.7',
+          'Programming Language :: Python :: 3.8',
           'Topic :: Software Development :: Libraries :: Python Modules'
       ]
      )
@@ -0,0 +1,363 @@
+""" Tests of the asyncio client, run by ``test_aio`` on Python 3.8 and
+later: this module does not even compile on older interpreters. """
+
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from test_util import TEST_API_KEY
+from stub_server import StubServer, load_fixture
+from zencoder.aio import AsyncZencoder, AsyncReport, StreamTransport
+from zencoder.aio import TransportResponse, ASGINotificationApp
+from zencoder.aio import ReplayTransport
+from zencoder.cassette import CassetteWriter, request_hash
+from zencoder.notifications import NotificationReceiver
+from zencoder.ratelimit import Quota
+from zencoder.retry import RetryPolicy
+from zencoder.cache import SingleFlight
+
+class FlakyTransport(StreamTransport):
+    """ Fails the first ``failures`` requests with a 503. """
+    def __init__(self, failures):
+        super(FlakyTransport, self).__init__()
+        self.failures = failures
+
+    async def request(self, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            return TransportResponse(503, {}, b'{}')
+        return await super(FlakyTransport, self).request(*args, **kwargs)
+
+class StaleTransport(StreamTransport):
+    """ Has one idle connection, reset by the server when used. """
+    def __init__(self):
+        super(StaleTransport, self).__init__()
+        self.stale = []
+
+    async def _send(self, pool, method, message, verify, cert):
+        if not self.stale:
+            reader = asyncio.StreamReader()
+            writer = FakeWriter()
+            self.stale.append(writer)
+            pool.idle.append((reader, writer))
+        return await super(StaleTransport, self)._send(pool, method, message,
+                                                       verify, cert)
+
+    async def _exchange(self, pool, reader, writer, method, message):
+        if isinstance(writer, FakeWriter):
+            raise ConnectionResetError('connection reset by peer')
+        return await super(StaleTransport, self)._exchange(
+            pool, reader, writer, method, message)
+
+class FakeWriter(object):
+    class transport(object):
+        @staticmethod
+        def is_closing():
+            return False
+
+    def close(self):
+        pass
+
+class TestAsyncZencoder(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.zen = AsyncZencoder(api_key=TEST_API_KEY,
+                                 base_url=self.server.base_url)
+
+    async def asyncTearDown(self):
+        await self.zen.close()
+        self.server.stop()
+
+    async def test_job_create(self):
+        resp = await self.zen.job.create('s3://zencodertesting/test.mov')
+
+        self.assertEquals(resp.code, 201)
+        self.assertTrue(resp.body['id'] > 0)
+
+        request = self.server.requests[0]
+        self.assertEquals(request.method, 'POST')
+        self.assertEquals(request.path, '/jobs')
+        self.assertEquals(request.headers['Zencoder-Api-Key'], TEST_API_KEY)
+        self.assertEquals(json.loads(request.body.decode('utf-8'))['input'],
+                          's3://zencodertesting/test.mov')
+
+    async def test_metrics(self):
+        zen = AsyncZencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                            metrics=True)
+        await zen.job.progress(1234)
+        await zen.job.progress(5678)
+        await zen.close()
+
+        metrics = zen.metrics.snapshot()['GET /jobs/:id/progress']
+        self.assertEquals(metrics['status'], {200: 2})
+        self.assertEquals(metrics['decode_time']['count'], 2)
+        self.assertTrue(metrics['bytes_in'] > 0)
+
+    async def test_job_list(self):
+        resp = await self.zen.job.list(page=2, per_page=3)
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(len(resp.body), 3)
+        self.assertEquals(self.server.requests[0].path,
+                          '/jobs?page=2&per_page=3')
+
+    async def test_job_iter_all(self):
+        self.server.respond('GET', r'^/jobs\?page=[2-9]', 200, b'[]')
+        jobs = [job async for job in self.zen.job.iter_all(per_page=5,
+                                                            prefetch=0)]
+
+        self.assertEquals(len(jobs), 3)
+        self.assertTrue(all('id' in job for job in jobs))
+        self.assertEquals([request.path for request in self.server.requests],
+                          ['/jobs?page=1&per_page=5', '/jobs?page=2&per_page=5'])
+
+    async def test_job_progress(self):
+        resp = await self.zen.job.progress(12345)
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(resp.body['state'], 'processing')
+
+    async def test_job_cancel(self):
+        resp = await self.zen.job.cancel(5555)
+
+        self.assertEquals(resp.code, 204)
+        self.assertEquals(resp.body, None)
+        self.assertEquals(self.server.requests[0].method, 'PUT')
+
+    async def test_output_details(self):
+        resp = await self.zen.output.details(22222)
+
+        self.assertEquals(resp.code, 200)
+        self.assertTrue(resp.body['id'] > 0)
+
+    async def test_input_progress(self):
+        resp = await self.zen.input.progress(1234)
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(resp.body['state'], 'processing')
+
+    async def test_account_details(self):
+        resp = await self.zen.account.details()
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(resp.body['account_state'], 'active')
+
+    async def test_reports_all(self):
+        report = AsyncReport(self.server.base_url, TEST_API_KEY,
+                             session=self.zen.session)
+        resp = await report.all()
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(resp.body['total']['vod']['billable_minutes'], 8)
+
+    async def test_connection_reuse(self):
+        await self.zen.job.progress(1)
+        await self.zen.output.progress(2)
+
+        stats = self.zen.pool_stats()
+        self.assertEquals(len(stats), 1)
+        self.assertEquals(stats[0]['connections'], 1)
+        self.assertEquals(stats[0]['requests'], 2)
+        self.assertEquals(stats[0]['idle'], 1)
+
+    async def test_retry(self):
+        policy = RetryPolicy(backoff_factor=0)
+        zen = AsyncZencoder(api_key=TEST_API_KEY,
+                            base_url=self.server.base_url,
+                            transport=FlakyTransport(2),
+                            retry=policy)
+
+        resp = await zen.job.progress(12345)
+        await zen.close()
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(policy.stats()['retries'], 2)
+
+    async def test_single_flight(self):
+        single_flight = SingleFlight()
+        zen = AsyncZencoder(api_key=TEST_API_KEY,
+                            base_url=self.server.base_url,
+                            single_flight=single_flight)
+
+        results = await asyncio.gather(*[zen.job.progress(1) for _ in range(10)])
+        await zen.close()
+
+        self.assertEquals(len(self.server.requests), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEquals(single_flight.stats(), {'calls': 1, 'shared': 9})
+
+    async def test_asgi_notifications(self):
+        receiver = NotificationReceiver()
+        received = []
+        receiver.add_callback(received.append)
+        app = ASGINotificationApp(receiver)
+
+        body = json.dumps({'job': {'id': 1, 'state': 'finished'}}).encode()
+        messages = [{'type': 'http.request', 'body': body[:10], 'more_body': True},
+                    {'type': 'http.request', 'body': body[10:]}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        await app({'type': 'http', 'method': 'POST', 'headers': []},
+                  receive, send)
+        receiver.close()
+
+        self.assertEquals(sent[0]['status'], 200)
+        self.assertEquals(received[0].job.state, 'finished')
+
+    async def test_stream(self):
+        jobs = [{'job': {'id': i, 'state': 'finished'}} for i in range(100)]
+        self.server.respond('GET', r'^/jobs$', 200, json.dumps(jobs).encode())
+
+        response = await self.zen.job.list(per_page=100, stream=True)
+        self.assertEquals(response.code, 200)
+        self.assertEquals(list(response), jobs)
+
+        self.server.respond('GET', r'^/reports/all$', 200,
+                            load_fixture('fixtures/report_all_date.json'))
+        report = AsyncReport(self.server.base_url, TEST_API_KEY,
+                             session=self.zen.session)
+        columns = await report.columns('all')
+        self.assertEquals(len(columns), 2)
+
+    async def test_job_create_many(self):
+        results = await self.zen.job.create_many(
+            ['s3://bucket/a.mov', {'input': 's3://bucket/b.mov'},
+             's3://bucket/c.mov'], concurrency=2)
+
+        self.assertEquals([r.index for r in results], [0, 1, 2])
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEquals(len(self.server.requests), 3)
+
+        batch = self.zen.job.create_many(['s3://bucket/d.mov'])
+        indexes = [result.index async for result in batch]
+        self.assertEquals(indexes, [0])
+        self.assertEquals(batch.stats.succeeded, 1)
+
+    async def test_job_wait(self):
+        self.zen.job.waiter.min_interval = 0.01
+        self.zen.job.waiter.max_interval = 0.05
+        self.server.respond('GET', r'^/jobs/1/progress$', 200,
+                            b'{"state": "finished"}')
+
+        event = await self.zen.job.wait(1, timeout=2)
+        self.assertEquals(event.state, 'finished')
+
+        waits = [self.zen.job.wait(2), self.zen.job.wait(2)]
+        self.zen.job.waiter.update('job', 2, 'cancelled')
+        events = await asyncio.gather(*waits)
+        self.assertEquals([e.state for e in events], ['cancelled', 'cancelled'])
+
+        done, not_done = await self.zen.job.wait_many(
+            [1, 3], timeout=2, return_when=asyncio.FIRST_COMPLETED)
+        self.assertEquals([f.job_id for f in done], [1])
+        self.assertEquals([f.job_id for f in not_done], [3])
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.zen.job.wait(3, timeout=0.05)
+
+    async def test_job_wait_timeout_stops_polling(self):
+        self.zen.job.waiter.min_interval = 0.01
+        self.zen.job.waiter.max_interval = 0.01
+        self.server.respond('GET', r'^/jobs/4/progress$', 200,
+                            b'{"state": "processing"}')
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.zen.job.wait(4, timeout=0.05)
+        await asyncio.sleep(0)
+        self.assertEquals(len(self.zen.job.waiter), 0)
+
+        # let the server record a poll that was in flight
+        await asyncio.sleep(0.03)
+        polled = len(self.server.requests)
+        await asyncio.sleep(0.1)
+        self.assertEquals(len(self.server.requests), polled)
+
+    async def test_job_wait_cancel(self):
+        self.zen.job.waiter.min_interval = 0.01
+        self.zen.job.waiter.max_interval = 0.01
+        self.server.respond('GET', r'^/jobs/\d+/progress$', 200,
+                            b'{"state": "processing"}')
+
+        first, second = self.zen.job.wait(5), self.zen.job.wait(5)
+        other = self.zen.job.wait(6)
+        self.assertEquals(len(self.zen.job.waiter), 2)
+
+        # job 5 is polled until its last waiter leaves
+        first.cancel()
+        await asyncio.sleep(0.02)
+        self.assertEquals(len(self.zen.job.waiter), 2)
+        second.cancel()
+        await asyncio.sleep(0)
+        self.assertEquals(len(self.zen.job.waiter), 1)
+
+        other.cancel()
+        await asyncio.sleep(0)
+        self.assertEquals(len(self.zen.job.waiter), 0)
+
+    async def test_stale_connection_retry(self):
+        transport = StaleTransport()
+        zen = AsyncZencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                            transport=transport)
+        try:
+            # resent on a fresh connection
+            self.assertEquals((await zen.job.progress(1)).code, 200)
+
+            # POST may have been processed, never resent
+            transport.stale = []
+            with self.assertRaises(ConnectionResetError):
+                await zen.job.create('s3://bucket/key.mov')
+            self.assertEquals([request.method
+                               for request in self.server.requests], ['GET'])
+        finally:
+            await zen.close()
+
+    async def test_stream_transport_proxies(self):
+        zen = AsyncZencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                            proxies={'http': 'http://proxy:3128'})
+        try:
+            with self.assertRaises(ValueError):
+                await zen.job.progress(1)
+        finally:
+            await zen.close()
+
+    def test_default_transport(self):
+        self.assertTrue(isinstance(self.zen.session, StreamTransport))
+        self.assertTrue(self.zen.job.http is self.zen.session)
+
+    def test_quota_rejected(self):
+        self.assertRaises(TypeError, AsyncZencoder, api_key=TEST_API_KEY,
+                          rate_limiter=Quota(max_concurrency=2))
+
+class TestAsyncReplay(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.cassette')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    async def test_replay(self):
+        url = 'http://host/jobs?page=1&per_page=50'
+        with CassetteWriter(self.path) as writer:
+            writer.write(request_hash('GET', url), 200,
+                         {'Content-Type': 'application/json'},
+                         b'[{"job": {"id": 1}}]', 0.25)
+
+        zen = AsyncZencoder(api_key=TEST_API_KEY, base_url='http://host/',
+                            transport=ReplayTransport(self.path))
+        try:
+            self.assertEquals((await zen.job.list()).body, [{'job': {'id': 1}}])
+        finally:
+            await zen.close()
+
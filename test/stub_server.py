@@ -0,0 +1,176 @@
+import argparse
+import hashlib
+import os
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+CUR_DIR = os.path.split(__file__)[0]
+
+# (method, path pattern, status code, fixture)
+ROUTES = [
+    ('POST', r'^/jobs$', 201, 'fixtures/job_create.json'),
+    ('GET', r'^/jobs$', 200, 'fixtures/job_list.json'),
+    ('GET', r'^/jobs/\d+$', 200, 'fixtures/job_details.json'),
+    ('GET', r'^/jobs/\d+/progress$', 200, 'fixtures/job_progress.json'),
+    ('PUT', r'^/jobs/\d+/(cancel|resubmit|finish)$', 204, None),
+    ('GET', r'^/outputs/\d+$', 200, 'fixtures/output_details.json'),
+    ('GET', r'^/outputs/\d+/progress$', 200, 'fixtures/output_progress.json'),
+    ('GET', r'^/inputs/\d+$', 200, 'fixtures/input_details.json'),
+    ('GET', r'^/inputs/\d+/progress$', 200, 'fixtures/input_progress.json'),
+    ('POST', r'^/account$', 201, 'fixtures/account_create.json'),
+    ('GET', r'^/account$', 200, 'fixtures/account_details.json'),
+    ('PUT', r'^/account/(integration|live)$', 204, None),
+    ('GET', r'^/reports/minutes$', 200, 'fixtures/report_vod.json'),
+    ('GET', r'^/reports/vod$', 200, 'fixtures/report_vod.json'),
+    ('GET', r'^/reports/live$', 200, 'fixtures/report_live.json'),
+    ('GET', r'^/reports/all$', 200, 'fixtures/report_all.json'),
+]
+
+def load_fixture(fixture):
+    with open(os.path.join(CUR_DIR, fixture), 'rb') as f:
+        return f.read()
+
+class StubRequest(object):
+    def __init__(self, method, path, headers, body):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # headers and body are written separately, don't wait for delayed ACKs
+    disable_nagle_algorithm = True
+
+    def handle_any(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        path = self.path.split('?', 1)[0]
+
+        self.server.requests.append(
+            StubRequest(self.command, self.path, dict(self.headers), body))
+
+        server = self.server
+        delay = server.latency
+        if server.jitter:
+            delay += server.random.uniform(0, server.jitter)
+        if delay:
+            time.sleep(delay)
+
+        for method, pattern, code, content in server.routes:
+            if method == self.command and (re.match(pattern, path) or
+                                           re.match(pattern, self.path)):
+                break
+        else:
+            code, content = 404, b'{"errors": ["Not Found"]}'
+
+        if server.error_rate and server.random.random() < server.error_rate:
+            code = server.random.choice(server.error_codes)
+            content = b'{"errors": ["Stub server error"]}'
+
+        headers = {'Content-Type': 'application/json'}
+        if self.server.etags and code == 200 and content:
+            etag = '"{0}"'.format(hashlib.md5(content).hexdigest())
+            headers['ETag'] = etag
+            if self.headers.get('If-None-Match') == etag:
+                code, content = 304, None
+
+        self.send_response(code)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(content or b'')))
+        self.end_headers()
+        if content:
+            self.wfile.write(content)
+
+    do_GET = do_POST = do_PUT = do_DELETE = handle_any
+
+    def log_message(self, *args):
+        pass
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class StubServer(object):
+    """ A local HTTP server replaying the fixtures in ``test/fixtures``.
+
+    Every request received is recorded in ``requests``. With ``etags=True``,
+    successful responses carry an ``ETag``, and requests with a matching
+    ``If-None-Match`` get a 304 Not Modified. Every response is delayed by
+    ``latency`` seconds, plus up to ``jitter`` seconds at random, and a
+    fraction ``error_rate`` of the requests is answered with one of
+    ``error_codes``. ``seed`` makes the random delays and errors repeatable.
+    """
+    def __init__(self, routes=None, etags=False, latency=0, jitter=0,
+                 error_rate=0, error_codes=(500, 503), seed=None, port=0):
+        self.httpd = _Server(('127.0.0.1', port), StubHandler)
+        self.httpd.etags = etags
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.error_rate = error_rate
+        self.httpd.error_codes = tuple(error_codes)
+        self.httpd.random = random.Random(seed)
+        self.httpd.requests = self.requests = []
+        self.httpd.routes = [
+            (method, pattern, code, load_fixture(fixture) if fixture else None)
+            for method, pattern, code, fixture in (routes or ROUTES)]
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       kwargs={'poll_interval': 0.05})
+        self.thread.daemon = True
+
+    def respond(self, method, pattern, code, content):
+        """ Answers requests matching ``method`` and ``pattern`` with
+        ``code`` and ``content`` (bytes), ahead of the other routes.
+        ``pattern`` is matched against the path with and without the query
+        string. """
+        self.httpd.routes.insert(0, (method, pattern, code, content))
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/'.format(self.httpd.server_port)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Serves the test fixtures like the Zencoder API.')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--jitter', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--etags', action='store_true')
+    args = parser.parse_args()
+
+    server = StubServer(etags=args.etags, latency=args.latency,
+                        jitter=args.jitter, error_rate=args.error_rate,
+                        port=args.port).start()
+    print('Serving the fixtures on {0}'.format(server.base_url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+""" The asyncio client requires Python 3.6, and its tests 3.8
+(``unittest.IsolatedAsyncioTestCase``). They live in ``asyncio_cases`` so
+that older interpreters can still collect the test suite. """
+import sys
+
+if sys.version_info >= (3, 8):
+    from asyncio_cases import TestAsyncZencoder, TestAsyncReplay
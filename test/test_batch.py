@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+import unittest
+from mock import patch
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.batch import create_kwargs, percentile
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.zen = Zencoder(api_key=TEST_API_KEY)
+
+    @patch("requests.Session.post")
+    def test_create_many(self, post):
+        post.return_value = load_response(201, 'fixtures/job_create.json')
+
+        specs = ['s3://bucket/%d.mov' % i for i in range(20)]
+        batch = self.zen.job.create_many(specs, concurrency=4)
+        results = batch.results()
+
+        self.assertEquals([r.index for r in results], list(range(20)))
+        self.assertTrue(all(r.ok for r in results))
+        self.assertEquals(post.call_count, 20)
+        self.assertEquals(batch.stats.succeeded, 20)
+        self.assertEquals(batch.stats.failed, 0)
+        self.assertTrue(batch.stats.p99 >= batch.stats.p50)
+
+        inputs = set(json.loads(c[1]['data'])['input'] for c in post.call_args_list)
+        self.assertEquals(inputs, set(specs))
+
+    @patch("requests.Session.post")
+    def test_create_many_errors(self, post):
+        def create(url, data=None, **kwargs):
+            if json.loads(data)['input'] == 'bad':
+                raise IOError('connection reset')
+            if json.loads(data)['input'] == 'invalid':
+                return load_response(422, 'fixtures/job_create.json')
+            return load_response(201, 'fixtures/job_create.json')
+        post.side_effect = create
+
+        results = self.zen.job.create_many(['good', 'bad', 'invalid']).results()
+
+        self.assertTrue(results[0].ok)
+        self.assertFalse(results[1].ok)
+        self.assertTrue(isinstance(results[1].error, IOError))
+        self.assertFalse(results[2].ok)
+        self.assertEquals(results[2].response.code, 422)
+
+    @patch("requests.Session.post")
+    def test_create_many_concurrency_limit(self, post):
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max': 0}
+
+        def create(*args, **kwargs):
+            with lock:
+                state['in_flight'] += 1
+                state['max'] = max(state['max'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return load_response(201, 'fixtures/job_create.json')
+        post.side_effect = create
+
+        specs = ('s3://bucket/%d.mov' % i for i in range(30))
+        results = list(self.zen.job.create_many(specs, concurrency=3))
+
+        self.assertEquals(len(results), 30)
+        self.assertEquals(state['max'], 3)
+
+    def test_create_kwargs(self):
+        self.assertEquals(create_kwargs('s3://a.mov'), {'input': 's3://a.mov'})
+        self.assertEquals(create_kwargs({'input': 's3://a.mov',
+                                         'options': {'region': 'us'},
+                                         'notifications': ['a@b.com']}),
+                          {'input': 's3://a.mov',
+                           'options': {'region': 'us',
+                                       'notifications': ['a@b.com']}})
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEquals(percentile(values, 50), 50)
+        self.assertEquals(percentile(values, 99), 99)
+        self.assertEquals(percentile([], 50), None)
+
+if __name__ == "__main__":
+    unittest.main()
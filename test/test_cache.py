@@ -0,0 +1,176 @@
+import threading
+import time
+import unittest
+from mock import patch
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.cache import ResponseCache, SingleFlight
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(maxsize=10, ttl=60)
+        self.zen = Zencoder(api_key=TEST_API_KEY, cache=self.cache)
+
+    @patch("requests.Session.get")
+    def test_cache_details(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+
+        first = self.zen.job.details(1234)
+        second = self.zen.job.details(1234)
+        self.zen.job.details(5678)
+
+        self.assertTrue(first is second)
+        self.assertEquals(get.call_count, 2)
+        self.assertEquals(self.cache.stats(),
+                          {'hits': 1, 'misses': 2, 'evictions': 0, 'size': 2})
+
+    @patch("requests.Session.get")
+    def test_cache_params(self, get):
+        get.return_value = load_response(200, 'fixtures/job_list.json')
+
+        self.zen.job.list(page=1)
+        self.zen.job.list(page=2)
+        self.zen.job.list(page=1)
+
+        self.assertEquals(get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_errors_not_cached(self, get):
+        get.return_value = load_response(404, 'fixtures/job_details.json')
+
+        self.zen.job.details(1234)
+        self.zen.job.details(1234)
+
+        self.assertEquals(get.call_count, 2)
+
+    @patch("requests.Session.put")
+    @patch("requests.Session.get")
+    def test_cancel_invalidates(self, get, put):
+        get.return_value = load_response(200, 'fixtures/job_progress.json')
+        put.return_value = load_response(204)
+
+        self.zen.job.details(1234)
+        self.zen.job.progress(1234)
+        self.zen.job.progress(12345)
+        self.zen.job.cancel(1234)
+
+        self.assertEquals(len(self.cache), 1)
+        self.zen.job.progress(1234)
+        self.assertEquals(get.call_count, 4)
+
+    @patch("requests.Session.put")
+    @patch("requests.Session.get")
+    def test_invalidates_after_mutation(self, get, put):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        self.zen.job.details(1234)
+
+        def cancel(*args, **kwargs):
+            # a concurrent read while the job is being cancelled
+            self.zen.job.details(1234)
+            return load_response(204)
+        put.side_effect = cancel
+
+        self.zen.job.cancel(1234)
+        self.assertEquals(len(self.cache), 0)
+
+        # failed mutations keep the cache
+        self.zen.job.details(1234)
+        put.side_effect = None
+        put.return_value = load_response(404, 'fixtures/job_details.json')
+        self.zen.job.resubmit(1234)
+        self.assertEquals(len(self.cache), 1)
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=0.01, ttls={'reports': 60}, terminal_ttl=60)
+        processing = load_response(200, 'fixtures/job_progress.json')
+        processing = self.zen.job.process(processing)
+        finished = self.zen.job.process(load_response(200, 'fixtures/job_details.json'))
+
+        cache.set('jobs', 'processing', processing)
+        cache.set('jobs', 'finished', finished)
+        cache.set('reports', 'report', processing)
+        time.sleep(0.02)
+
+        self.assertEquals(cache.get('processing'), None)
+        self.assertTrue(cache.get('finished') is finished)
+        self.assertTrue(cache.get('report') is processing)
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        response = self.zen.job.process(load_response(200, 'fixtures/job_progress.json'))
+
+        cache.set('jobs', 'a', response)
+        cache.set('jobs', 'b', response)
+        cache.get('a')
+        cache.set('jobs', 'c', response)
+
+        self.assertTrue(cache.get('a') is response)
+        self.assertEquals(cache.get('b'), None)
+        self.assertEquals(cache.stats()['evictions'], 1)
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.zen = Zencoder(api_key=TEST_API_KEY,
+                            single_flight=self.single_flight)
+
+    def run_threads(self, target, count=20):
+        barrier = threading.Barrier(count)
+        results = []
+
+        def worker():
+            barrier.wait()
+            try:
+                results.append(target())
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    @patch("requests.Session.get")
+    def test_coalesce_concurrent_gets(self, get):
+        def slow_get(*args, **kwargs):
+            time.sleep(0.1)
+            return load_response(200, 'fixtures/job_progress.json')
+        get.side_effect = slow_get
+
+        results = self.run_threads(lambda: self.zen.job.progress(1234))
+
+        self.assertEquals(get.call_count, 1)
+        self.assertEquals(len(results), 20)
+        self.assertTrue(all(r is results[0] for r in results))
+        self.assertEquals(self.single_flight.stats(), {'calls': 1, 'shared': 19})
+
+    @patch("requests.Session.get")
+    def test_coalesce_errors(self, get):
+        def failing_get(*args, **kwargs):
+            time.sleep(0.1)
+            raise IOError('connection reset')
+        get.side_effect = failing_get
+
+        results = self.run_threads(lambda: self.zen.job.progress(1234), 5)
+
+        self.assertEquals(get.call_count, 1)
+        self.assertTrue(all(isinstance(r, IOError) for r in results))
+
+    @patch("requests.Session.get")
+    def test_different_keys(self, get):
+        get.return_value = load_response(200, 'fixtures/job_progress.json')
+
+        self.zen.job.progress(1)
+        self.zen.job.progress(1)
+        self.zen.job.list(page=1)
+        self.zen.job.list(page=2)
+
+        self.assertEquals(get.call_count, 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from stub_server import StubServer
+from test_util import TEST_API_KEY
+from zencoder import Zencoder
+from zencoder.cassette import Cassette, CassetteWriter, CassetteMiss
+from zencoder.cassette import RecordingAdapter, ReplayAdapter
+from zencoder.cassette import normalize_url, request_hash
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'test.cassette')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def record(self, *records):
+        with CassetteWriter(self.path) as writer:
+            for method, url, body, code, content in records:
+                writer.write(request_hash(method, url, body), code,
+                             {'Content-Type': 'application/json',
+                              'Transfer-Encoding': 'chunked'},
+                             content, 0.25)
+
+    def test_normalize_url(self):
+        self.assertEquals(normalize_url('http://host/jobs?b=2&a=1'),
+                          'http://host/jobs?a=1&b=2')
+        self.assertEquals(normalize_url('http://host/jobs', {'page': 2, 'x': None}),
+                          'http://host/jobs?page=2')
+        self.assertEquals(request_hash('get', 'http://host/jobs?b=2&a=1'),
+                          request_hash('GET', 'http://host/jobs?a=1&b=2'))
+        self.assertNotEqual(request_hash('POST', 'http://host/jobs', '{"a": 1}'),
+                            request_hash('POST', 'http://host/jobs', '{"a": 2}'))
+
+    def test_lookup(self):
+        self.record(('GET', 'http://host/jobs/1', None, 200, b'{"id": 1}'),
+                    ('GET', 'http://host/jobs/2', None, 404, b''))
+        cassette = Cassette(self.path)
+
+        self.assertEquals(len(cassette), 2)
+        record = cassette.lookup('GET', 'http://host/jobs/1')
+        self.assertEquals(record.status_code, 200)
+        self.assertEquals(record.content, b'{"id": 1}')
+        self.assertEquals(record.headers, {'Content-Type': 'application/json'})
+        self.assertEquals(record.elapsed, 0.25)
+        self.assertEquals(cassette.lookup('GET', 'http://host/jobs/2').content, b'')
+        self.assertTrue(cassette.lookup('GET', 'http://host/jobs/3') is None)
+        cassette.close()
+
+    def test_repeat(self):
+        url = 'http://host/jobs/1/progress'
+        self.record(*[('GET', url, None, 200, state)
+                      for state in (b'waiting', b'processing', b'finished')])
+
+        cassette = Cassette(self.path)
+        replayed = [cassette.lookup('GET', url).content for _ in range(4)]
+        self.assertEquals(replayed, [b'waiting', b'processing', b'finished',
+                                     b'finished'])
+        cassette.rewind()
+        self.assertEquals(cassette.lookup('GET', url).content, b'waiting')
+        cassette.close()
+
+        cassette = Cassette(self.path, repeat='cycle')
+        replayed = [cassette.lookup('GET', url).content for _ in range(4)]
+        self.assertEquals(replayed[3], b'waiting')
+        cassette.close()
+
+    def test_not_a_cassette(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'x' * 64)
+        self.assertRaises(ValueError, Cassette, self.path)
+
+    def test_record_and_replay(self):
+        with StubServer() as server:
+            zen = Zencoder(api_key=TEST_API_KEY, base_url=server.base_url,
+                           adapter=RecordingAdapter(self.path))
+            created = zen.job.create('s3://bucket/key.mp4')
+            listed = zen.job.list(page=2, per_page=10)
+            progress = zen.job.progress(1234)
+            zen.close()
+
+        zen = Zencoder(api_key=TEST_API_KEY, base_url=server.base_url,
+                       adapter=ReplayAdapter(self.path))
+        self.assertEquals(zen.job.create('s3://bucket/key.mp4').body, created.body)
+        self.assertEquals(zen.job.create('s3://bucket/key.mp4').code, 201)
+        self.assertEquals(zen.job.list(page=2, per_page=10).body, listed.body)
+        replayed = zen.job.progress(1234)
+        self.assertEquals(replayed.body, progress.body)
+        self.assertEquals(replayed.raw_response.headers['Content-Type'],
+                          'application/json')
+        self.assertEquals([item['job']['id'] for item in
+                           zen.job.list(page=2, per_page=10, stream=True)],
+                          [job['job']['id'] for job in listed.body])
+
+        self.assertRaises(CassetteMiss, zen.job.list, page=3)
+        self.assertRaises(CassetteMiss, zen.job.create, 's3://bucket/other.mp4')
+        zen.close()
+
+    def test_timing(self):
+        url = 'http://host/jobs/1'
+        self.record(('GET', url, None, 200, b'{}'))
+
+        zen = Zencoder(api_key=TEST_API_KEY, base_url='http://host/',
+                       adapter=ReplayAdapter(self.path, timing=True, speed=5))
+        start = time.time()
+        zen.job.details(1)
+        self.assertTrue(0.04 < time.time() - start < 0.25)
+        zen.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+from mock import patch
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder import codec
+
+class TestCodec(unittest.TestCase):
+
+    def test_default_codec(self):
+        preferred = codec.available_codecs()[0]
+        self.assertEquals(codec.get_codec().name, preferred)
+        self.assertEquals(codec.available_codecs()[-1], 'json')
+
+    def test_codecs_roundtrip(self):
+        data = {'input': 's3://bucket/key.mov', 'outputs': [{'label': 'web'}]}
+        for name in codec.available_codecs():
+            c = codec.get_codec(name)
+            encoded = c.dumps(data)
+            self.assertEquals(c.loads(encoded), data)
+            if isinstance(encoded, bytes):
+                encoded = encoded.decode('utf-8')
+            self.assertEquals(c.loads(encoded.encode('utf-8')), data)
+
+    def test_unknown_codec(self):
+        self.assertRaises(ValueError, codec.get_codec, 'yaml')
+
+    def test_custom_codec(self):
+        custom = codec.JSONCodec()
+        self.assertTrue(codec.get_codec(custom) is custom)
+
+    def test_invalid_json(self):
+        for name in codec.available_codecs():
+            self.assertRaises(ValueError, codec.get_codec(name).loads, b'<html>')
+
+    @patch("requests.Session.get")
+    def test_client_codec(self, get):
+        get.return_value = load_response(200, 'fixtures/job_progress.json')
+
+        zen = Zencoder(api_key=TEST_API_KEY, codec='json')
+        self.assertEquals(zen.job.codec.name, 'json')
+        self.assertTrue(zen.job.codec is zen.output.codec)
+
+        resp = zen.job.progress(1234)
+        self.assertEquals(resp.body['state'], 'processing')
+
+if __name__ == "__main__":
+    unittest.main()
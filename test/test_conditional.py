@@ -0,0 +1,85 @@
+import unittest
+from mock import patch
+
+from test_util import TEST_API_KEY
+from stub_server import StubServer
+from zencoder import Zencoder
+from zencoder.cache import ConditionalCache, ResponseCache
+
+class TestConditionalGet(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(etags=True).start()
+        self.conditional = ConditionalCache()
+        self.zen = Zencoder(api_key=TEST_API_KEY,
+                            base_url=self.server.base_url,
+                            conditional=self.conditional)
+
+    def tearDown(self):
+        self.zen.close()
+        self.server.stop()
+
+    def test_not_modified(self):
+        first = self.zen.job.progress(12345)
+
+        with patch.object(self.zen.job.codec, 'loads') as loads:
+            second = self.zen.job.progress(12345)
+            self.assertFalse(loads.called)
+
+        self.assertTrue(second is first)
+        self.assertEquals(second.body['state'], 'processing')
+
+        self.assertFalse('If-None-Match' in self.server.requests[0].headers)
+        self.assertTrue(self.server.requests[1].headers['If-None-Match'])
+        self.assertEquals(self.conditional.stats(),
+                          {'revalidations': 1, 'not_modified': 1, 'size': 1})
+
+    def test_modified(self):
+        first = self.zen.job.progress(12345)
+        self.server.respond('GET', r'^/jobs/12345/progress$', 200,
+                            b'{"state": "finished", "progress": 100}')
+
+        second = self.zen.job.progress(12345)
+
+        self.assertEquals(first.body['state'], 'processing')
+        self.assertEquals(second.body['state'], 'finished')
+        self.assertEquals(self.conditional.stats()['not_modified'], 0)
+
+        third = self.zen.job.progress(12345)
+        self.assertTrue(third is second)
+
+    def test_per_url(self):
+        self.zen.job.progress(1)
+        self.zen.job.progress(2)
+        self.zen.job.list(page=1)
+        self.zen.job.list(page=2)
+
+        self.assertEquals(len(self.conditional), 4)
+        self.assertEquals(self.conditional.stats()['not_modified'], 0)
+
+    def test_without_etags(self):
+        server = StubServer().start()
+        zen = Zencoder(api_key=TEST_API_KEY, base_url=server.base_url,
+                       conditional=True)
+        try:
+            zen.job.progress(1)
+            zen.job.progress(1)
+        finally:
+            zen.close()
+            server.stop()
+
+        self.assertEquals(len(zen.conditional), 0)
+        self.assertFalse('If-None-Match' in server.requests[1].headers)
+
+    def test_with_response_cache(self):
+        zen = Zencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                       conditional=self.conditional,
+                       cache=ResponseCache(ttl=60))
+
+        zen.job.details(1)
+        zen.job.details(1)
+
+        self.assertEquals(len(self.server.requests), 1)
+
+if __name__ == "__main__":
+    unittest.main()
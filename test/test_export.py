@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from test_util import TEST_API_KEY
+from stub_server import StubServer, load_fixture
+from zencoder import Zencoder, ZencoderResponseError
+from zencoder.core import Report
+from zencoder import export
+from zencoder.export import ReportColumns, CSVWriter, open_writer
+from zencoder.reporting import ReportAggregator
+
+REPORT_ALL = json.loads(load_fixture('fixtures/report_all_date.json').decode('utf-8'))
+
+class TestReportColumns(unittest.TestCase):
+
+    def test_add_body(self):
+        columns = ReportColumns('all')
+        columns.add_body(REPORT_ALL, account='main')
+
+        self.assertEquals(len(columns), 2)
+        data = columns.columns()
+        self.assertEquals(data['account'], ['main', 'main'])
+        self.assertEquals(data['kind'], ['vod', 'live'])
+        self.assertEquals(data['collected_on'], ['2013-05-13', '2013-05-13'])
+        self.assertEquals(data['encoded_minutes'], [5, None])
+        self.assertEquals(data['total_hours'], [None, 2])
+
+    def test_extend(self):
+        columns = ReportColumns('all')
+        columns.add_body(REPORT_ALL, account='a')
+        other = ReportColumns('all')
+        other.add_body(REPORT_ALL, account='b')
+
+        columns.extend(other)
+
+        self.assertEquals(columns.columns()['account'], ['a', 'a', 'b', 'b'])
+        self.assertRaises(ValueError, columns.extend, ReportColumns('vod'))
+        self.assertRaises(ValueError, ReportColumns, 'foo')
+
+    def test_csv(self):
+        columns = ReportColumns('vod')
+        columns.append('vod', {'collected_on': '2013-05-13', 'grouping': 'web',
+                               'encoded_minutes': 5, 'billable_minutes': 1})
+        output = io.StringIO()
+
+        writer = CSVWriter(output)
+        writer.write(columns)
+        writer.write(columns)
+        self.assertRaises(ValueError, writer.write, ReportColumns('live'))
+
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        self.assertEquals(rows[0], list(columns.names))
+        self.assertEquals(rows[1], ['', 'vod', '2013-05-13', 'web', '5', '1'])
+        self.assertEquals(len(rows), 3)
+
+    def test_open_writer(self):
+        self.assertRaises(ValueError, open_writer, 'report.xlsx')
+        if export.pyarrow is None:
+            self.assertRaises(ImportError, open_writer, 'report.parquet')
+
+    @unittest.skipIf(export.pyarrow is None, 'pyarrow is not installed')
+    def test_arrow(self):
+        columns = ReportColumns('all')
+        columns.add_body(REPORT_ALL)
+        table = columns.to_arrow()
+
+        self.assertEquals(table.num_rows, 2)
+        self.assertEquals(table.column('encoded_minutes').to_pylist(), [5.0, None])
+
+class TestReportExport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.server.respond('GET', r'^/reports/all$', 200,
+                            load_fixture('fixtures/report_all_date.json'))
+        self.zen = Zencoder(api_key=TEST_API_KEY, base_url=self.server.base_url)
+        self.report = Report(self.server.base_url, TEST_API_KEY,
+                             session=self.zen.session)
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.zen.close()
+        self.server.stop()
+        shutil.rmtree(self.tmp)
+
+    def test_report_columns(self):
+        columns = self.report.columns('all', date(2013, 5, 1), date(2013, 5, 31),
+                                      account='main')
+
+        self.assertEquals(columns.columns()['kind'], ['vod', 'live'])
+        self.assertTrue('from=2013-05-01' in self.server.requests[0].path)
+
+        self.server.respond('GET', r'^/reports/vod$', 401, b'{"errors": []}')
+        self.assertRaises(ZencoderResponseError, self.report.columns, 'vod')
+
+    def test_aggregator_export(self):
+        aggregator = ReportAggregator(self.report, today=lambda: date(2013, 6, 1))
+        path = os.path.join(self.tmp, 'report.csv')
+
+        with open_writer(path) as writer:
+            written = aggregator.export(writer, 'all', date(2013, 3, 1),
+                                        date(2013, 5, 31), account='main')
+
+        with open(path) as f:
+            rows = list(csv.reader(f))
+        self.assertEquals(written, 6)
+        self.assertEquals(len(rows), 7)
+        self.assertEquals(len(self.server.requests), 3)
+
+if __name__ == "__main__":
+    unittest.main()
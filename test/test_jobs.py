@@ -1,7 +1,8 @@
+import json
 import unittest
 from mock import patch
 
-from test_util import TEST_API_KEY, load_response
+from test_util import TEST_API_KEY, MockResponse, load_response
 from zencoder import Zencoder
 
 class TestJobs(unittest.TestCase):
@@ -78,6 +79,43 @@ class TestJobs(unittest.TestCase):
         self.assertEquals(resp.code, 200)
         self.assertEquals(len(resp.body), 1)
 
+    @patch("requests.Session.get")
+    def test_job_iter_all(self, get):
+        def list_jobs(url, params=None, **kwargs):
+            start = (params['page'] - 1) * params['per_page']
+            ids = range(start, min(start + params['per_page'], 7))
+            body = [{'job': {'id': i}} for i in ids]
+            return MockResponse(200, lambda: body, json.dumps(body))
+        get.side_effect = list_jobs
+
+        jobs = list(self.zen.job.iter_all(per_page=3, prefetch=2))
+
+        self.assertEquals([job['id'] for job in jobs], list(range(7)))
+        requested = sorted(c[1]['params']['page'] for c in get.call_args_list)
+        self.assertEquals(requested[:4], [1, 2, 3, 4])
+        self.assertTrue(len(requested) <= 6)
+
+    @patch("requests.Session.get")
+    def test_job_iter_all_capped_pages(self, get):
+        def list_jobs(url, params=None, **kwargs):
+            # the API serves fewer jobs per page than requested
+            start = (params['page'] - 1) * 2
+            body = [{'job': {'id': i}} for i in range(start, min(start + 2, 5))]
+            return MockResponse(200, lambda: body, json.dumps(body))
+        get.side_effect = list_jobs
+
+        jobs = list(self.zen.job.iter_all(per_page=100, prefetch=0))
+
+        self.assertEquals([job['id'] for job in jobs], list(range(5)))
+        self.assertEquals(get.call_count, 4)
+
+    @patch("requests.Session.get")
+    def test_job_iter_all_empty_page(self, get):
+        get.return_value = MockResponse(200, lambda: [], '[]')
+
+        self.assertEquals(list(self.zen.job.iter_all(prefetch=0)), [])
+        self.assertEquals(get.call_count, 1)
+
     @patch("requests.Session.put")
     def test_job_finish(self, put):
         put.return_value = load_response(204)
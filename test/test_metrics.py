@@ -0,0 +1,201 @@
+import unittest
+import requests
+from mock import patch
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.hooks import Hook
+from zencoder.metrics import MetricsCollector, Histogram, endpoint
+from zencoder.metrics import OpenTelemetryHook, prometheus_text
+from zencoder.retry import RetryPolicy
+
+class Recorder(Hook):
+    def __init__(self, name, calls):
+        self.name = name
+        self.calls = calls
+
+    def before_request(self, method, url, kwargs):
+        self.calls.append((self.name, 'before_request', method))
+        kwargs['headers'] = dict(kwargs.get('headers') or {}, Trace=self.name)
+
+    def after_response(self, method, url, kwargs, response, elapsed):
+        self.calls.append((self.name, 'after_response', response.status_code))
+
+    def on_error(self, method, url, kwargs, error, elapsed):
+        self.calls.append((self.name, 'on_error', type(error).__name__))
+
+    def after_process(self, method, url, response, result, elapsed):
+        self.calls.append((self.name, 'after_process', result.code))
+
+class TestHooks(unittest.TestCase):
+
+    @patch("requests.Session.get")
+    def test_order(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        calls = []
+        zen = Zencoder(api_key=TEST_API_KEY,
+                       hooks=[Recorder('outer', calls), Recorder('inner', calls)])
+
+        zen.job.details(1234)
+
+        self.assertEquals(calls, [
+            ('outer', 'before_request', 'get'),
+            ('inner', 'before_request', 'get'),
+            ('inner', 'after_response', 200),
+            ('outer', 'after_response', 200),
+            ('inner', 'after_process', 200),
+            ('outer', 'after_process', 200)])
+        # hooks can change the request
+        self.assertEquals(get.call_args[1]['headers']['Trace'], 'inner')
+
+    @patch("requests.Session.get")
+    def test_errors_and_retries(self, get):
+        get.side_effect = [requests.exceptions.ConnectionError(),
+                           load_response(200, 'fixtures/job_details.json')]
+        calls = []
+        zen = Zencoder(api_key=TEST_API_KEY, hooks=[Recorder('hook', calls)],
+                       retry=RetryPolicy(backoff_factor=0))
+
+        zen.job.details(1234)
+
+        self.assertEquals([call[1:] for call in calls], [
+            ('before_request', 'get'),
+            ('on_error', 'ConnectionError'),
+            ('before_request', 'get'),
+            ('after_response', 200),
+            ('after_process', 200)])
+
+    @patch("requests.Session.get")
+    def test_no_hooks(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        zen = Zencoder(api_key=TEST_API_KEY)
+
+        self.assertTrue(zen.job.hooks is None)
+        self.assertTrue(zen.metrics is None)
+        self.assertEquals(zen.job.details(1234).code, 200)
+
+class FakeInstrument(object):
+    def __init__(self, name):
+        self.name = name
+        self.calls = []
+
+    def add(self, value, attributes):
+        self.calls.append((value, attributes))
+
+    record = add
+
+class FakeMeter(object):
+    """ Records the measurements of its instruments, like an OpenTelemetry
+    ``Meter``. """
+    def __init__(self):
+        self.instruments = {}
+
+    def create_histogram(self, name, unit='', description=''):
+        return self.instruments.setdefault(name, FakeInstrument(name))
+
+    create_counter = create_histogram
+
+class TestMetricsCollector(unittest.TestCase):
+
+    def test_endpoint(self):
+        self.assertEquals(
+            endpoint('get', 'https://app.zencoder.com/api/v2/jobs/12/progress'),
+            'GET /api/v2/jobs/:id/progress')
+        self.assertEquals(endpoint('post', 'https://app.zencoder.com/api/v2/jobs'),
+                          'POST /api/v2/jobs')
+
+    def test_histogram(self):
+        histogram = Histogram(buckets=(0.1, 1.0))
+        for value in (0.05, 0.05, 0.5, 2.0):
+            histogram.observe(value)
+
+        self.assertEquals(histogram.counts, [2, 1, 1])
+        self.assertEquals(histogram.quantile(0.5), 0.1)
+        self.assertEquals(histogram.quantile(0.75), 1.0)
+        self.assertEquals(histogram.quantile(1), float('inf'))
+        self.assertEquals(histogram.cumulative(),
+                          [(0.1, 2), (1.0, 3), (float('inf'), 4)])
+
+    @patch("requests.Session.post")
+    @patch("requests.Session.get")
+    def test_collect(self, get, post):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        post.return_value = load_response(201, 'fixtures/job_create.json')
+        zen = Zencoder(api_key=TEST_API_KEY, metrics=True)
+
+        zen.job.details(1234)
+        zen.job.details(5678)
+        zen.job.create('s3://bucket/key.mp4')
+        get.return_value = load_response(404, 'fixtures/job_create.json')
+        zen.job.details(1)
+
+        metrics = zen.metrics.snapshot()
+        details = metrics['GET /api/v2/jobs/:id']
+        self.assertEquals(details['requests'], 3)
+        self.assertEquals(details['status'], {200: 2, 404: 1})
+        self.assertEquals(details['decode_time']['count'], 3)
+        self.assertEquals(details['bytes_out'], 0)
+        self.assertTrue(details['bytes_in'] > 0)
+        self.assertTrue(details['latency']['p99'] is not None)
+
+        create = metrics['POST /api/v2/jobs']
+        self.assertEquals(create['status'], {201: 1})
+        self.assertTrue(create['bytes_out'] > len('s3://bucket/key.mp4'))
+
+    @patch("requests.Session.get")
+    def test_errors(self, get):
+        get.side_effect = ValueError('boom')
+        collector = MetricsCollector()
+        zen = Zencoder(api_key=TEST_API_KEY, metrics=collector)
+
+        self.assertRaises(ValueError, zen.job.progress, 1234)
+        metrics = collector.snapshot()['GET /api/v2/jobs/:id/progress']
+        self.assertEquals(metrics['errors'], {'ValueError': 1})
+        self.assertEquals(metrics['requests'], 0)
+
+    @patch("requests.Session.get")
+    def test_prometheus_text(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        zen = Zencoder(api_key=TEST_API_KEY, metrics=True)
+        zen.job.details(1234)
+
+        text = prometheus_text(zen.metrics)
+        labels = 'method="GET",endpoint="/api/v2/jobs/:id"'
+        self.assertTrue('# TYPE zencoder_request_duration_seconds histogram'
+                        in text)
+        self.assertTrue('zencoder_request_duration_seconds_bucket'
+                        '{{{0},le="+Inf"}} 1'.format(labels) in text)
+        self.assertTrue('zencoder_request_duration_seconds_count'
+                        '{{{0}}} 1'.format(labels) in text)
+        self.assertTrue('zencoder_responses_total{{{0},code="200"}} 1'.format(
+            labels) in text)
+        self.assertTrue(text.endswith('\n'))
+
+    @patch("requests.Session.get")
+    def test_opentelemetry(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        meter = FakeMeter()
+        zen = Zencoder(api_key=TEST_API_KEY, hooks=[OpenTelemetryHook(meter)])
+
+        zen.job.details(1234)
+        get.side_effect = ValueError('boom')
+        self.assertRaises(ValueError, zen.job.details, 1234)
+
+        attributes = {'http.method': 'GET',
+                      'zencoder.endpoint': '/api/v2/jobs/:id'}
+        instruments = meter.instruments
+        [(elapsed, latency)] = instruments['zencoder.request.duration'].calls
+        self.assertTrue(elapsed >= 0)
+        self.assertEquals(latency, dict(attributes, **{'http.status_code': 200}))
+        [(_, decode)] = instruments['zencoder.decode.duration'].calls
+        self.assertEquals(decode, attributes)
+        [(size, received)] = instruments['zencoder.response.size'].calls
+        self.assertTrue(size > 0)
+        self.assertEquals(received, attributes)
+        self.assertEquals(instruments['zencoder.request.size'].calls,
+                          [(0, attributes), (0, attributes)])
+        self.assertEquals(instruments['zencoder.request.errors'].calls,
+                          [(1, dict(attributes, **{'error.type': 'ValueError'}))])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+import unittest
+from datetime import datetime
+from mock import patch
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.models import (JobInfo, OutputMediaFile, InputMediaFile,
+                             ProgressInfo, parse_timestamp)
+
+class TestModels(unittest.TestCase):
+
+    def setUp(self):
+        self.zen = Zencoder(api_key=TEST_API_KEY)
+
+    @patch("requests.Session.get")
+    def test_job_details(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+
+        job = self.zen.job.details(45491013).model
+
+        self.assertTrue(isinstance(job, JobInfo))
+        self.assertEquals(job.id, 45491013)
+        self.assertEquals(job.state, 'finished')
+        self.assertEquals(job._created_at, '2013-05-04T21:36:39-07:00')
+        self.assertEquals(job.created_at, datetime(2013, 5, 5, 4, 36, 39))
+        self.assertTrue(isinstance(job._created_at, datetime))
+
+        self.assertTrue(isinstance(job.input_media_file, InputMediaFile))
+        self.assertEquals(job.input_media_file.file_size_bytes, 922620)
+
+        outputs = job.output_media_files
+        self.assertTrue(job.output_media_files is outputs)
+        self.assertEquals(len(outputs), 1)
+        self.assertTrue(isinstance(outputs[0], OutputMediaFile))
+        self.assertEquals(outputs[0].width, 1280)
+        self.assertFalse(hasattr(outputs[0], '__dict__'))
+
+    @patch("requests.Session.get")
+    def test_job_list(self, get):
+        get.return_value = load_response(200, 'fixtures/job_list.json')
+
+        resp = self.zen.job.list()
+        jobs = resp.model
+
+        self.assertTrue(resp.model is jobs)
+        self.assertEquals([job.id for job in jobs],
+                          [item['job']['id'] for item in resp.body])
+        self.assertEquals(jobs[0].stream['protocol'], 'rtmp')
+
+    @patch("requests.Session.get")
+    def test_output_and_input_details(self, get):
+        get.return_value = load_response(200, 'fixtures/output_details.json')
+        output = self.zen.output.details(13339).model
+        self.assertTrue(isinstance(output, OutputMediaFile))
+        self.assertEquals(output.file_size_bytes, 1215110)
+        self.assertEquals(output.label, None)
+
+        get.return_value = load_response(200, 'fixtures/input_details.json')
+        resp = self.zen.input.details(45475483)
+        self.assertTrue(get.call_args[0][0].endswith('/inputs/45475483'))
+        self.assertEquals(resp.model.job_id, 45497494)
+        self.assertEquals(resp.model.as_dict()['video_codec'], 'h264')
+
+    @patch("requests.Session.get")
+    def test_progress(self, get):
+        get.return_value = load_response(200, 'fixtures/job_progress.json')
+
+        progress = self.zen.job.progress(1234).model
+
+        self.assertTrue(isinstance(progress, ProgressInfo))
+        self.assertEquals(progress.progress, 40.5)
+        self.assertEquals(progress.input.state, 'finished')
+        self.assertEquals(progress.outputs[0].current_event, 'Transcoding')
+        self.assertEquals(progress.outputs[0].progress, 15.0)
+
+    @patch("requests.Session.get")
+    def test_no_model(self, get):
+        get.return_value = load_response(404, 'fixtures/job_details.json')
+        self.assertEquals(self.zen.job.details(1234).model, None)
+
+        get.return_value = load_response(200, 'fixtures/account_details.json')
+        self.assertEquals(self.zen.account.details().model, None)
+
+    @patch("requests.Session.get")
+    def test_slim_response(self, get):
+        get.return_value = load_response(200, 'fixtures/job_details.json')
+        zen = Zencoder(api_key=TEST_API_KEY, slim_responses=True)
+
+        self.assertEquals(zen.job.details(1234).model.id, 45491013)
+
+    def test_parse_timestamp(self):
+        self.assertEquals(parse_timestamp('2013-05-05T01:30:15-05:00'),
+                          datetime(2013, 5, 5, 6, 30, 15))
+        self.assertEquals(parse_timestamp('2013-05-05T01:30:15Z'),
+                          datetime(2013, 5, 5, 1, 30, 15))
+        self.assertEquals(parse_timestamp(None), None)
+
+    def test_parse_timestamp_fraction(self):
+        self.assertEquals(parse_timestamp('2013-05-05T12:00:00.123Z'),
+                          datetime(2013, 5, 5, 12, 0, 0, 123000))
+        self.assertEquals(parse_timestamp('2013-05-05T12:00:00.1234567+01:00'),
+                          datetime(2013, 5, 5, 11, 0, 0, 123456))
+
+    def test_parse_timestamp_offsets(self):
+        self.assertEquals(parse_timestamp('2013-05-05T01:30:15+0000'),
+                          datetime(2013, 5, 5, 1, 30, 15))
+        self.assertEquals(parse_timestamp('2013-05-05T01:30:15-0730'),
+                          datetime(2013, 5, 5, 9, 0, 15))
+        self.assertEquals(parse_timestamp('2013-05-05T01:30:15+02'),
+                          datetime(2013, 5, 4, 23, 30, 15))
+        self.assertRaises(ValueError, parse_timestamp, '2013-05-05 01:30')
+
+    def test_no_raw_nested_data(self):
+        job = JobInfo({'id': 1, 'input_media_file': {'id': 2},
+                       'output_media_files': [{'id': 3}]})
+
+        self.assertTrue(isinstance(job.input_media_file, InputMediaFile))
+        self.assertTrue(isinstance(job.output_media_files[0], OutputMediaFile))
+        self.assertEquals(job.as_dict()['output_media_files'][0]['id'], 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import base64
+import io
+import json
+import threading
+import unittest
+from mock import patch
+
+from test_util import TEST_API_KEY, MockResponse
+from zencoder import Zencoder
+from zencoder.notifications import (NotificationReceiver, InvalidNotification,
+                                    parse_notification)
+from zencoder.progress import ProgressTracker
+
+OUTPUT_NOTIFICATION = {
+    'job': {'id': 1234, 'state': 'processing', 'test': True},
+    'output': {'id': 5678, 'state': 'finished', 'label': 'web',
+               'url': 's3://bucket/web.mp4'}
+}
+
+JOB_NOTIFICATION = {
+    'job': {'id': 1234, 'state': 'finished'},
+    'outputs': [{'id': 5678, 'state': 'finished', 'label': 'web'},
+                {'id': 5679, 'state': 'failed', 'label': 'mobile',
+                 'error_class': 'InvalidOutput'}]
+}
+
+JOB_NOTIFICATION_WITH_INPUT = {
+    'job': {'id': 1234, 'state': 'finished'},
+    'input': {'id': 4321, 'state': 'finished', 'duration_in_ms': 24883},
+    'outputs': [{'id': 5678, 'state': 'finished', 'label': 'web'}]
+}
+
+INPUT_NOTIFICATION = {
+    'job': {'id': 1234, 'state': 'processing'},
+    'input': {'id': 4321, 'state': 'finished'}
+}
+
+def wsgi_request(app, body, method='POST', authorization=None):
+    environ = {'REQUEST_METHOD': method,
+               'CONTENT_LENGTH': str(len(body)),
+               'wsgi.input': io.BytesIO(body)}
+    if authorization:
+        environ['HTTP_AUTHORIZATION'] = authorization
+
+    status = []
+    content = app(environ, lambda s, headers: status.append(s))
+    return status[0], b''.join(content)
+
+class TestNotifications(unittest.TestCase):
+
+    def setUp(self):
+        self.receiver = NotificationReceiver(workers=2)
+
+    def tearDown(self):
+        self.receiver.close()
+
+    def test_parse_output_notification(self):
+        notification = parse_notification(json.dumps(OUTPUT_NOTIFICATION))
+
+        self.assertEquals(notification.kind, 'output')
+        self.assertEquals(notification.job.id, 1234)
+        self.assertEquals(notification.output.state, 'finished')
+        self.assertEquals(notification.output.label, 'web')
+        self.assertTrue(notification.subject is notification.output)
+
+    def test_parse_job_notification(self):
+        notification = parse_notification(JOB_NOTIFICATION)
+
+        self.assertEquals(notification.kind, 'job')
+        self.assertEquals([o.state for o in notification.outputs],
+                          ['finished', 'failed'])
+        self.assertEquals(notification.outputs[1].error_class, 'InvalidOutput')
+
+    def test_parse_job_notification_with_input(self):
+        notification = parse_notification(JOB_NOTIFICATION_WITH_INPUT)
+
+        self.assertEquals(notification.kind, 'job')
+        self.assertTrue(notification.subject is notification.job)
+        self.assertEquals(notification.input.id, 4321)
+        self.assertEquals(len(notification.outputs), 1)
+
+    def test_parse_input_notification(self):
+        notification = parse_notification(INPUT_NOTIFICATION)
+
+        self.assertEquals(notification.kind, 'input')
+        self.assertEquals(notification.subject.id, 4321)
+
+    def test_parse_invalid(self):
+        for body in (b'not json', b'[]', b'{}', b'{"job": {"id": 1}}',
+                     b'{"job": {"id": 1, "state": "finished"}, "output": 5}'):
+            self.assertRaises(InvalidNotification, parse_notification, body)
+
+    def test_dispatch_callbacks(self):
+        received = []
+        done = threading.Event()
+
+        @self.receiver.on('output')
+        def on_output(notification):
+            received.append(notification)
+            done.set()
+
+        self.receiver.add_callback(lambda n: received.append('job'), 'job')
+
+        status, content = wsgi_request(self.receiver,
+                                       json.dumps(OUTPUT_NOTIFICATION).encode())
+        done.wait(2)
+
+        self.assertEquals(status, '200 OK')
+        self.assertEquals(json.loads(content.decode()), {'status': 'ok'})
+        self.assertEquals(len(received), 1)
+        self.assertEquals(received[0].output.id, 5678)
+
+    def test_wsgi_errors(self):
+        self.assertEquals(wsgi_request(self.receiver, b'', method='GET')[0],
+                          '405 Method Not Allowed')
+        self.assertEquals(wsgi_request(self.receiver, b'{"foo": 1}')[0],
+                          '400 Bad Request')
+
+    def test_credentials(self):
+        receiver = NotificationReceiver(credentials=('zencoder', 's3cret'))
+        body = json.dumps(OUTPUT_NOTIFICATION).encode()
+        good = 'Basic ' + base64.b64encode(b'zencoder:s3cret').decode()
+        bad = 'Basic ' + base64.b64encode(b'zencoder:wrong').decode()
+
+        self.assertEquals(wsgi_request(receiver, body)[0], '401 Unauthorized')
+        self.assertEquals(wsgi_request(receiver, body, authorization=bad)[0],
+                          '401 Unauthorized')
+        self.assertEquals(wsgi_request(receiver, body, authorization=good)[0],
+                          '200 OK')
+        receiver.close()
+
+    @patch("requests.Session.get")
+    def test_bridge_to_tracker(self, get):
+        body = {'state': 'processing', 'progress': 10}
+        get.return_value = MockResponse(200, lambda: body, json.dumps(body))
+
+        zen = Zencoder(api_key=TEST_API_KEY)
+        tracker = ProgressTracker(zen, min_interval=60, max_interval=60)
+        self.receiver.bridge(tracker)
+        tracker.track_job(1234)
+        tracker.track_output(5679)
+
+        self.receiver.receive(JOB_NOTIFICATION)
+        events = list(tracker.events(timeout=2))
+        tracker.stop()
+
+        finished = [(e.kind, e.id, e.state) for e in events if e.finished]
+        self.assertEquals(sorted(finished),
+                          [('job', 1234, 'finished'), ('output', 5679, 'failed')])
+        self.assertEquals(len(tracker), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import threading
+import time
+import unittest
+from mock import patch
+
+from stub_server import StubServer
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.cache import ResponseCache, SingleFlight
+from zencoder.pool import ZencoderPool
+from zencoder.ratelimit import Quota, RateLimitExceeded
+
+class TestQuota(unittest.TestCase):
+
+    def test_concurrency(self):
+        quota = Quota(max_concurrency=2, timeout=0.05)
+
+        quota.acquire()
+        quota.acquire()
+        self.assertRaises(RateLimitExceeded, quota.acquire)
+        self.assertEquals(quota.stats()['in_flight'], 2)
+
+        quota.release(None, load_response(200))
+        quota.acquire()
+        self.assertEquals(quota.stats(), {'in_flight': 2, 'requests': 3,
+                                          'rejected': 1, 'throttled': 0})
+
+    def test_rate(self):
+        quota = Quota(max_concurrency=5, rate=1, burst=1, timeout=0.05)
+
+        quota.acquire()
+        self.assertRaises(RateLimitExceeded, quota.acquire)
+        # the slot taken by the rejected request is given back
+        self.assertEquals(quota.stats()['in_flight'], 1)
+
+    @patch("requests.Session.get")
+    def test_released_on_error(self, get):
+        get.side_effect = IOError('connection reset')
+        quota = Quota(max_concurrency=1, timeout=0.05)
+        zen = Zencoder(api_key=TEST_API_KEY, rate_limiter=quota)
+
+        self.assertRaises(IOError, zen.job.details, 1234)
+        self.assertRaises(IOError, zen.job.details, 1234)
+        self.assertEquals(quota.stats()['in_flight'], 0)
+
+class TestZencoderPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def pool(self, **kwargs):
+        return ZencoderPool(base_url=self.server.base_url, **kwargs)
+
+    def test_clients_by_key(self):
+        with self.pool() as pool:
+            first = pool.get('key-1')
+            self.assertTrue(pool.get('key-1') is first)
+            self.assertTrue(pool['key-2'] is not first)
+            self.assertEquals(len(pool), 2)
+
+            self.assertEquals(first.job.details(1234).code, 200)
+            pool['key-2'].job.details(1234)
+
+        keys = [request.headers['Zencoder-Api-Key']
+                for request in self.server.requests]
+        self.assertEquals(keys, ['key-1', 'key-2'])
+
+    def test_shared_connections(self):
+        with self.pool() as pool:
+            for key in ('key-1', 'key-2', 'key-3'):
+                pool.get(key).job.details(1234)
+
+            pools = pool.stats()['pools']
+            self.assertEquals(len(pools), 1)
+            self.assertEquals(pools[0]['connections'], 1)
+            self.assertEquals(pools[0]['requests'], 3)
+
+    def test_shared_cache_per_key(self):
+        with self.pool(cache=ResponseCache(), single_flight=SingleFlight()) as pool:
+            first = pool.get('key-1').job.details(1234)
+            self.assertTrue(pool.get('key-1').job.details(1234) is first)
+            second = pool.get('key-2').job.details(1234)
+            self.assertTrue(second is not first)
+
+        keys = [request.headers['Zencoder-Api-Key']
+                for request in self.server.requests]
+        self.assertEquals(keys, ['key-1', 'key-2'])
+
+    def test_lru_eviction(self):
+        pool = self.pool(max_clients=2)
+        pool.get('key-1')
+        pool.get('key-2')
+        pool.get('key-1')
+        pool.get('key-3')
+
+        self.assertTrue('key-1' in pool)
+        self.assertFalse('key-2' in pool)
+        self.assertEquals(pool.stats()['evicted'], 1)
+
+        # evicted clients keep working, the connections stay open
+        pool.get('key-4').job.details(1234)
+        self.assertEquals(pool.stats()['created'], 4)
+        pool.close()
+
+    def test_idle_eviction(self):
+        pool = self.pool(idle_timeout=0.05)
+        pool.get('key-1')
+        time.sleep(0.1)
+        pool.get('key-2')
+
+        self.assertEquals(len(pool), 1)
+        self.assertFalse(pool.evict('key-1'))
+        self.assertTrue(pool.evict('key-2'))
+        pool.close()
+
+    def test_per_key_quota(self):
+        self.server.httpd.latency = 0.2
+        pool = self.pool(max_concurrency=1, quota_timeout=0.05,
+                         quotas={'big': {'max_concurrency': 4}})
+        errors = []
+
+        def request(key):
+            try:
+                pool.get(key).job.details(1234)
+            except RateLimitExceeded:
+                errors.append(key)
+
+        threads = [threading.Thread(target=request, args=(key,))
+                   for key in ['noisy'] * 3 + ['big'] * 3 + ['quiet']]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEquals(errors, ['noisy', 'noisy'])
+        self.assertEquals(pool.stats('noisy')['rejected'], 2)
+        stats = pool.stats()
+        self.assertEquals(stats['requests'], 5)
+        self.assertEquals(stats['rejected'], 2)
+        self.assertEquals(stats['in_flight'], 0)
+        self.assertEquals(stats['clients'], 3)
+        pool.close()
+
+if __name__ == "__main__":
+    unittest.main()
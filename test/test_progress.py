@@ -0,0 +1,205 @@
+import json
+import unittest
+from concurrent.futures import Future, TimeoutError, FIRST_COMPLETED
+from mock import patch
+
+from test_util import TEST_API_KEY, MockResponse
+from zencoder import Zencoder
+from zencoder.progress import ProgressTracker, JobWaiter, ProgressEvent
+from zencoder.progress import InvalidStateError
+
+def progress_response(state, progress=None):
+    body = {'state': state}
+    if progress is not None:
+        body['progress'] = progress
+    return MockResponse(200, lambda: body, json.dumps(body))
+
+class TestProgressTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.zen = Zencoder(api_key=TEST_API_KEY)
+        self.tracker = ProgressTracker(self.zen, min_interval=0.01,
+                                       max_interval=0.05)
+
+    def tearDown(self):
+        self.tracker.stop()
+
+    @patch("requests.Session.get")
+    def test_track_until_finished(self, get):
+        responses = {
+            'jobs/1/progress': [progress_response('waiting'),
+                                progress_response('processing', 50),
+                                progress_response('finished')],
+            'outputs/2/progress': [progress_response('processing', '99.5'),
+                                   progress_response('failed')],
+        }
+
+        def poll(url, **kwargs):
+            for path, queue in responses.items():
+                if url.endswith(path):
+                    return queue.pop(0) if len(queue) > 1 else queue[0]
+        get.side_effect = poll
+
+        self.tracker.track_job(1)
+        self.tracker.track_output(2)
+
+        events = list(self.tracker.events(timeout=2))
+
+        job_states = [e.state for e in events if e.kind == 'job']
+        self.assertEquals(job_states, ['waiting', 'processing', 'finished'])
+        output_events = [e for e in events if e.kind == 'output']
+        self.assertEquals(output_events[0].progress, 99.5)
+        self.assertEquals(output_events[-1].state, 'failed')
+        self.assertTrue(output_events[-1].finished)
+        self.assertEquals(len(self.tracker), 0)
+
+    @patch("requests.Session.get")
+    def test_callback_and_missing_item(self, get):
+        get.return_value = MockResponse(404, lambda: {}, '{}')
+        seen = []
+        self.tracker.add_callback(seen.append)
+
+        self.tracker.track('input', 3)
+        events = list(self.tracker.events(timeout=2))
+
+        self.assertEquals(len(events), 1)
+        self.assertEquals(events[0].response.code, 404)
+        self.assertEquals(seen, events)
+        self.assertFalse(('input', 3) in self.tracker)
+
+    @patch("requests.Session.get")
+    def test_failing_callback(self, get):
+        responses = [progress_response('processing', 10),
+                     progress_response('processing', 60),
+                     progress_response('finished')]
+        get.side_effect = lambda url, **kwargs: (
+            responses.pop(0) if len(responses) > 1 else responses[0])
+
+        def fail(event):
+            raise RuntimeError('callback failed')
+        seen = []
+        self.tracker.add_callback(fail)
+        self.tracker.add_callback(seen.append)
+
+        self.tracker.track_job(1)
+        with patch('zencoder.progress.log') as log:
+            events = list(self.tracker.events(timeout=2))
+
+        # polling went on, later callbacks were called and errors logged
+        self.assertEquals([e.state for e in events],
+                          ['processing', 'processing', 'finished'])
+        self.assertEquals(seen, events)
+        self.assertEquals(log.exception.call_count, 3)
+        self.assertEquals(len(self.tracker), 0)
+
+    def test_next_interval(self):
+        tracker = ProgressTracker(self.zen, min_interval=1, max_interval=11)
+
+        self.assertEquals(tracker.next_interval('queued', None), 11)
+        self.assertEquals(tracker.next_interval('processing', 0), 11)
+        self.assertEquals(tracker.next_interval('processing', 90), 2)
+        self.assertEquals(tracker.next_interval('processing', 100), 1)
+
+    def test_track_invalid_kind(self):
+        self.assertRaises(ValueError, self.tracker.track, 'report', 1)
+
+class TestJobWaiter(unittest.TestCase):
+
+    def setUp(self):
+        self.zen = Zencoder(api_key=TEST_API_KEY)
+        self.zen.job.waiter = JobWaiter(self.zen, min_interval=0.01,
+                                        max_interval=0.05)
+
+    def tearDown(self):
+        self.zen.close()
+
+    def test_cancelled_while_resolving(self):
+        waiter = self.zen.job.waiter
+
+        class Racing(Future):
+            # cancelled between the done() check and set_result()
+            def done(self):
+                return False
+
+            def set_result(self, result):
+                raise InvalidStateError('cancelled')
+
+        future = Racing()
+        future.job_id = 7
+        other = Future()
+        other.job_id = 7
+        waiter._waiters[7] = [future, other]
+
+        waiter._on_event(ProgressEvent('job', 7, 'finished', 100.0))
+        self.assertEquals(other.result().state, 'finished')
+
+    @patch("requests.Session.get")
+    def test_wait(self, get):
+        states = {1: ['processing', 'processing', 'finished'],
+                  2: ['failed']}
+
+        def poll(url, **kwargs):
+            queue = states[int(url.split('/')[-2])]
+            return progress_response(queue.pop(0) if len(queue) > 1 else queue[0])
+        get.side_effect = poll
+
+        first = self.zen.job.wait(1)
+        second = self.zen.job.wait(1)
+        failed = self.zen.job.wait(2)
+
+        self.assertEquals(first.result(2).state, 'finished')
+        self.assertTrue(second.result(2) is first.result())
+        self.assertEquals(failed.result(2).state, 'failed')
+        self.assertEquals(len(self.zen.job.waiter), 0)
+
+    @patch("requests.Session.get")
+    def test_wait_missing_job(self, get):
+        get.return_value = MockResponse(404, lambda: {}, '{}')
+
+        event = self.zen.job.wait(1).result(2)
+
+        self.assertEquals(event.state, None)
+        self.assertEquals(event.response.code, 404)
+
+    @patch("requests.Session.get")
+    def test_wait_timeout(self, get):
+        get.side_effect = lambda url, **kwargs: progress_response('processing', 10)
+
+        future = self.zen.job.wait(1, timeout=0.1)
+
+        self.assertRaises(TimeoutError, future.result, 2)
+        self.assertEquals(len(self.zen.job.waiter), 0)
+        self.assertFalse(('job', 1) in self.zen.job.waiter.tracker)
+
+    @patch("requests.Session.get")
+    def test_wait_many(self, get):
+        def poll(url, **kwargs):
+            if url.endswith('jobs/1/progress'):
+                return progress_response('finished')
+            return progress_response('processing', 10)
+        get.side_effect = poll
+
+        done, not_done = self.zen.job.wait_many([1, 2, 3], timeout=2,
+                                                return_when=FIRST_COMPLETED)
+
+        self.assertEquals([f.job_id for f in done], [1])
+        self.assertEquals(sorted(f.job_id for f in not_done), [2, 3])
+
+        for future in not_done:
+            future.cancel()
+        self.assertEquals(len(self.zen.job.waiter), 0)
+
+    @patch("requests.Session.get")
+    def test_wait_pushed(self, get):
+        get.side_effect = lambda url, **kwargs: progress_response('waiting')
+        waiter = JobWaiter(self.zen, min_interval=60, max_interval=60)
+        self.zen.job.waiter = waiter
+
+        future = self.zen.job.wait(1)
+        waiter.update('job', 1, 'finished')
+
+        self.assertEquals(future.result(2).state, 'finished')
+        self.assertTrue(future.result().response is None)
+
+if __name__ == "__main__":
+    unittest.main()
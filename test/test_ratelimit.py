@@ -0,0 +1,88 @@
+import threading
+import unittest
+from mock import patch
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.ratelimit import RateLimiter, RateLimitExceeded
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_burst_then_delay(self):
+        limiter = RateLimiter(rate=10, burst=2)
+
+        self.assertEquals(limiter.reserve(), 0)
+        self.assertEquals(limiter.reserve(), 0)
+        self.assertAlmostEqual(limiter.reserve(), 0.1, places=2)
+        self.assertAlmostEqual(limiter.reserve(), 0.2, places=2)
+        self.assertEquals(limiter.stats()['delayed'], 2)
+
+    def test_fail_fast(self):
+        limiter = RateLimiter(rate=1, burst=1, block=False)
+
+        limiter.acquire()
+        self.assertRaises(RateLimitExceeded, limiter.acquire)
+        self.assertEquals(limiter.stats()['rejected'], 1)
+
+    def test_timeout(self):
+        limiter = RateLimiter(rate=1, burst=1, timeout=0.5)
+
+        limiter.acquire()
+        self.assertRaises(RateLimitExceeded, limiter.acquire)
+
+    def test_endpoint_limits(self):
+        limiter = RateLimiter(endpoints={'reports': (1, 1)}, block=False)
+
+        limiter.acquire('reports')
+        self.assertRaises(RateLimitExceeded, limiter.acquire, 'reports')
+        for _ in range(100):
+            limiter.acquire('jobs')
+
+    def test_adaptive_rate(self):
+        limiter = RateLimiter(rate=10, endpoints={'jobs': 4})
+
+        limiter.release('jobs', load_response(429))
+        self.assertEquals(limiter.rates(), {None: 5.0, 'jobs': 2.0})
+        self.assertEquals(limiter.stats()['throttled'], 1)
+
+        limiter.release('jobs', load_response(200))
+        self.assertEquals(limiter.rates(), {None: 5.5, 'jobs': 2.2})
+
+        for _ in range(100):
+            limiter.release('jobs', load_response(200))
+        self.assertEquals(limiter.rates(), {None: 10.0, 'jobs': 4.0})
+
+    def test_thread_safety(self):
+        limiter = RateLimiter(rate=1000, burst=50, block=False)
+        accepted = []
+
+        def worker():
+            for _ in range(20):
+                try:
+                    limiter.acquire()
+                    accepted.append(1)
+                except RateLimitExceeded:
+                    pass
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertTrue(50 <= len(accepted) < 200)
+        self.assertEquals(limiter.stats()['requests'], len(accepted))
+
+    @patch("requests.Session.get")
+    def test_shared_by_resources(self, get):
+        get.return_value = load_response(200, 'fixtures/job_progress.json')
+        limiter = RateLimiter(rate=1, burst=2, block=False)
+        zen = Zencoder(api_key=TEST_API_KEY, rate_limiter=limiter)
+
+        zen.job.progress(1)
+        zen.output.progress(2)
+        self.assertRaises(RateLimitExceeded, zen.input.progress, 3)
+        self.assertEquals(get.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta
+from mock import patch
+
+from test_util import TEST_API_KEY, MockResponse
+from zencoder import Zencoder, ZencoderResponseError
+from zencoder import reporting
+from zencoder.reporting import ReportAggregator, month_chunks, day_chunks
+
+def report_all(params):
+    """ One vod and one live row per day, with 1 minute/hour per day. """
+    start = datetime.strptime(params['from'], '%Y-%m-%d').date()
+    end = datetime.strptime(params['to'], '%Y-%m-%d').date()
+    days = (end - start).days + 1
+    dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
+    return {
+        'statistics': {
+            'vod': [{'encoded_minutes': 1, 'billable_minutes': 2,
+                     'grouping': params.get('grouping'), 'collected_on': d}
+                    for d in dates],
+            'live': [{'stream_hours': 1, 'grouping': None, 'collected_on': d}
+                     for d in dates],
+        },
+        'total': {'vod': {'encoded_minutes': days, 'billable_minutes': 2 * days},
+                  'live': {'stream_hours': days}},
+    }
+
+class TestReportAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.zen = Zencoder(api_key=TEST_API_KEY)
+        self.cache_dir = tempfile.mkdtemp()
+        self.aggregator = ReportAggregator(self.zen.report,
+                                           cache_dir=self.cache_dir,
+                                           today=lambda: date(2013, 3, 15))
+        self.calls = []
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def respond(self, url, params=None, **kwargs):
+        self.calls.append((params['from'], params['to'], params.get('grouping')))
+        body = report_all(params)
+        return MockResponse(200, lambda: body, json.dumps(body))
+
+    def test_chunks(self):
+        self.assertEquals(month_chunks(date(2012, 12, 30), date(2013, 2, 3)),
+                          [(date(2012, 12, 30), date(2012, 12, 31)),
+                           (date(2013, 1, 1), date(2013, 1, 31)),
+                           (date(2013, 2, 1), date(2013, 2, 3))])
+        self.assertEquals(day_chunks(10)(date(2013, 1, 1), date(2013, 1, 15)),
+                          [(date(2013, 1, 1), date(2013, 1, 10)),
+                           (date(2013, 1, 11), date(2013, 1, 15))])
+
+    @patch("requests.Session.get")
+    def test_fetch_all(self, get):
+        get.side_effect = self.respond
+
+        result = self.aggregator.fetch('all', date(2013, 1, 20), date(2013, 3, 15))
+
+        self.assertEquals(sorted(self.calls),
+                          [('2013-01-20', '2013-01-31', None),
+                           ('2013-02-01', '2013-02-28', None),
+                           ('2013-03-01', '2013-03-15', None)])
+        self.assertEquals(len(result.days), 55)
+        self.assertEquals(result.totals, {'vod': {'encoded_minutes': 55,
+                                                  'billable_minutes': 110},
+                                          'live': {'stream_hours': 55}})
+        self.assertEquals(list(result.series['vod']['billable_minutes']), [2.0] * 55)
+        self.assertEquals(sum(result.series['live']['stream_hours']), 55)
+        self.assertFalse('grouping' in result.series['vod'])
+
+    @patch("requests.Session.get")
+    def test_cache_past_chunks(self, get):
+        get.side_effect = self.respond
+        self.aggregator.fetch('all', date(2013, 1, 1), date(2013, 3, 15))
+        self.calls = []
+
+        result = self.aggregator.fetch('all', date(2013, 1, 1), date(2013, 3, 15))
+
+        self.assertEquals(self.calls, [('2013-03-01', '2013-03-15', None)])
+        self.assertEquals([chunk.cached for chunk in result.chunks],
+                          [True, True, False])
+        self.assertEquals(result.totals['vod']['encoded_minutes'], 74)
+
+        other = ReportAggregator(Zencoder(api_key='other').report,
+                                 cache_dir=self.cache_dir,
+                                 today=lambda: date(2013, 3, 15))
+        other.fetch('all', date(2013, 1, 1), date(2013, 1, 31))
+        self.assertEquals(len(self.calls), 2)
+
+    @patch("requests.Session.get")
+    def test_groupings(self, get):
+        get.side_effect = self.respond
+
+        result = self.aggregator.fetch('all', date(2013, 1, 1), date(2013, 1, 10),
+                                       grouping=['web', 'mobile'])
+
+        self.assertEquals(sorted(g for _, _, g in self.calls), ['mobile', 'web'])
+        self.assertEquals(result.series['vod']['encoded_minutes'][0], 2)
+        self.assertEquals(result.totals['vod']['encoded_minutes'], 20)
+
+        self.calls = []
+        self.aggregator.fetch('minutes', date(2013, 1, 1), date(2013, 1, 10),
+                              grouping=['web', 'mobile'])
+        self.assertEquals(sorted(g for _, _, g in self.calls), ['mobile', 'web'])
+
+    @patch("requests.Session.get")
+    def test_error(self, get):
+        get.return_value = MockResponse(500, lambda: {}, '{}')
+        self.assertRaises(ZencoderResponseError, self.aggregator.fetch,
+                          'vod', date(2013, 1, 1), date(2013, 1, 10))
+        self.assertRaises(ValueError, self.aggregator.fetch,
+                          'foo', date(2013, 1, 1), date(2013, 1, 10))
+
+    @unittest.skipIf(reporting.numpy is None, 'numpy is not installed')
+    @patch("requests.Session.get")
+    def test_numpy_series(self, get):
+        get.side_effect = self.respond
+
+        result = self.aggregator.fetch('all', date(2013, 1, 1), date(2013, 1, 10))
+
+        self.assertTrue(isinstance(result.series['vod']['encoded_minutes'],
+                                   reporting.numpy.ndarray))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+from mock import patch
+
+import requests
+
+from test_util import TEST_API_KEY, load_response
+from zencoder import Zencoder
+from zencoder.retry import RetryPolicy, parse_retry_after
+
+def rate_limited(retry_after):
+    response = requests.Response()
+    response.status_code = 429
+    response._content = b'{}'
+    response.headers['Retry-After'] = retry_after
+    return response
+
+class TestRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff_factor=0)
+        self.zen = Zencoder(api_key=TEST_API_KEY, retry=self.policy)
+
+    @patch("requests.Session.get")
+    def test_retry_server_errors(self, get):
+        get.side_effect = [load_response(503, 'fixtures/job_progress.json'),
+                           load_response(502, 'fixtures/job_progress.json'),
+                           load_response(200, 'fixtures/job_progress.json')]
+
+        resp = self.zen.job.progress(12345)
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(get.call_count, 3)
+        self.assertEquals(self.policy.stats()['retries'], 2)
+
+    @patch("requests.Session.get")
+    def test_retries_exhausted(self, get):
+        get.return_value = load_response(500, 'fixtures/job_progress.json')
+
+        resp = self.zen.output.progress(1)
+
+        self.assertEquals(resp.code, 500)
+        self.assertEquals(get.call_count, 4)
+
+    @patch("requests.Session.get")
+    def test_retry_connection_error(self, get):
+        get.side_effect = [requests.exceptions.ConnectionError(),
+                           load_response(200, 'fixtures/input_progress.json')]
+
+        resp = self.zen.input.progress(1)
+
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(get.call_count, 2)
+
+    @patch("requests.Session.get")
+    def test_no_retry_unknown_error(self, get):
+        get.side_effect = ValueError('boom')
+
+        self.assertRaises(ValueError, self.zen.job.progress, 1)
+        self.assertEquals(get.call_count, 1)
+
+    @patch("requests.Session.post")
+    def test_post_not_retried_by_default(self, post):
+        post.return_value = load_response(503, 'fixtures/job_create.json')
+
+        resp = self.zen.job.create('s3://bucket/key.mov')
+
+        self.assertEquals(resp.code, 503)
+        self.assertEquals(post.call_count, 1)
+
+    @patch("requests.Session.post")
+    def test_post_retry_opt_in(self, post):
+        policy = RetryPolicy(backoff_factor=0,
+                             methods=('GET', 'PUT', 'DELETE', 'POST'))
+        zen = Zencoder(api_key=TEST_API_KEY, retry=policy)
+        post.side_effect = [load_response(503, 'fixtures/job_create.json'),
+                            load_response(201, 'fixtures/job_create.json')]
+
+        resp = zen.job.create('s3://bucket/key.mov')
+
+        self.assertEquals(resp.code, 201)
+        self.assertEquals(post.call_count, 2)
+
+    @patch("zencoder.retry.time.sleep")
+    @patch("requests.Session.get")
+    def test_retry_after(self, get, sleep):
+        get.side_effect = [rate_limited('7'),
+                           load_response(200, 'fixtures/job_progress.json')]
+
+        self.zen.job.progress(1)
+
+        sleep.assert_called_once_with(7.0)
+        self.assertEquals(self.policy.stats(),
+                          {'retries': 1, 'backoff_time': 7.0})
+
+    def test_backoff(self):
+        policy = RetryPolicy(backoff_factor=1, max_backoff=5, jitter=False)
+
+        self.assertEquals([policy.backoff(n) for n in range(4)], [1, 2, 4, 5])
+
+        policy.jitter = True
+        for n in range(10):
+            self.assertTrue(0 <= policy.backoff(n) <= 5)
+
+    def test_default_policy(self):
+        zen = Zencoder(api_key=TEST_API_KEY, retry=True)
+
+        self.assertTrue(isinstance(zen.retry, RetryPolicy))
+        self.assertTrue(zen.job.retry is zen.report.retry)
+
+    def test_parse_retry_after(self):
+        self.assertEquals(parse_retry_after('120'), 120.0)
+        self.assertEquals(parse_retry_after(None), None)
+        self.assertEquals(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertEquals(parse_retry_after('soon'), None)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import json
+import unittest
+
+from test_util import TEST_API_KEY
+from stub_server import StubServer, load_fixture
+from zencoder import Zencoder
+from zencoder.core import Report, ZencoderResponseError
+from zencoder.streaming import JSONStream
+
+def chunked(content, size):
+    return [content[i:i + size] for i in range(0, len(content), size)]
+
+class TestJSONStream(unittest.TestCase):
+
+    def test_top_level_array(self):
+        content = json.dumps([{'id': 1, 'name': u'caf\xe9 "[]"'}, 12345, -1.5e3,
+                              None, [1, [2]], 'x']).encode('utf-8')
+
+        for size in (1, 2, 7, len(content)):
+            stream = JSONStream(chunked(content, size))
+            items = [item for path, item in stream.items()]
+            self.assertEquals(items, json.loads(content.decode('utf-8')))
+            self.assertEquals(stream.body, [])
+
+    def test_nested_arrays(self):
+        content = load_fixture('fixtures/report_all_date.json')
+        expected = json.loads(content.decode('utf-8'))
+
+        stream = JSONStream(chunked(content, 3),
+                            [('statistics', 'vod'), ('statistics', 'live')])
+        items = list(stream.items())
+
+        self.assertEquals(items, [(('statistics', 'vod'), expected['statistics']['vod'][0]),
+                                  (('statistics', 'live'), expected['statistics']['live'][0])])
+        self.assertEquals(stream.body['total'], expected['total'])
+        self.assertEquals(stream.body['statistics'], {'vod': [], 'live': []})
+
+    def test_path_not_an_array(self):
+        content = load_fixture('fixtures/report_all.json')
+        stream = JSONStream(chunked(content, 5), [('statistics', 'vod')])
+
+        self.assertEquals(list(stream.items()), [])
+        self.assertEquals(stream.body, json.loads(content.decode('utf-8')))
+
+    def test_empty_and_invalid(self):
+        self.assertEquals(list(JSONStream([b'[', b' ]']).items()), [])
+        for content in (b'[1, 2', b'[1 2]', b'[1] 2', b'', b'{"a": [1}'):
+            stream = JSONStream(chunked(content, 1), [(), ('a',)])
+            self.assertRaises(ValueError, list, stream.items())
+
+class TestStreamingResponses(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.zen = Zencoder(api_key=TEST_API_KEY, base_url=self.server.base_url)
+
+    def tearDown(self):
+        self.zen.close()
+        self.server.stop()
+
+    def test_job_list(self):
+        jobs = [{'job': {'id': i, 'state': 'finished'}} for i in range(1000)]
+        self.server.respond('GET', r'^/jobs$', 200, json.dumps(jobs).encode())
+
+        response = self.zen.job.list(per_page=1000, stream=True)
+        response.chunk_size = 512
+
+        self.assertEquals(response.code, 200)
+        self.assertEquals(list(response), jobs)
+        self.assertTrue('page=1' in self.server.requests[0].path)
+
+        # the connection went back to the pool
+        self.zen.job.details(1)
+        self.assertEquals(self.zen.pool_stats()[0]['connections'], 1)
+
+    def test_report_all(self):
+        self.server.respond('GET', r'^/reports/all$', 200,
+                            load_fixture('fixtures/report_all_date.json'))
+
+        report = Report(self.server.base_url, TEST_API_KEY,
+                        session=self.zen.session)
+        response = report.all(stream=True)
+        rows = list(response.items())
+
+        self.assertEquals([path[-1] for path, row in rows], ['vod', 'live'])
+        self.assertEquals(rows[0][1]['encoded_minutes'], 5)
+        self.assertEquals(response.body['total']['vod']['encoded_minutes'], 5)
+
+    def test_error(self):
+        self.server.respond('GET', r'^/jobs$', 401, b'{"errors": ["bad key"]}')
+
+        response = self.zen.job.list(stream=True)
+
+        self.assertEquals(list(response), [])
+        self.assertEquals(response.code, 401)
+        self.assertEquals(response.body, {'errors': ['bad key']})
+
+    def test_error_not_json(self):
+        self.server.respond('GET', r'^/jobs$', 502,
+                            b'<html><body>Bad Gateway</body></html>')
+        response = self.zen.job.list(stream=True)
+        self.assertRaises(ZencoderResponseError, list, response)
+
+        self.server.respond('GET', r'^/jobs$', 503, b'')
+        response = self.zen.job.list(stream=True)
+        self.assertRaises(ZencoderResponseError, list, response)
+
+if __name__ == "__main__":
+    unittest.main()
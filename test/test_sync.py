@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from mock import patch
+
+import requests
+
+from test_util import TEST_API_KEY, MockResponse
+from zencoder import Zencoder
+from zencoder.sync import JobSync
+
+def job(id, state, created_at, url='s3://bucket/input.mov'):
+    return {'id': id, 'state': state, 'created_at': created_at,
+            'input_media_file': {'url': url}}
+
+def json_response(body, code=200):
+    return MockResponse(code, lambda: body, json.dumps(body))
+
+class FakeAPI(object):
+    """ Answers ``Job.list`` and ``Job.details`` from a list of jobs,
+    newest first. """
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.calls = []
+
+    def __call__(self, url, params=None, **kwargs):
+        self.calls.append((url, params))
+        if url.endswith('/jobs'):
+            start = (params['page'] - 1) * params['per_page']
+            page = self.jobs[start:start + params['per_page']]
+            return json_response([{'job': j} for j in page])
+
+        job_id = int(url.rsplit('/', 1)[1])
+        for j in self.jobs:
+            if j['id'] == job_id:
+                return json_response({'job': j})
+        return json_response({}, 404)
+
+    def list_calls(self):
+        return [params['page'] for url, params in self.calls
+                if url.endswith('/jobs')]
+
+    def details_calls(self):
+        return sorted(int(url.rsplit('/', 1)[1]) for url, params in self.calls
+                      if not url.endswith('/jobs'))
+
+class TestJobSync(unittest.TestCase):
+
+    def setUp(self):
+        self.zen = Zencoder(api_key=TEST_API_KEY)
+        self.tmp = tempfile.mkdtemp()
+        self.sync = JobSync(self.zen, os.path.join(self.tmp, 'jobs.db'),
+                            per_page=2)
+        self.api = FakeAPI([
+            job(5, 'processing', '2013-05-05T10:00:00-05:00'),
+            job(4, 'finished', '2013-05-05T09:00:00-05:00'),
+            job(3, 'waiting', '2013-05-04T09:00:00-05:00', 's3://bucket/other.mov'),
+            job(2, 'failed', '2013-05-03T09:00:00-05:00'),
+            job(1, 'finished', '2013-05-02T09:00:00-05:00'),
+        ])
+
+    def tearDown(self):
+        self.sync.close()
+        shutil.rmtree(self.tmp)
+
+    @patch("requests.Session.get")
+    def test_initial_sync(self, get):
+        get.side_effect = self.api
+
+        stats = self.sync.sync()
+
+        self.assertEquals(stats, {'listed': 5, 'new': 5, 'refreshed': 0,
+                                  'failed': 0})
+        self.assertEquals(self.api.list_calls(), [1, 2, 3, 4])
+        self.assertEquals(len(self.sync), 5)
+        self.assertEquals(self.sync.counts(),
+                          {'processing': 1, 'finished': 2, 'waiting': 1,
+                           'failed': 1})
+
+    @patch("requests.Session.get")
+    def test_incremental_sync(self, get):
+        get.side_effect = self.api
+        self.sync.sync()
+        self.api.calls = []
+
+        self.api.jobs.insert(0, job(6, 'pending', '2013-05-06T10:00:00Z'))
+        self.api.jobs[1]['state'] = 'finished'
+        self.api.jobs[3]['state'] = 'processing'
+
+        stats = self.sync.sync()
+
+        # stops at job 4, the first known, finished job
+        self.assertEquals(self.api.list_calls(), [1, 2])
+        self.assertEquals(self.api.details_calls(), [3])
+        self.assertEquals(stats, {'listed': 2, 'new': 1, 'refreshed': 1,
+                                  'failed': 0})
+        self.assertEquals(self.sync.state(5), 'finished')
+        self.assertEquals(self.sync.state(3), 'processing')
+        self.assertEquals(sorted(self.sync.pending()), [3, 6])
+
+    @patch("requests.Session.get")
+    def test_interrupted_sync(self, get):
+        def interrupted(url, params=None, **kwargs):
+            if url.endswith('/jobs') and params['page'] == 2:
+                raise requests.exceptions.ConnectionError('connection reset')
+            return self.api(url, params, **kwargs)
+        get.side_effect = interrupted
+
+        self.assertRaises(requests.exceptions.ConnectionError, self.sync.sync)
+        self.assertEquals(len(self.sync), 2)
+
+        get.side_effect = self.api
+        self.api.calls = []
+        self.api.jobs.insert(0, job(6, 'pending', '2013-05-06T10:00:00Z'))
+
+        stats = self.sync.sync()
+
+        # new jobs down to job 4, then resumes after the page walked
+        self.assertEquals(self.api.list_calls(), [1, 2, 2, 3, 4])
+        self.assertEquals(stats['new'], 4)
+        self.assertEquals(len(self.sync), 6)
+
+        # the walk completed, later syncs stop at job 4 again
+        self.api.calls = []
+        self.sync.sync()
+        self.assertEquals(self.api.list_calls(), [1, 2])
+
+    @patch("requests.Session.get")
+    def test_refresh_failures(self, get):
+        get.side_effect = self.api
+        self.sync.sync()
+        self.api.jobs[0]['state'] = 'finished'
+        self.api.jobs[2]['state'] = 'finished'
+
+        def failing(url, params=None, **kwargs):
+            if url.endswith('/jobs'):
+                return json_response([])
+            if url.endswith('/5'):
+                raise requests.exceptions.ConnectionError('connection reset')
+            return self.api(url, params, **kwargs)
+        get.side_effect = failing
+
+        stats = self.sync.sync()
+
+        self.assertEquals(stats['refreshed'], 1)
+        self.assertEquals(stats['failed'], 1)
+        self.assertEquals(list(self.sync.failures), [5])
+        self.assertEquals(self.sync.state(3), 'finished')
+        self.assertEquals(self.sync.state(5), 'processing')
+
+    @patch("requests.Session.get")
+    def test_queries(self, get):
+        get.side_effect = self.api
+        self.sync.sync()
+
+        ids = lambda jobs: [j['id'] for j in jobs]
+        self.assertEquals(ids(self.sync.jobs()), [5, 4, 3, 2, 1])
+        self.assertEquals(ids(self.sync.jobs(state='finished')), [4, 1])
+        self.assertEquals(ids(self.sync.jobs(state=['failed', 'waiting'])), [3, 2])
+        self.assertEquals(ids(self.sync.jobs(since=datetime(2013, 5, 4, 14),
+                                             until='2013-05-05T14:30:00Z')),
+                          [4, 3])
+        self.assertEquals(ids(self.sync.jobs(input_url='s3://bucket/other.mov')), [3])
+        self.assertEquals(ids(self.sync.jobs(limit=2, offset=1)), [4, 3])
+        self.assertEquals(self.sync.get(3)['input_media_file']['url'],
+                          's3://bucket/other.mov')
+        self.assertEquals(self.sync.get(42), None)
+
+    @patch("requests.Session.get")
+    def test_persistence(self, get):
+        get.side_effect = self.api
+        self.sync.sync()
+        self.sync.close()
+
+        self.sync = JobSync(self.zen, os.path.join(self.tmp, 'jobs.db'))
+        self.assertEquals(len(self.sync), 5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import json
+import socket
+import unittest
+
+import requests
+
+from stub_server import StubServer, load_fixture
+from test_util import TEST_API_KEY
+from zencoder import Zencoder
+from zencoder.core import Report
+from zencoder.retry import RetryPolicy
+from zencoder.transport import RequestsTransport, Urllib3Transport
+from zencoder.transport import HttpxTransport, TransportResponse
+from zencoder.transport import reject_proxies
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+def unused_port():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+class TransportConformance(object):
+    """ Tests every transport must pass. Subclasses set ``transport``. """
+
+    def transport(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.server = StubServer().start()
+        self.zen = Zencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                            transport=self.transport())
+
+    def tearDown(self):
+        self.zen.close()
+        self.server.stop()
+
+    def test_get(self):
+        response = self.zen.job.list(page=2, per_page=10)
+
+        self.assertEquals(response.code, 200)
+        self.assertEquals(response.body,
+                          json.loads(load_fixture('fixtures/job_list.json')))
+        request = self.server.requests[0]
+        self.assertEquals(request.method, 'GET')
+        self.assertTrue(request.path in ('/jobs?page=2&per_page=10',
+                                         '/jobs?per_page=10&page=2'))
+
+    def test_none_params(self):
+        report = Report(self.server.base_url, TEST_API_KEY,
+                        session=self.zen.session)
+        self.assertEquals(report.all().code, 200)
+        # the ``None`` dates and grouping are left out
+        self.assertEquals(self.server.requests[0].path,
+                          '/reports/all?api_key={0}'.format(TEST_API_KEY))
+
+    def test_headers(self):
+        self.zen.job.progress(1234)
+
+        headers = self.server.requests[0].headers
+        self.assertEquals(headers['Zencoder-Api-Key'], TEST_API_KEY)
+        self.assertEquals(headers['Accept'], 'application/json')
+        self.assertTrue(headers['User-Agent'].startswith('zencoder-py'))
+
+    def test_post(self):
+        response = self.zen.job.create('s3://bucket/key.mp4')
+
+        self.assertEquals(response.code, 201)
+        request = self.server.requests[0]
+        self.assertEquals(request.method, 'POST')
+        self.assertEquals(request.headers['Content-Type'], 'application/json')
+        self.assertEquals(json.loads(request.body.decode('utf-8'))['input'],
+                          's3://bucket/key.mp4')
+
+    def test_put_no_content(self):
+        response = self.zen.job.cancel(1234)
+
+        self.assertEquals(response.code, 204)
+        self.assertEquals(response.body, None)
+        self.assertEquals(self.server.requests[0].method, 'PUT')
+
+    def test_error_status(self):
+        self.server.respond('GET', r'^/jobs/\d+$', 404, b'{"errors": ["nope"]}')
+        response = self.zen.job.details(1234)
+
+        self.assertEquals(response.code, 404)
+        self.assertEquals(response.body, {'errors': ['nope']})
+
+    def test_response_headers(self):
+        self.assertEquals(
+            self.zen.job.details(1234).raw_response.headers['content-type'],
+            'application/json')
+
+    def test_stream(self):
+        expected = json.loads(load_fixture('fixtures/job_list.json'))
+        with self.zen.job.list(stream=True) as response:
+            self.assertEquals(list(response), expected)
+        # the connection went back to the pool
+        self.zen.job.details(1234)
+        self.assertEquals(self.zen.pool_stats()[0]['connections'], 1)
+
+    def test_stream_closed_early(self):
+        response = self.zen.job.list(stream=True)
+        next(iter(response))
+        response.close()
+        self.assertEquals(self.zen.job.details(1234).code, 200)
+
+    def test_keep_alive(self):
+        for _ in range(5):
+            self.zen.job.progress(1234)
+
+        stats = self.zen.pool_stats()
+        self.assertEquals(len(stats), 1)
+        self.assertEquals(stats[0]['connections'], 1)
+        self.assertEquals(stats[0]['requests'], 5)
+
+    def test_timeout(self):
+        self.server.httpd.latency = 0.5
+        zen = Zencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                       transport=self.transport(), timeout=0.1)
+        self.assertRaises(requests.exceptions.Timeout, zen.job.details, 1234)
+        zen.close()
+
+    def test_connection_error(self):
+        zen = Zencoder(api_key=TEST_API_KEY,
+                       base_url='http://127.0.0.1:{0}/'.format(unused_port()),
+                       transport=self.transport())
+        self.assertRaises(requests.exceptions.ConnectionError,
+                          zen.job.details, 1234)
+        zen.close()
+
+    def test_retry(self):
+        self.server.httpd.error_rate = 1
+        self.server.httpd.error_codes = (503,)
+        zen = Zencoder(api_key=TEST_API_KEY, base_url=self.server.base_url,
+                       transport=self.transport(),
+                       retry=RetryPolicy(max_retries=2, backoff_factor=0))
+
+        self.assertEquals(zen.job.details(1234).code, 503)
+        self.assertEquals(len(self.server.requests), 3)
+        zen.close()
+
+class TestRequestsTransport(TransportConformance, unittest.TestCase):
+
+    def transport(self):
+        return RequestsTransport()
+
+class TestUrllib3Transport(TransportConformance, unittest.TestCase):
+
+    def transport(self):
+        return Urllib3Transport()
+
+@unittest.skipIf(httpx is None, 'httpx is not installed')
+class TestHttpxTransport(TransportConformance, unittest.TestCase):
+
+    def transport(self):
+        return HttpxTransport()
+
+    def test_keep_alive(self):
+        # httpx does not expose its pool
+        for _ in range(5):
+            self.assertEquals(self.zen.job.progress(1234).code, 200)
+
+    test_stream = test_keep_alive
+
+    def test_proxies_rejected(self):
+        self.zen.job.requests_params['proxies'] = {'http': 'http://proxy:3128'}
+        self.assertRaises(ValueError, self.zen.job.progress, 1234)
+
+class TestTransportResponse(unittest.TestCase):
+
+    def test_content(self):
+        response = TransportResponse(200, {}, b'{"a": 1}')
+        self.assertEquals(list(response.iter_content(3)), [b'{"a', b'": ', b'1}'])
+        self.assertEquals(response.json(), {'a': 1})
+
+    def test_stream(self):
+        released = []
+        response = TransportResponse(
+            200, {}, stream=lambda size: iter([b'{"a"', b': 1}']),
+            release=lambda: released.append(True))
+
+        self.assertEquals(response.content, b'{"a": 1}')
+        self.assertEquals(response.content, b'{"a": 1}')
+        self.assertEquals(released, [True])
+
+class TestRejectProxies(unittest.TestCase):
+
+    def test_reject_proxies(self):
+        reject_proxies('T', 'http://host/', None, '')
+        reject_proxies('T', 'http://host/', {'https': 'http://proxy:3128'}, '')
+        self.assertRaises(ValueError, reject_proxies, 'T', 'https://host/',
+                          {'https': 'http://proxy:3128'}, '')
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,11 @@
+import operator
 import unittest
 import os
+from mock import patch
+import requests
 from zencoder import Zencoder
 import zencoder
+from stub_server import StubServer
 
 class TestZencoder(unittest.TestCase):
     def setUp(self):
@@ -76,6 +80,142 @@ class TestZencoder(unittest.TestCase):
 
         self.assertEquals(zc.job.requests_params['cert'], cert)
 
+    def test_resources_share_session(self):
+        zc = Zencoder(api_key='testapikey')
+
+        self.assertTrue(zc.job.http is zc.session)
+        self.assertTrue(zc.account.http is zc.session)
+        self.assertTrue(zc.output.http is zc.session)
+        self.assertTrue(zc.input.http is zc.session)
+        self.assertTrue(zc.report.http is zc.session)
+
+    def test_set_pool_size(self):
+        zc = Zencoder(api_key='testapikey', pool_connections=2, pool_maxsize=50)
+
+        adapter = zc.session.get_adapter('https://app.zencoder.com/api/v2/')
+        self.assertEquals(adapter._pool_connections, 2)
+        self.assertEquals(adapter._pool_maxsize, 50)
+
+    def test_set_keep_alive_false(self):
+        zc = Zencoder(api_key='testapikey', keep_alive=False)
+
+        self.assertEquals(zc.session.headers['Connection'], 'close')
+
+    def test_set_session(self):
+        session = zencoder.core.build_session()
+        zc = Zencoder(api_key='testapikey', session=session)
+
+        self.assertTrue(zc.job.http is session)
+        # the session may serve other accounts, the key is not stored in it
+        self.assertFalse('Zencoder-Api-Key' in session.headers)
+        self.assertEquals(zc.job.request_headers()['Zencoder-Api-Key'],
+                          'testapikey')
+
+    def test_pool_stats_empty(self):
+        zc = Zencoder(api_key='testapikey')
+
+        self.assertEquals(zc.pool_stats(), [])
+
+    @patch("requests.Session.get")
+    def test_slim_responses(self, get):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"state": "processing"}'
+        response.headers['ETag'] = '"abc"'
+        response.headers['Server'] = 'nginx'
+        get.return_value = response
+
+        zc = Zencoder(api_key='testapikey', slim_responses=True)
+        resp = zc.job.progress(1)
+
+        self.assertTrue(isinstance(resp, zencoder.core.SlimResponse))
+        self.assertEquals(resp.code, 200)
+        self.assertEquals(resp.body, {'state': 'processing'})
+        self.assertEquals(resp.headers, {'ETag': '"abc"'})
+        self.assertEquals(resp.raw_body, b'{"state": "processing"}')
+        self.assertEquals(resp.raw_response, None)
+        self.assertFalse(hasattr(resp, '__dict__'))
+
+    def test_headers_built_once(self):
+        zc = Zencoder(api_key='testapikey')
+
+        self.assertTrue(zc.job.headers is zc.job.headers)
+        self.assertEquals(zc.job.headers['Zencoder-Api-Key'], 'testapikey')
+        self.assertRaises(TypeError, operator.setitem, zc.job.headers,
+                          'Accept', '*')
+
+    def test_request_headers(self):
+        zc = Zencoder(api_key='testapikey')
+        other = zencoder.core.Job(zc.base_url, 'otherkey', session=zc.session)
+
+        # a private session sends its own headers
+        self.assertEquals(zc.job.request_headers(), None)
+        self.assertEquals(zc.session.headers['Zencoder-Api-Key'], 'testapikey')
+        self.assertEquals(other.request_headers()['Zencoder-Api-Key'],
+                          'otherkey')
+
+    def test_url_templates(self):
+        zc = Zencoder(api_key='testapikey')
+
+        self.assertEquals(zc.job.urls['progress'](1234),
+                          'https://app.zencoder.com/api/v2/jobs/1234/progress')
+        self.assertEquals(zc.report.urls['all'](),
+                          'https://app.zencoder.com/api/v2/reports/all')
+
+    def test_shared_session_api_keys(self):
+        with StubServer() as server:
+            zc = Zencoder(api_key='testapikey', base_url=server.base_url,
+                          session=zencoder.core.build_session())
+            other = zencoder.core.Job(server.base_url, 'otherkey',
+                                      session=zc.session)
+            zc.job.details(1)
+            other.details(2)
+            zc.job.details(3)
+            # another client wrote its key in the session headers
+            zc.session.headers['Zencoder-Api-Key'] = 'otherkey'
+            zc.job.details(4)
+            zencoder.core.HTTPBackend.delete(zc.job, zc.job.urls['details'](5))
+
+        self.assertEquals([request.headers['Zencoder-Api-Key']
+                           for request in server.requests],
+                          ['testapikey', 'otherkey', 'testapikey',
+                           'testapikey', 'testapikey'])
+
+    def test_prepared_requests(self):
+        with StubServer() as server:
+            zc = Zencoder(api_key='testapikey', base_url=server.base_url,
+                          prepared_requests=True)
+            for _ in range(3):
+                self.assertEquals(zc.job.progress(1234).code, 200)
+            zc.job.list(page=2)
+            zc.job.list(page=2)
+            zc.job.create('s3://bucket/key.mp4')
+
+        prepared = zc.prepared_requests
+        self.assertEquals((prepared.misses, prepared.hits), (2, 3))
+        self.assertEquals([request.path for request in server.requests[:5]],
+                          ['/jobs/1234/progress'] * 3 +
+                          ['/jobs?page=2&per_page=50'] * 2)
+        self.assertEquals(server.requests[4].headers['Zencoder-Api-Key'],
+                          'testapikey')
+
+    def test_prepared_requests_api_keys(self):
+        with StubServer() as server:
+            zc = Zencoder(api_key='testapikey', base_url=server.base_url,
+                          session=zencoder.core.build_session(),
+                          prepared_requests=True)
+            other = zencoder.core.Job(server.base_url, 'otherkey',
+                                      session=zc.session,
+                                      prepared=zc.prepared_requests)
+            zc.job.progress(1)
+            other.progress(1)
+            zc.job.progress(1)
+
+        self.assertEquals(zc.prepared_requests.misses, 2)
+        self.assertEquals([request.headers['Zencoder-Api-Key']
+                           for request in server.requests],
+                          ['testapikey', 'otherkey', 'testapikey'])
+
 if __name__ == "__main__":
     unittest.main()
 
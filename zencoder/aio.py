@@ -0,0 +1,750 @@
+""" asyncio support for the Zencoder API.
+
+``AsyncZencoder`` mirrors ``Zencoder``: every resource method returns a
+coroutine that resolves to the same ``Response`` object the synchronous
+client returns::
+
+    from zencoder.aio import AsyncZencoder
+
+    async def main():
+        async with AsyncZencoder('API_KEY') as zen:
+            job = await zen.job.create('s3://bucket/key.mp4')
+            progress = await zen.job.progress(job.body['id'])
+
+URL building, headers and response processing are shared with the
+synchronous resources; only the transport differs. Requests are sent through
+an ``AsyncTransport``, ``StreamTransport`` (pure asyncio) by default, or
+``HttpxTransport`` when ``httpx`` is installed.
+
+Requires Python 3.6 or greater (``AsyncJob.iter_all`` is an asynchronous
+generator).
+"""
+
+import asyncio
+import collections
+import ssl
+import time
+
+from urllib.parse import urlencode, urlsplit
+
+from requests.structures import CaseInsensitiveDict
+
+from .batch import Batch, BatchResult, create_kwargs
+from .cache import ResponseCache
+from .cassette import Cassette, CassetteMiss, normalize_url
+from .core import Zencoder
+from .core import ZencoderResponseError
+from .core import HTTPBackend
+from .core import Account
+from .core import Input
+from .core import Job
+from .core import Output
+from .core import Report
+from .export import ReportColumns
+from .hooks import timer
+from .ratelimit import Quota
+from .transport import TransportResponse, reject_proxies
+from .progress import ProgressEvent, TERMINAL_STATES, poll_interval
+from .progress import _parse_progress
+from .streaming import StreamingResponse
+
+class AsyncTransport(object):
+    """ Base class for asynchronous HTTP transports.
+
+    ``headers`` are sent with every request, like ``requests.Session.headers``.
+    Subclasses implement ``request`` and may override ``close``.
+    """
+    def __init__(self):
+        self.headers = {}
+
+    async def request(self, method, url, params=None, data=None, headers=None,
+                      timeout=None, proxies=None, cert=None, verify=True):
+        """ Sends a request and returns a response with ``status_code``,
+        ``headers``, ``content`` and ``json()``. """
+        raise NotImplementedError
+
+    async def close(self):
+        """ Releases any pooled connections. """
+        pass
+
+    def pool_stats(self):
+        """ Returns connection pool statistics, see ``zencoder.core.pool_stats``. """
+        return []
+
+class _ConnectionPool(object):
+    def __init__(self, scheme, host, port, maxsize):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.maxsize = maxsize
+        self.idle = []
+        self.connections = 0
+        self.requests = 0
+
+# methods safe to resend after a failure on a pooled connection
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'PUT', 'DELETE', 'OPTIONS'])
+
+class StreamTransport(AsyncTransport):
+    """ An HTTP/1.1 transport built on ``asyncio`` streams, with a keep-alive
+    connection pool of up to ``pool_maxsize`` idle connections per host.
+
+    Proxies are not supported: requests to a URL with a proxy in ``proxies``
+    raise ``ValueError`` (use ``HttpxTransport``), and the proxy environment
+    variables are not read.
+    """
+    def __init__(self, pool_maxsize=10):
+        super(StreamTransport, self).__init__()
+        self.pool_maxsize = pool_maxsize
+        self._pools = {}
+
+    async def request(self, method, url, params=None, data=None, headers=None,
+                      timeout=None, proxies=None, cert=None, verify=True):
+        reject_proxies('StreamTransport', url, proxies, 'use HttpxTransport')
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        query = parts.query
+        if params:
+            encoded = urlencode(params)
+            query = query + '&' + encoded if query else encoded
+        if query:
+            path = path + '?' + query
+
+        if data is None:
+            body = b''
+        elif isinstance(data, bytes):
+            body = data
+        else:
+            body = data.encode('utf-8')
+
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        request_headers['Host'] = parts.netloc
+        request_headers['Content-Length'] = str(len(body))
+
+        lines = ['{0} {1} HTTP/1.1'.format(method, path)]
+        for name, value in request_headers.items():
+            lines.append('{0}: {1}'.format(name, value))
+        message = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+        pool = self._pool(parts)
+        coro = self._send(pool, method, message, verify, cert)
+        if timeout is None:
+            return await coro
+        try:
+            return await asyncio.wait_for(coro, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError('{0} {1} timed out'.format(method, url))
+
+    def _pool(self, parts):
+        scheme = parts.scheme
+        port = parts.port or (443 if scheme == 'https' else 80)
+        key = (scheme, parts.hostname, port)
+        if key not in self._pools:
+            self._pools[key] = _ConnectionPool(scheme, parts.hostname, port,
+                                               self.pool_maxsize)
+        return self._pools[key]
+
+    async def _connect(self, pool, verify, cert):
+        context = None
+        if pool.scheme == 'https':
+            context = ssl.create_default_context()
+            if isinstance(verify, str):
+                context.load_verify_locations(verify)
+            elif not verify:
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            if cert:
+                if isinstance(cert, tuple):
+                    context.load_cert_chain(*cert)
+                else:
+                    context.load_cert_chain(cert)
+
+        pool.connections += 1
+        return await asyncio.open_connection(pool.host, pool.port, ssl=context)
+
+    async def _send(self, pool, method, message, verify, cert):
+        pool.requests += 1
+
+        # a pooled connection may have been closed by the server while idle,
+        # in which case idempotent requests are sent again on another one.
+        # Others may have been processed already and are never resent.
+        while pool.idle:
+            reader, writer = pool.idle.pop()
+            if reader.at_eof() or writer.transport.is_closing():
+                writer.close()
+                continue
+            if method not in IDEMPOTENT_METHODS:
+                return await self._exchange(pool, reader, writer, method, message)
+            try:
+                return await self._exchange(pool, reader, writer, method, message)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+
+        reader, writer = await self._connect(pool, verify, cert)
+        return await self._exchange(pool, reader, writer, method, message)
+
+    async def _exchange(self, pool, reader, writer, method, message):
+        try:
+            writer.write(message)
+            await writer.drain()
+            response, keep_alive = await self._read_response(reader, method)
+        except BaseException:
+            writer.close()
+            raise
+
+        if keep_alive and len(pool.idle) < pool.maxsize:
+            pool.idle.append((reader, writer))
+        else:
+            writer.close()
+
+        return response
+
+    async def _read_response(self, reader, method):
+        status_line = await reader.readuntil(b'\r\n')
+        version, code = status_line.decode('latin-1').split(' ', 2)[:2]
+        code = int(code)
+
+        headers = CaseInsensitiveDict()
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, value = line.decode('latin-1').split(':', 1)
+            headers[name.strip()] = value.strip()
+
+        keep_alive = headers.get('Connection', '').lower() != 'close'
+        if version == 'HTTP/1.0':
+            keep_alive = headers.get('Connection', '').lower() == 'keep-alive'
+
+        if method == 'HEAD' or code in (204, 304) or 100 <= code < 200:
+            content = b''
+        elif headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = await reader.readuntil(b'\r\n')
+                size = int(size.split(b';', 1)[0], 16)
+                if size == 0:
+                    while (await reader.readuntil(b'\r\n')) != b'\r\n':
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            content = b''.join(chunks)
+        elif 'Content-Length' in headers:
+            content = await reader.readexactly(int(headers['Content-Length']))
+        else:
+            content = await reader.read()
+            keep_alive = False
+
+        return TransportResponse(code, headers, content), keep_alive
+
+    async def close(self):
+        for pool in self._pools.values():
+            while pool.idle:
+                reader, writer = pool.idle.pop()
+                writer.close()
+
+    def pool_stats(self):
+        return [{'scheme': pool.scheme,
+                 'host': pool.host,
+                 'port': pool.port,
+                 'maxsize': pool.maxsize,
+                 'connections': pool.connections,
+                 'requests': pool.requests,
+                 'idle': len(pool.idle)}
+                for pool in self._pools.values()]
+
+class HttpxTransport(AsyncTransport):
+    """ A transport backed by ``httpx.AsyncClient``. Set ``http2=True`` to
+    multiplex requests over HTTP/2 (requires ``httpx[http2]``).
+
+    ``verify``, ``cert`` and ``proxies`` are client settings in httpx, pass
+    them as keyword arguments here rather than per request; requests with a
+    proxy in ``proxies`` raise ``ValueError``.
+    """
+    def __init__(self, client=None, http2=False, **kwargs):
+        super(HttpxTransport, self).__init__()
+        if client is None:
+            import httpx
+            client = httpx.AsyncClient(http2=http2, **kwargs)
+        self.client = client
+
+    async def request(self, method, url, params=None, data=None, headers=None,
+                      timeout=None, proxies=None, cert=None, verify=True):
+        reject_proxies('HttpxTransport', url, proxies,
+                       'configure them on the httpx client')
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+
+        response = await self.client.request(method, url,
+                                             params=params,
+                                             content=data,
+                                             headers=request_headers,
+                                             timeout=timeout)
+        return TransportResponse(response.status_code,
+                                 response.headers,
+                                 response.content)
+
+    async def close(self):
+        await self.client.aclose()
+
+class ReplayTransport(AsyncTransport):
+    """ A transport answering requests from a cassette, see
+    ``zencoder.cassette.ReplayAdapter``. """
+    def __init__(self, cassette, timing=False, speed=1.0, repeat='last'):
+        super(ReplayTransport, self).__init__()
+        self.owned = not isinstance(cassette, Cassette)
+        if self.owned:
+            cassette = Cassette(cassette, repeat=repeat)
+        self.cassette = cassette
+        self.timing = timing
+        self.speed = speed
+
+    async def request(self, method, url, params=None, data=None, headers=None,
+                      timeout=None, proxies=None, cert=None, verify=True):
+        url = normalize_url(url, params)
+        record = self.cassette.lookup(method, url, data)
+        if record is None:
+            raise CassetteMiss('{0} {1} is not in {2}'.format(
+                method, url, self.cassette.path))
+
+        if self.timing and record.elapsed:
+            await asyncio.sleep(record.elapsed / self.speed)
+        return TransportResponse(record.status_code,
+                                 CaseInsensitiveDict(record.headers),
+                                 record.content)
+
+    async def close(self):
+        if self.owned:
+            self.cassette.close()
+
+class AsyncHTTPBackend(HTTPBackend):
+    """ An ``HTTPBackend`` whose HTTP methods are coroutines. ``session`` must
+    be an ``AsyncTransport``. """
+
+    async def _request(self, method, url, **kwargs):
+        if method == 'get' and self.single_flight is not None:
+            key = (method, ResponseCache.key(url, kwargs.get('params'),
+                                             self.api_key))
+            return await self._coalesce(key, method, url, kwargs)
+
+        return await self._fetch(method, url, kwargs)
+
+    async def _coalesce(self, key, method, url, kwargs):
+        tasks = self.single_flight.tasks
+        task = tasks.get(key)
+        if task is None:
+            task = tasks[key] = asyncio.ensure_future(
+                self._fetch(method, url, kwargs))
+            task.add_done_callback(lambda _: tasks.pop(key, None))
+            self.single_flight.calls += 1
+        else:
+            self.single_flight.shared += 1
+
+        # shield the shared task from the cancellation of a single caller
+        return await asyncio.shield(task)
+
+    async def _fetch(self, method, url, kwargs):
+        model = kwargs.pop('model', None)
+        key, cached, validated = self._lookup(method, url, kwargs)
+        if cached is not None:
+            return cached
+
+        response = await self._send(method, url, **kwargs)
+        return self._complete(key, validated, response, model, method, url)
+
+    async def _send(self, method, url, **kwargs):
+        limiter = self.rate_limiter
+        hooks = self.hooks
+        attempt = 0
+
+        while True:
+            acquired = False
+            started = None
+            try:
+                if limiter:
+                    delay = limiter.reserve(self.resource_name)
+                    acquired = True
+                    if delay:
+                        await asyncio.sleep(delay)
+                if hooks is not None:
+                    hooks.before_request(method, url, kwargs)
+                    started = timer()
+                response = await self.http.request(method.upper(), url, **kwargs)
+            except Exception as e:
+                if acquired:
+                    limiter.release(self.resource_name, None)
+                if started is not None:
+                    hooks.on_error(method, url, kwargs, e, timer() - started)
+                if not (self.retry and
+                        self.retry.is_retryable(method, attempt, error=e)):
+                    raise
+                await self._backoff(self.retry.backoff(attempt))
+                attempt += 1
+                continue
+
+            if limiter:
+                limiter.release(self.resource_name, response)
+            if hooks is not None:
+                hooks.after_response(method, url, kwargs, response,
+                                     timer() - started)
+
+            if not (self.retry and
+                    self.retry.is_retryable(method, attempt, response=response)):
+                return response
+
+            await self._backoff(self.retry.backoff(attempt, response))
+            attempt += 1
+
+    async def _mutate(self, send, url, invalidated):
+        response = await send(url)
+        if 200 <= response.code < 300:
+            self.invalidate(invalidated)
+        return response
+
+    async def _backoff(self, seconds):
+        self.retry.record(seconds)
+        await asyncio.sleep(seconds)
+
+    async def get_stream(self, url, data=None, paths=((),)):
+        """ Asynchronous version of ``HTTPBackend.get_stream``. Asynchronous
+        transports read the body whole, but its array elements are still
+        decoded one at a time while iterating over the response. """
+        response = await self._send('get', url,
+                                    headers=self.request_headers(),
+                                    params=data,
+                                    **self.requests_params)
+        headers = getattr(response, 'headers', None) or {}
+        return StreamingResponse(response.status_code, response, paths,
+                                 headers)
+
+class AsyncAccount(Account, AsyncHTTPBackend):
+    pass
+
+class AsyncOutput(Output, AsyncHTTPBackend):
+    pass
+
+class AsyncInput(Input, AsyncHTTPBackend):
+    pass
+
+class AsyncBatch(Batch):
+    """ Asynchronous version of ``zencoder.batch.Batch``. Iterate over it
+    with ``async for`` to get results in completion order, or await it for
+    all results in submission order. """
+    async def _submit(self, index, spec):
+        start = time.time()
+        try:
+            response = await self.job.create(**create_kwargs(spec))
+            result = BatchResult(index, spec, response=response)
+        except Exception as e:
+            result = BatchResult(index, spec, error=e)
+        result.elapsed = time.time() - start
+        self.stats.record(result)
+        return result
+
+    def __iter__(self):
+        raise TypeError('use "async for" to iterate over an AsyncBatch')
+
+    async def __aiter__(self):
+        specs = enumerate(self.specs)
+        pending = set()
+
+        try:
+            while True:
+                for index, spec in specs:
+                    pending.add(asyncio.ensure_future(self._submit(index, spec)))
+                    if len(pending) >= self.concurrency:
+                        break
+
+                if not pending:
+                    break
+
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def results(self):
+        """ Submits every spec and returns all results in submission order. """
+        results = [result async for result in self]
+        return sorted(results, key=lambda result: result.index)
+
+    def __await__(self):
+        return self.results().__await__()
+
+class AsyncJob(Job, AsyncHTTPBackend):
+
+    def create_many(self, specs, concurrency=8):
+        """ Asynchronous version of ``Job.create_many``, returning an
+        ``AsyncBatch``::
+
+            results = await zen.job.create_many(urls, concurrency=16)
+
+            async for result in zen.job.create_many(urls):
+                print(result.index, result.ok)
+        """
+        return AsyncBatch(self, specs, concurrency=concurrency)
+
+    async def iter_all(self, per_page=50, prefetch=1, start_page=1):
+        """ Asynchronous version of ``Job.iter_all``::
+
+            async for job in zen.job.iter_all(per_page=100, prefetch=2):
+                print(job['id'])
+        """
+        pages = collections.deque()
+        next_page = start_page
+
+        try:
+            while True:
+                while len(pages) <= prefetch:
+                    pages.append(asyncio.ensure_future(
+                        self.list(next_page, per_page)))
+                    next_page += 1
+
+                response = await pages.popleft()
+                if response.code != 200:
+                    raise ZencoderResponseError(response.raw_response,
+                                                response.raw_body)
+
+                jobs = response.body or []
+                del response
+
+                if not jobs:
+                    return
+
+                for item in jobs:
+                    yield item.get('job', item)
+        finally:
+            for future in pages:
+                future.cancel()
+
+class AsyncReport(Report, AsyncHTTPBackend):
+
+    async def columns(self, report='all', start_date=None, end_date=None,
+                      grouping=None, account=None):
+        """ Asynchronous version of ``Report.columns``. """
+        columns = ReportColumns(report)
+        response = await getattr(self, report)(start_date, end_date, grouping,
+                                               stream=True)
+        columns.add_stream(response, account)
+        if response.code != 200:
+            raise ZencoderResponseError(response.raw_response, response.body)
+        return columns
+
+class AsyncJobWaiter(object):
+    """ The asyncio counterpart of ``zencoder.progress.JobWaiter``, backing
+    ``AsyncJob.wait`` and ``AsyncJob.wait_many``.
+
+    Each waited job is polled by a single task, shared by all its waiters,
+    every ``min_interval`` to ``max_interval`` seconds. States pushed through
+    ``update`` (e.g. by ``NotificationReceiver.bridge``, from any thread)
+    end the wait immediately.
+    """
+    def __init__(self, job, min_interval=1.0, max_interval=30.0):
+        self.job = job
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._polls = {}
+        self._pushed = {}
+        self._waiters = {}
+        self._loop = None
+
+    def wait(self, job_id, timeout=None):
+        """ Returns an ``asyncio.Future`` resolved with the final
+        ``ProgressEvent`` of ``job_id``; it fails with
+        ``asyncio.TimeoutError`` after ``timeout`` seconds. Cancel the
+        future to stop waiting; the job stops being polled once nobody
+        waits for it. """
+        self._loop = asyncio.get_event_loop()
+        future = self._loop.create_future()
+        future.job_id = job_id
+
+        poll = self._polls.get(job_id)
+        if poll is None:
+            pushed = self._pushed[job_id] = self._loop.create_future()
+            poll = self._polls[job_id] = asyncio.ensure_future(
+                self._poll(job_id, pushed))
+            poll.add_done_callback(lambda f: self._resolve(job_id, f))
+        self._waiters.setdefault(job_id, set()).add(future)
+
+        if timeout is not None:
+            timer = self._loop.call_later(timeout, self._expire, future)
+            future.add_done_callback(lambda f: timer.cancel())
+        future.add_done_callback(self._discard)
+        return future
+
+    async def wait_many(self, job_ids, timeout=None,
+                        return_when=asyncio.ALL_COMPLETED):
+        """ Like ``asyncio.wait``, returns a ``(done, not_done)`` tuple of
+        sets of futures (see ``wait``). """
+        futures = [self.wait(job_id) for job_id in job_ids]
+        return await asyncio.wait(futures, timeout=timeout,
+                                  return_when=return_when)
+
+    def update(self, kind, id, state, progress=None, response=None):
+        """ Ends the wait for job ``id`` if ``state`` is terminal. May be
+        called from any thread. """
+        if kind != 'job' or state not in TERMINAL_STATES or self._loop is None:
+            return
+        event = ProgressEvent(kind, id, state, 100.0, response)
+        self._loop.call_soon_threadsafe(self._push, event)
+
+    def stop(self):
+        """ Cancels all waits. """
+        for futures in list(self._waiters.values()):
+            for future in list(futures):
+                future.cancel()
+        for poll in list(self._polls.values()):
+            poll.cancel()
+
+    def __len__(self):
+        return len(self._polls)
+
+    def _resolve(self, job_id, poll):
+        if self._polls.get(job_id) is not poll:
+            # cancelled by ``_discard``, nobody waits for it
+            return
+        del self._polls[job_id]
+        for future in self._waiters.pop(job_id, ()):
+            if future.done():
+                continue
+            if poll.cancelled():
+                future.cancel()
+            elif poll.exception() is not None:
+                future.set_exception(poll.exception())
+            else:
+                future.set_result(poll.result())
+
+    def _expire(self, future):
+        if not future.done():
+            future.set_exception(asyncio.TimeoutError())
+
+    def _discard(self, future):
+        """ Forgets ``future``; cancels the poll of its job if nobody else
+        waits for it. """
+        futures = self._waiters.get(future.job_id)
+        if futures is None:
+            return
+        futures.discard(future)
+        if not futures:
+            self._waiters.pop(future.job_id, None)
+            poll = self._polls.pop(future.job_id, None)
+            if poll is not None:
+                poll.cancel()
+
+    def _push(self, event):
+        pushed = self._pushed.get(event.id)
+        if pushed is not None and not pushed.done():
+            pushed.set_result(event)
+
+    async def _poll(self, job_id, pushed):
+        failures = 0
+        try:
+            while True:
+                response = None
+                try:
+                    response = await self.job.progress(job_id)
+                except Exception:
+                    pass
+
+                if response is None or response.code == 429 or response.code >= 500:
+                    failures += 1
+                    delay = min(self.min_interval * 2 ** failures,
+                                self.max_interval)
+                elif response.code >= 400:
+                    return ProgressEvent('job', job_id, response=response)
+                else:
+                    failures = 0
+                    body = response.body or {}
+                    state = body.get('state')
+                    progress = _parse_progress(body.get('progress'))
+                    if state in TERMINAL_STATES:
+                        return ProgressEvent('job', job_id, state, 100.0, response)
+                    delay = poll_interval(state, progress, self.min_interval,
+                                          self.max_interval)
+
+                done, _ = await asyncio.wait([pushed], timeout=delay)
+                if done:
+                    return pushed.result()
+        finally:
+            self._pushed.pop(job_id, None)
+
+class AsyncZencoder(Zencoder):
+    """ The asyncio entry point to the Zencoder API. Accepts the same
+    arguments as ``Zencoder``, plus an optional ``transport``, an
+    ``AsyncTransport`` shared by all resources (``StreamTransport`` by
+    default, with ``pool_maxsize`` idle connections per host).
+
+    A ``zencoder.ratelimit.Quota`` blocks the calling thread, and so cannot
+    be its ``rate_limiter`` (``TypeError``); use a ``RateLimiter``.
+    """
+    def __init__(self, *args, **kwargs):
+        if isinstance(kwargs.get('rate_limiter'), Quota):
+            raise TypeError('Quota blocks the event loop, use a RateLimiter '
+                            'as the rate_limiter of AsyncZencoder')
+        super(AsyncZencoder, self).__init__(*args, **kwargs)
+
+    def _build_session(self, pool_maxsize=10, **kwargs):
+        return StreamTransport(pool_maxsize)
+
+    def _create_resources(self, args, kwargs):
+        self.job = AsyncJob(*args, **kwargs)
+        self.account = AsyncAccount(*args, **kwargs)
+        self.output = AsyncOutput(*args, **kwargs)
+        self.input = AsyncInput(*args, **kwargs)
+        self.report = None
+        if kwargs['version'] == 'v2':
+            self.report = AsyncReport(*args, **kwargs)
+        self.job.waiter = AsyncJobWaiter(self.job)
+
+    def pool_stats(self):
+        return self.session.pool_stats()
+
+    async def close(self):
+        """ Closes all pooled connections and cancels waits. """
+        self.job.waiter.stop()
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+class ASGINotificationApp(object):
+    """ An ASGI application receiving Zencoder notifications with a
+    ``zencoder.notifications.NotificationReceiver``::
+
+        receiver = NotificationReceiver()
+        app = ASGINotificationApp(receiver)   # serve with any ASGI server
+    """
+    def __init__(self, receiver):
+        self.receiver = receiver
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+
+        headers = dict((name.decode('latin-1').lower(), value.decode('latin-1'))
+                       for name, value in scope.get('headers', []))
+        status, content = self.receiver.handle(scope['method'],
+                                               headers.get('authorization'),
+                                               b''.join(chunks))
+
+        await send({'type': 'http.response.start',
+                    'status': int(status.split(' ', 1)[0]),
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(content)).encode())]})
+        await send({'type': 'http.response.body', 'body': content})
@@ -0,0 +1,186 @@
+""" Bulk job submission.
+
+``Job.create_many`` submits many jobs over a thread pool, keeping at most
+``concurrency`` requests in flight, and yields a ``BatchResult`` for every
+job as soon as its request completes::
+
+    batch = zen.job.create_many(['s3://bucket/a.mov', 's3://bucket/b.mov'],
+                                concurrency=16)
+    for result in batch:
+        if result.ok:
+            print(result.response.body['id'])
+        else:
+            print(result.spec, result.error or result.response.body)
+
+    print(batch.stats.throughput, batch.stats.percentile(99))
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+CREATE_ARGS = ('input', 'live_stream', 'outputs', 'options')
+
+def create_kwargs(spec):
+    """ Returns the ``Job.create`` keyword arguments for a job ``spec``.
+
+    A spec is either an input URL, or a dictionary of ``Job.create``
+    arguments. Any other keys in the dictionary are sent as job options.
+    """
+    if not isinstance(spec, dict):
+        return {'input': spec}
+
+    kwargs = dict((k, v) for k, v in spec.items() if k in CREATE_ARGS)
+    extra = dict((k, v) for k, v in spec.items() if k not in CREATE_ARGS)
+    if extra:
+        options = dict(kwargs.get('options') or {})
+        options.update(extra)
+        kwargs['options'] = options
+
+    return kwargs
+
+def percentile(values, q):
+    """ Returns the ``q``-th percentile of ``values`` (nearest rank). """
+    if not values:
+        return None
+    values = sorted(values)
+    rank = int(math.ceil(q / 100.0 * len(values))) - 1
+    return values[min(max(rank, 0), len(values) - 1)]
+
+class BatchResult(object):
+    """ The outcome of submitting one job spec.
+
+    ``index`` is the position of ``spec`` in the submitted iterable,
+    ``response`` the ``Response`` (``None`` if the request raised) and
+    ``error`` the exception raised, if any. ``elapsed`` is the request
+    latency in seconds.
+    """
+    def __init__(self, index, spec, response=None, error=None, elapsed=0.0):
+        self.index = index
+        self.spec = spec
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        """ ``True`` if the job was created. """
+        return (self.error is None and self.response is not None and
+                200 <= self.response.code < 300)
+
+class BatchStats(object):
+    """ Throughput and latency statistics of a batch. Thread-safe. """
+    def __init__(self):
+        self.succeeded = 0
+        self.failed = 0
+        self.latencies = []
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, result):
+        with self._lock:
+            if self.started_at is None:
+                self.started_at = time.time() - result.elapsed
+            if result.ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+            self.latencies.append(result.elapsed)
+            self.finished_at = time.time()
+
+    @property
+    def completed(self):
+        return self.succeeded + self.failed
+
+    @property
+    def elapsed(self):
+        """ Wall-clock seconds between the first submission and the last
+        completion. """
+        if self.started_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+    @property
+    def throughput(self):
+        """ Completed jobs per second. """
+        if not self.elapsed:
+            return 0.0
+        return self.completed / self.elapsed
+
+    def percentile(self, q):
+        """ Returns the ``q``-th percentile request latency in seconds. """
+        with self._lock:
+            return percentile(self.latencies, q)
+
+    @property
+    def p50(self):
+        return self.percentile(50)
+
+    @property
+    def p99(self):
+        return self.percentile(99)
+
+    def as_dict(self):
+        return {'completed': self.completed,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'elapsed': self.elapsed,
+                'throughput': self.throughput,
+                'p50': self.p50,
+                'p99': self.p99}
+
+class Batch(object):
+    """ Submits ``specs`` with ``job.create``, keeping at most
+    ``concurrency`` requests in flight. Iterating over a ``Batch`` yields
+    ``BatchResult`` objects in completion order; ``specs`` is consumed lazily
+    so it may be a generator of any length.
+
+    A batch can only be iterated once.
+    """
+    def __init__(self, job, specs, concurrency=8):
+        if concurrency < 1:
+            raise ValueError('concurrency must be at least 1')
+
+        self.job = job
+        self.specs = specs
+        self.concurrency = concurrency
+        self.stats = BatchStats()
+
+    def _submit(self, index, spec):
+        start = time.time()
+        try:
+            response = self.job.create(**create_kwargs(spec))
+            result = BatchResult(index, spec, response=response)
+        except Exception as e:
+            result = BatchResult(index, spec, error=e)
+        result.elapsed = time.time() - start
+        self.stats.record(result)
+        return result
+
+    def __iter__(self):
+        specs = enumerate(self.specs)
+        pending = set()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            try:
+                while True:
+                    for index, spec in specs:
+                        pending.add(executor.submit(self._submit, index, spec))
+                        if len(pending) >= self.concurrency:
+                            break
+
+                    if not pending:
+                        break
+
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def results(self):
+        """ Submits every spec and returns all results in submission order. """
+        return sorted(self, key=lambda result: result.index)
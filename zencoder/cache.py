@@ -0,0 +1,254 @@
+""" An in-memory cache for read-only API calls.
+
+A ``ResponseCache`` keeps the responses of successful GET requests (job,
+input and output details and progress, reports...) for a few seconds, so
+repeated lookups of the same ID or date range don't hit the API::
+
+    zen = Zencoder('API_KEY', cache=ResponseCache(ttl=5,
+                                                  ttls={'reports': 300}))
+
+Cancelling, resubmitting or finishing a job drops its cached entries.
+Cached responses are shared between callers: don't modify their ``body``.
+
+A ``ConditionalCache`` revalidates responses instead of expiring them: GET
+requests are sent with ``If-None-Match``/``If-Modified-Since``, and a 304
+Not Modified answer returns the previous response as is.
+
+A ``SingleFlight`` lets concurrent identical GET requests share one HTTP
+request and one parsed response.
+"""
+
+import collections
+import threading
+import time
+
+from .progress import TERMINAL_STATES
+
+def response_state(body):
+    """ Returns the ``state`` of a job, input or output response body. """
+    if not isinstance(body, dict):
+        return None
+    if 'job' in body and isinstance(body['job'], dict):
+        return body['job'].get('state')
+    return body.get('state')
+
+class ResponseCache(object):
+    """ A thread-safe LRU cache of at most ``maxsize`` responses.
+
+    Responses expire after ``ttl`` seconds, or the TTL given for their
+    resource in ``ttls`` (e.g. ``{'jobs': 2, 'reports': 600}``). Responses
+    of jobs, inputs and outputs in a terminal state (finished, failed or
+    cancelled) don't change anymore and are kept for ``terminal_ttl``
+    seconds instead.
+    """
+    def __init__(self, maxsize=1024, ttl=5.0, ttls=None, terminal_ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.ttls = ttls or {}
+        self.terminal_ttl = terminal_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None, api_key=None):
+        """ Returns the cache key of a GET request. Responses depend on the
+        account, so clients sharing a cache or a ``SingleFlight`` pass their
+        ``api_key``. """
+        if not params and api_key is None:
+            return url
+        return (url, tuple(sorted(params.items())) if params else (), api_key)
+
+    def get(self, key):
+        """ Returns the cached response for ``key``, or ``None``. """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None or entry[0] < now:
+                self.misses += 1
+                return None
+
+            # re-insert as most recently used
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def set(self, resource, key, response):
+        """ Caches ``response`` to a GET request on ``resource``, if it was
+        successful and has a body. """
+        if not 200 <= response.code < 300 or response.body is None:
+            return
+
+        if response_state(response.body) in TERMINAL_STATES:
+            ttl = self.terminal_ttl
+        else:
+            ttl = self.ttls.get(resource, self.ttl)
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.time() + ttl, response)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, url):
+        """ Drops the entries of ``url`` and of the URLs below it. """
+        prefix = url + '/'
+        with self._lock:
+            for key in list(self._entries):
+                key_url = key if isinstance(key, str) else key[0]
+                if key_url == url or key_url.startswith(prefix):
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """ Returns the number of cache ``hits``, ``misses`` and
+        ``evictions``, and the current ``size``. """
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'size': len(self._entries)}
+
+class Validated(object):
+    """ A response along with the validators needed to revalidate it. """
+    __slots__ = ('etag', 'last_modified', 'response')
+
+    def __init__(self, etag, last_modified, response):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.response = response
+
+    def request_headers(self, headers=None):
+        """ Returns ``headers`` with the conditional request headers added. """
+        headers = dict(headers or {})
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class ConditionalCache(object):
+    """ Remembers the ``ETag`` and ``Last-Modified`` validators, and the
+    processed response, of up to ``maxsize`` GET requests.
+
+    Later requests to the same URL are sent with ``If-None-Match`` and
+    ``If-Modified-Since``; when the API answers 304 Not Modified, the stored
+    response is returned without downloading or decoding the body again.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+
+        self.revalidations = 0
+        self.not_modified_count = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Returns the ``Validated`` entry for ``key``, or ``None``. """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+                self.revalidations += 1
+            return entry
+
+    def store(self, key, raw_response, response):
+        """ Stores ``response`` if ``raw_response`` was successful and
+        carries validators; forgets ``key`` otherwise. """
+        headers = getattr(raw_response, 'headers', None) or {}
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+
+        with self._lock:
+            self._entries.pop(key, None)
+            if response.code != 200 or not (etag or last_modified):
+                return
+
+            self._entries[key] = Validated(etag, last_modified, response)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def not_modified(self, entry):
+        """ Returns the response of ``entry``, which the API confirmed is
+        still current. """
+        with self._lock:
+            self.not_modified_count += 1
+        return entry.response
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """ Returns the number of conditional requests sent
+        (``revalidations``), how many were answered with 304
+        (``not_modified``), and the current ``size``. """
+        with self._lock:
+            return {'revalidations': self.revalidations,
+                    'not_modified': self.not_modified_count,
+                    'size': len(self._entries)}
+
+class _Call(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight(object):
+    """ Coalesces concurrent identical calls: while a call for a key is in
+    flight, other callers for the same key wait for it and share its result
+    (or exception) instead of making their own. """
+    def __init__(self):
+        self.calls = 0
+        self.shared = 0
+        # in-flight asyncio tasks, see ``zencoder.aio``
+        self.tasks = {}
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """ Returns ``fn()``, or the result of the in-flight call for
+        ``key``. """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def stats(self):
+        """ Returns the number of ``calls`` made and of callers that
+        ``shared`` the result of an in-flight call. """
+        with self._lock:
+            return {'calls': self.calls, 'shared': self.shared}
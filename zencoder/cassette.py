@@ -0,0 +1,284 @@
+""" Recording and replaying API traffic.
+
+A ``RecordingAdapter`` saves every request sent through a client, and its
+response, to a cassette file. A ``ReplayAdapter`` answers requests from that
+file without touching the network, so test suites and load tests run against
+real responses at memory speed::
+
+    zen = Zencoder('API_KEY', adapter=RecordingAdapter('jobs.cassette'))
+    ...                                     # use the API as usual
+    zen.close()                             # writes the index
+
+    zen = Zencoder('API_KEY', adapter=ReplayAdapter('jobs.cassette'))
+
+Requests are matched by method, URL (query parameters in any order) and
+body. A request recorded several times, e.g. progress polls, replays its
+responses in order, then keeps returning the last one. With
+``timing=True`` responses take as long as they did when recorded.
+
+Cassettes are memory-mapped: opening one only loads its index, a table of
+64-bit request hashes, and response bodies are read from the page cache
+when needed.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+import threading
+import time
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from .core import ZencoderError
+
+MAGIC = b'ZCAS'
+VERSION = 1
+
+# magic, version, record count, index offset
+HEADER = struct.Struct('<4sHxxIQ')
+# request hash, status code, elapsed microseconds, headers and body sizes
+RECORD = struct.Struct('<QHIII')
+
+# response headers that do not apply to the recorded (decoded) body
+SKIPPED_HEADERS = ('connection', 'content-encoding', 'transfer-encoding',
+                   'keep-alive')
+
+class CassetteMiss(ZencoderError):
+    """ Raised when replaying a request missing from the cassette. """
+
+def normalize_url(url, params=None):
+    """ Returns ``url`` with ``params`` added to its query, the query
+    parameters sorted and the fragment removed. ``None`` parameters are
+    dropped, like requests does. """
+    # plain string operations, this runs for every replayed request
+    url = url.split('#', 1)[0]
+    if '?' not in url and not params:
+        return url
+
+    url, _, query = url.partition('?')
+    fields = query.split('&') if query else []
+    if params:
+        fields.extend(urlencode([(name, value) for name, value in params.items()
+                                 if value is not None]).split('&'))
+    fields = sorted(field for field in fields if field)
+    return url + '?' + '&'.join(fields) if fields else url
+
+def request_hash(method, url, body=None):
+    """ Returns the 64-bit hash matching a request to its recordings. """
+    digest = hashlib.sha1()
+    digest.update('{0} {1}\n'.format(method.upper(),
+                                     normalize_url(url)).encode('utf-8'))
+    if body:
+        digest.update(body if isinstance(body, bytes) else body.encode('utf-8'))
+    return struct.unpack('<Q', digest.digest()[:8])[0]
+
+class Record(object):
+    """ A recorded response. ``headers`` may be shared between records and
+    must not be modified. """
+    __slots__ = ('status_code', 'headers', 'content', 'elapsed')
+
+    def __init__(self, status_code, headers, content, elapsed):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.elapsed = elapsed
+
+class CassetteWriter(object):
+    """ Writes recorded responses to the cassette at ``path``, replacing any
+    previous one. The index is written by ``close``. Thread-safe. """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        self.index = []
+        self._lock = threading.Lock()
+
+    def write(self, key, status_code, headers, content, elapsed):
+        """ Appends the response to the request of hash ``key``. """
+        headers = json.dumps(dict(
+            (name, value) for name, value in headers.items()
+            if name.lower() not in SKIPPED_HEADERS)).encode('utf-8')
+        content = content or b''
+        record = RECORD.pack(key, status_code, int(elapsed * 1e6),
+                             len(headers), len(content))
+        with self._lock:
+            self.index.append((key, self.file.tell()))
+            self.file.write(record)
+            self.file.write(headers)
+            self.file.write(content)
+
+    def close(self):
+        with self._lock:
+            if self.file.closed:
+                return
+            index_offset = self.file.tell()
+            for key, offset in self.index:
+                self.file.write(struct.pack('<QQ', key, offset))
+            self.file.seek(0)
+            self.file.write(HEADER.pack(MAGIC, VERSION, len(self.index),
+                                        index_offset))
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Cassette(object):
+    """ A cassette file open for replay.
+
+    ``repeat`` tells what to replay once all the responses to a request
+    were replayed: ``'last'`` keeps returning the last one, ``'cycle'``
+    starts over.
+    """
+    def __init__(self, path, repeat='last'):
+        if repeat not in ('last', 'cycle'):
+            raise ValueError('repeat must be "last" or "cycle"')
+        self.path = path
+        self.repeat = repeat
+
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError('{0} is not a cassette'.format(path))
+
+        # hash -> offset, or list of offsets for requests recorded repeatedly
+        self._index = {}
+        self._count = count
+        entries = struct.unpack_from('<{0}Q'.format(2 * count), self._map,
+                                     index_offset)
+        index = self._index
+        for i in range(0, 2 * count, 2):
+            key, offset = entries[i], entries[i + 1]
+            previous = index.get(key)
+            if previous is None:
+                index[key] = offset
+            elif isinstance(previous, list):
+                previous.append(offset)
+            else:
+                index[key] = [previous, offset]
+
+        self._cursors = {}
+        # decoded headers, most responses share the same ones
+        self._headers = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, method, url, body=None):
+        """ Returns the next ``Record`` answering a request, or ``None``. """
+        key = request_hash(method, url, body)
+        offsets = self._index.get(key)
+        if offsets is None:
+            return None
+        if not isinstance(offsets, list):
+            return self.read(offsets)
+
+        with self._lock:
+            position = self._cursors.get(key, 0)
+            if position + 1 < len(offsets):
+                self._cursors[key] = position + 1
+            elif self.repeat == 'cycle':
+                self._cursors[key] = 0
+        return self.read(offsets[position])
+
+    def read(self, offset):
+        """ Returns the ``Record`` at ``offset``. """
+        _, status_code, elapsed, headers_size, content_size = \
+            RECORD.unpack_from(self._map, offset)
+        start = offset + RECORD.size
+        raw = self._map[start:start + headers_size]
+        headers = self._headers.get(raw)
+        if headers is None:
+            headers = self._headers[raw] = json.loads(raw.decode('utf-8'))
+        start += headers_size
+        return Record(status_code, headers,
+                      self._map[start:start + content_size], elapsed / 1e6)
+
+    def rewind(self):
+        """ Replays every request from its first recorded response again. """
+        with self._lock:
+            self._cursors = {}
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._map.close()
+
+class RecordingAdapter(BaseAdapter):
+    """ Sends requests with ``adapter`` (a new ``HTTPAdapter`` by default)
+    and records them to a cassette at ``path``. Close the adapter, or the
+    client using it, to complete the cassette. """
+    def __init__(self, path, adapter=None):
+        super(RecordingAdapter, self).__init__()
+        self.adapter = adapter or HTTPAdapter()
+        self.writer = CassetteWriter(path)
+
+    def send(self, request, **kwargs):
+        start = time.time()
+        response = self.adapter.send(request, **kwargs)
+        # reads streamed bodies too; they are replayed from memory
+        content = response.content
+        self.writer.write(request_hash(request.method, request.url, request.body),
+                          response.status_code, response.headers, content,
+                          time.time() - start)
+        return response
+
+    def close(self):
+        self.writer.close()
+        self.adapter.close()
+
+class ReplayAdapter(BaseAdapter):
+    """ Answers requests from ``cassette`` (a ``Cassette`` or the path of
+    one), raising ``CassetteMiss`` for requests that were not recorded.
+
+    With ``timing=True``, responses are delayed by their recorded time
+    divided by ``speed``.
+    """
+    def __init__(self, cassette, timing=False, speed=1.0, repeat='last'):
+        super(ReplayAdapter, self).__init__()
+        self.owned = not isinstance(cassette, Cassette)
+        if self.owned:
+            cassette = Cassette(cassette, repeat=repeat)
+        self.cassette = cassette
+        self.timing = timing
+        self.speed = speed
+        self.replayed = 0
+        self.missed = 0
+
+    def send(self, request, **kwargs):
+        record = self.cassette.lookup(request.method, request.url, request.body)
+        if record is None:
+            self.missed += 1
+            raise CassetteMiss('{0} {1} is not in {2}'.format(
+                request.method, request.url, self.cassette.path))
+        self.replayed += 1
+
+        if self.timing and record.elapsed:
+            time.sleep(record.elapsed / self.speed)
+
+        response = requests.Response()
+        response.status_code = record.status_code
+        response.headers = CaseInsensitiveDict(record.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = record.content
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        if self.owned:
+            self.cassette.close()
@@ -0,0 +1,104 @@
+""" JSON codecs used to encode request bodies and decode responses.
+
+By default the fastest installed library is used: ``orjson``, then
+``ujson``, then the standard library. Pick one per client with
+``Zencoder(codec='json')``, or pass any object with ``dumps`` and ``loads``
+methods.
+"""
+
+# Note: I've seen this pattern for dealing with json in different versions of
+# python in a lot of modules -- if there's a better way, I'd love to use it.
+try:
+    # python 2.6 and greater
+    import json
+except ImportError:
+    try:
+        # python 2.5
+        import simplejson
+        json = simplejson
+    except ImportError:
+        # if we're in django or Google AppEngine land
+        # use this as a last resort
+        from django.utils import simplejson
+        json = simplejson
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+class JSONCodec(object):
+    """ Encodes and decodes JSON with the standard library. """
+    name = 'json'
+
+    def dumps(self, obj):
+        """ Returns ``obj`` encoded as JSON (``str`` or ``bytes``). """
+        return json.dumps(obj)
+
+    def loads(self, data):
+        """ Decodes JSON ``data`` (``bytes`` or ``str``). Raises
+        ``ValueError`` if ``data`` isn't valid JSON. """
+        if isinstance(data, bytes):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+class OrjsonCodec(JSONCodec):
+    """ Encodes and decodes JSON with ``orjson``. """
+    name = 'orjson'
+
+    def dumps(self, obj):
+        return orjson.dumps(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+class UjsonCodec(JSONCodec):
+    """ Encodes and decodes JSON with ``ujson``. """
+    name = 'ujson'
+
+    def dumps(self, obj):
+        return ujson.dumps(obj)
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+CODECS = {
+    'json': (JSONCodec, json),
+    'orjson': (OrjsonCodec, orjson),
+    'ujson': (UjsonCodec, ujson),
+}
+
+# in order of preference
+PREFERRED = ('orjson', 'ujson', 'json')
+
+def available_codecs():
+    """ Returns the names of the codecs that can be used, fastest first. """
+    return [name for name in PREFERRED if CODECS[name][1] is not None]
+
+def get_codec(codec=None):
+    """ Returns a codec instance.
+
+    ``codec`` is a codec name (``'orjson'``, ``'ujson'`` or ``'json'``), an
+    object with ``dumps`` and ``loads`` methods, or ``None`` for the fastest
+    codec available.
+    """
+    if codec is None:
+        codec = available_codecs()[0]
+
+    if not isinstance(codec, str):
+        return codec
+
+    try:
+        cls, module = CODECS[codec]
+    except KeyError:
+        raise ValueError('Unknown JSON codec {0!r}'.format(codec))
+
+    if module is None:
+        raise ImportError('JSON codec {0!r} is not installed'.format(codec))
+
+    return cls()
@@ -1,24 +1,43 @@
 import os
+import collections
+import threading
 import requests
+from requests.adapters import HTTPAdapter
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ALL_COMPLETED
+
+from .batch import Batch
+
+from .codec import json
+from .codec import get_codec
+from .retry import RetryPolicy
+from .cache import ResponseCache
+from .cache import ConditionalCache
+from .cache import SingleFlight
+from .progress import JobWaiter
+from .models import JobInfo
+from .models import OutputMediaFile
+from .models import InputMediaFile
+from .models import ProgressInfo
+from .streaming import StreamingResponse
+from .export import ReportColumns
+from .hooks import HookChain
+from .hooks import timer
+from .metrics import MetricsCollector
+
+__version__ = '0.6.5'
+
+USER_AGENT = 'zencoder-py v{0}'.format(__version__)
 
-# Note: I've seen this pattern for dealing with json in different versions of
-# python in a lot of modules -- if there's a better way, I'd love to use it.
 try:
-    # python 2.6 and greater
-    import json
+    from types import MappingProxyType
 except ImportError:
-    try:
-        # python 2.5
-        import simplejson
-        json = simplejson
-    except ImportError:
-        # if we're in django or Google AppEngine land
-        # use this as a last resort
-        from django.utils import simplejson
-        json = simplejson
+    # python 2, the headers are a plain dictionary
+    MappingProxyType = dict
 
-__version__ = '0.6.5'
+# headers kept by ``SlimResponse``
+SLIM_RESPONSE_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Retry-After')
 
 class ZencoderError(Exception):
     pass
@@ -28,9 +47,189 @@ class ZencoderResponseError(Exception):
         self.http_response = http_response
         self.content = content
 
+def build_session(pool_connections=10,
+                  pool_maxsize=10,
+                  pool_block=False,
+                  keep_alive=True,
+                  adapter=None):
+    """ Returns a ``requests.Session`` with a connection pool sized for
+    the Zencoder API.
+
+    ``pool_connections`` is the number of per-host pools to keep,
+    ``pool_maxsize`` the maximum number of connections kept per host and
+    ``pool_block`` whether to block when a host's pool is exhausted. Pass
+    ``adapter`` to mount your own ``requests.adapters.HTTPAdapter`` instead.
+    Set ``keep_alive=False`` to close connections after every request.
+    """
+    session = requests.Session()
+
+    if adapter is None:
+        adapter = HTTPAdapter(pool_connections=pool_connections,
+                              pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+
+    return session
+
+def pool_stats(session):
+    """ Returns usage statistics for every connection pool of ``session``.
+
+    Each entry is a dictionary with the ``scheme``, ``host`` and ``port`` of
+    the pool, its ``maxsize``, the number of ``connections`` opened and
+    ``requests`` made so far, and the number of ``idle`` connections
+    currently available for reuse.
+
+    ``session`` may also be a ``zencoder.transport.Transport``.
+    """
+    if not isinstance(session, requests.Session):
+        return session.pool_stats()
+
+    stats = []
+    adapters = []
+    for adapter in session.adapters.values():
+        if adapter not in adapters:
+            adapters.append(adapter)
+
+    for adapter in adapters:
+        poolmanager = getattr(adapter, 'poolmanager', None)
+        if poolmanager is not None:
+            stats.extend(poolmanager_stats(poolmanager))
+
+    return stats
+
+def poolmanager_stats(poolmanager):
+    """ Returns the ``pool_stats`` of a ``urllib3.PoolManager``. """
+    stats = []
+    for key in list(poolmanager.pools.keys()):
+        pool = poolmanager.pools.get(key)
+        if pool is None:
+            continue
+
+        idle = 0
+        if pool.pool is not None:
+            idle = len([conn for conn in list(pool.pool.queue)
+                        if conn is not None])
+
+        stats.append({
+            'scheme': pool.scheme,
+            'host': pool.host,
+            'port': pool.port,
+            'maxsize': pool.pool.maxsize if pool.pool is not None else 0,
+            'connections': pool.num_connections,
+            'requests': pool.num_requests,
+            'idle': idle
+        })
+
+    return stats
+
+class PreparedRequests(object):
+    """ Reuses the prepared GET requests of a ``requests.Session``, for GET
+    requests sent over and over again, like progress polls. Requests are
+    prepared, and their environment settings (proxies, CA bundle) looked up,
+    once instead of on every call. Keeps up to ``maxsize`` requests.
+
+    Session cookies, auth and hooks are applied when a request is first
+    prepared only.
+    """
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._requests = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def sender(self, session):
+        """ Returns a function sending GET requests with ``session``, like
+        ``session.get``. """
+        def send(url, **kwargs):
+            return self.send(session, url, **kwargs)
+        return send
+
+    def send(self, session, url, params=None, headers=None, timeout=None,
+             proxies=None, cert=None, verify=True, stream=False):
+        try:
+            key = (id(session), url,
+                   frozenset(params.items()) if params else None,
+                   frozenset(headers.items()) if headers else None,
+                   frozenset(proxies.items()) if proxies else None,
+                   cert, verify, stream)
+            hash(key)
+        except TypeError:
+            # list parameters, not worth caching
+            return session.get(url, params=params, headers=headers,
+                               timeout=timeout, proxies=proxies, cert=cert,
+                               verify=verify, stream=stream)
+
+        with self._lock:
+            entry = self._requests.pop(key, None)
+            if entry is not None:
+                self.hits += 1
+                self._requests[key] = entry
+
+        if entry is None:
+            prepared = session.prepare_request(
+                requests.Request('GET', url, params=params, headers=headers))
+            settings = session.merge_environment_settings(
+                prepared.url, proxies or {}, stream, verify, cert)
+            entry = (prepared, settings)
+            with self._lock:
+                self.misses += 1
+                self._requests[key] = entry
+                while len(self._requests) > self.maxsize:
+                    self._requests.popitem(last=False)
+
+        prepared, settings = entry
+        return session.send(prepared, timeout=timeout, allow_redirects=True,
+                            **settings)
+
+    def clear(self):
+        with self._lock:
+            self._requests.clear()
+
 class HTTPBackend(object):
     """ Abstracts out an HTTP backend. Required argument are ``base_url`` and
-    ``api_key``. """
+    ``api_key``.
+
+    Pass a ``session`` to share one ``requests.Session`` (and its connection
+    pool) between several backends; otherwise a new one is created.
+    ``shared_session`` tells whether backends of other accounts may use the
+    session (by default, whether one was passed): the API key is then sent
+    with every request instead of being set in the session headers.
+
+    Set ``slim_responses=True`` to return ``SlimResponse`` objects, which only
+    keep the ``response_headers`` of each response instead of the raw body
+    and ``requests.Response``.
+
+    ``codec`` selects the JSON library used for request and response bodies,
+    see ``zencoder.codec.get_codec``.
+
+    ``retry`` is a ``zencoder.retry.RetryPolicy`` used to retry failed
+    requests (``None`` to never retry).
+
+    ``rate_limiter`` is a ``zencoder.ratelimit.RateLimiter`` every request
+    goes through, keyed by ``resource_name``.
+
+    ``cache`` is a ``zencoder.cache.ResponseCache`` for GET responses.
+
+    ``conditional`` is a ``zencoder.cache.ConditionalCache`` used to
+    revalidate GET responses with ``ETag`` and ``Last-Modified``.
+
+    ``single_flight`` is a ``zencoder.cache.SingleFlight`` coalescing
+    concurrent identical GET requests.
+
+    ``hooks`` is a ``zencoder.hooks.HookChain`` called around every request.
+
+    ``prepared`` is a ``PreparedRequests`` reusing the prepared GET requests
+    of a ``requests.Session``.
+    """
+    # URL templates of the resource's endpoints, relative to ``base_url``
+    URLS = {}
+
     def __init__(self,
                  base_url,
                  api_key,
@@ -40,14 +239,33 @@ class HTTPBackend(object):
                  version=None,
                  proxies=None,
                  cert=None,
-                 verify=True):
+                 verify=True,
+                 session=None,
+                 slim_responses=False,
+                 response_headers=SLIM_RESPONSE_HEADERS,
+                 codec=None,
+                 retry=None,
+                 rate_limiter=None,
+                 cache=None,
+                 conditional=None,
+                 single_flight=None,
+                 hooks=None,
+                 prepared=None,
+                 shared_session=None):
 
         self.base_url = base_url
+        self.resource_name = resource_name
 
         if resource_name:
             self.base_url = self.base_url + resource_name
 
-        self.http = requests.Session()
+        if shared_session is None:
+            shared_session = session is not None
+        if session is None:
+            session = build_session()
+
+        self.http = session
+        self.shared_session = shared_session
 
         # set requests additional settings.
         # `None` is default for all of these settings.
@@ -61,66 +279,234 @@ class HTTPBackend(object):
         self.api_key = api_key
         self.test = test
         self.version = version
-
-        # sets request headers for the entire session
-        self.http.headers.update(self.headers)
-
-    @property
-    def headers(self):
-        """ Returns default headers, by setting the Content-Type, Accepts,
-        User-Agent and API Key headers. """
-
-        headers = {
+        self.slim_responses = slim_responses
+        self.response_headers = response_headers
+        self.codec = get_codec(codec)
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+        self.conditional = conditional
+        self.single_flight = single_flight
+        self.hooks = hooks
+        self.prepared = prepared
+
+        # the Content-Type, Accept, User-Agent and API Key headers, built
+        # once and read-only
+        self.headers = MappingProxyType({
             'Content-Type': 'application/json',
             'Accept': 'application/json',
-            'Zencoder-Api-Key': self.api_key,
-            'User-Agent': 'zencoder-py v{0}'.format(__version__)
-        }
-
-        return headers
+            'Zencoder-Api-Key': api_key,
+            'User-Agent': USER_AGENT
+        })
+
+        # str.format of the URL templates of the resource
+        self.urls = dict((name, (self.base_url + path).format)
+                         for name, path in self.URLS.items())
+
+        # sets request headers for the entire session, unless other
+        # accounts use it too
+        if not shared_session:
+            self.http.headers.update(self.headers)
+
+    def request_headers(self):
+        """ Returns the headers to send with a request: none for a private
+        session, which has them already, the API key and others for a shared
+        one. Hooks get a dictionary they may change. """
+        if not self.shared_session:
+            return {} if self.hooks is not None else None
+        if self.hooks is not None:
+            return dict(self.headers)
+        return self.headers
 
     def delete(self, url, params=None):
         """ Executes an HTTP DELETE request for the given URL.
 
             ``params`` should be a dictionary
         """
-        response = self.http.delete(url,
-                                    params=params,
-                                    **self.requests_params)
-        return self.process(response)
+        return self._request('delete', url,
+                             headers=self.request_headers(),
+                             params=params,
+                             **self.requests_params)
 
-    def get(self, url, data=None):
+    def get(self, url, data=None, model=None):
         """ Executes an HTTP GET request for the given URL.
 
             ``data`` should be a dictionary of url parameters
+
+            ``model`` is the ``zencoder.models`` class of ``Response.model``
         """
-        response = self.http.get(url,
-                                 headers=self.headers,
-                                 params=data,
-                                 **self.requests_params)
-        return self.process(response)
+        return self._request('get', url,
+                             headers=self.request_headers(),
+                             params=data,
+                             model=model,
+                             **self.requests_params)
+
+    def get_stream(self, url, data=None, paths=((),)):
+        """ Executes an HTTP GET request for the given URL and returns a
+        ``zencoder.streaming.StreamingResponse``, decoding the elements of
+        the arrays at ``paths`` while the body is read. Streamed requests
+        bypass the caches.
+
+            ``data`` should be a dictionary of url parameters
+        """
+        response = self._send('get', url,
+                              headers=self.request_headers(),
+                              params=data,
+                              stream=True,
+                              **self.requests_params)
+        headers = getattr(response, 'headers', None) or {}
+        return StreamingResponse(response.status_code, response, paths,
+                                 headers)
 
     def post(self, url, body=None):
         """ Executes an HTTP POST request for the given URL. """
-        response = self.http.post(url,
-                                  headers=self.headers,
-                                  data=body,
-                                  **self.requests_params)
-
-        return self.process(response)
+        return self._request('post', url,
+                             headers=self.request_headers(),
+                             data=body,
+                             **self.requests_params)
 
     def put(self, url, data=None, body=None):
         """ Executes an HTTP PUT request for the given URL. """
-        response = self.http.put(url,
-                                 headers=self.headers,
-                                 data=body,
-                                 params=data,
-                                 **self.requests_params)
-
-        return self.process(response)
-
-    def process(self, response):
-        """ Returns HTTP backend agnostic ``Response`` data. """
+        return self._request('put', url,
+                             headers=self.request_headers(),
+                             data=body,
+                             params=data,
+                             **self.requests_params)
+
+    def _request(self, method, url, **kwargs):
+        """ Sends a request with the session's ``method`` function and
+        processes the response.
+
+        Concurrent identical GET requests share a single call when
+        ``single_flight`` is set. GET responses are served from the ``cache``
+        and revalidated with the ``conditional`` cache, if any.
+        """
+        if method == 'get' and self.single_flight is not None:
+            key = (method, ResponseCache.key(url, kwargs.get('params'),
+                                             self.api_key))
+            return self.single_flight.do(
+                key, lambda: self._fetch(method, url, kwargs))
+
+        return self._fetch(method, url, kwargs)
+
+    def _fetch(self, method, url, kwargs):
+        model = kwargs.pop('model', None)
+        key, cached, validated = self._lookup(method, url, kwargs)
+        if cached is not None:
+            return cached
+
+        response = self._send(method, url, **kwargs)
+        return self._complete(key, validated, response, model, method, url)
+
+    def _send(self, method, url, **kwargs):
+        """ Sends a request once the ``rate_limiter`` lets it through,
+        retrying it according to the ``retry`` policy. Returns the raw
+        response. """
+        send = getattr(self.http, method)
+        if (method == 'get' and self.prepared is not None and
+                isinstance(self.http, requests.Session)):
+            send = self.prepared.sender(self.http)
+        limiter = self.rate_limiter
+        hooks = self.hooks
+        attempt = 0
+
+        while True:
+            acquired = False
+            started = None
+            try:
+                if limiter:
+                    limiter.acquire(self.resource_name)
+                    acquired = True
+                if hooks is not None:
+                    hooks.before_request(method, url, kwargs)
+                    started = timer()
+                response = send(url, **kwargs)
+            except Exception as e:
+                if acquired:
+                    limiter.release(self.resource_name, None)
+                if started is not None:
+                    hooks.on_error(method, url, kwargs, e, timer() - started)
+                if not (self.retry and
+                        self.retry.is_retryable(method, attempt, error=e)):
+                    raise
+                self.retry.sleep(self.retry.backoff(attempt))
+                attempt += 1
+                continue
+
+            if limiter:
+                limiter.release(self.resource_name, response)
+            if hooks is not None:
+                hooks.after_response(method, url, kwargs, response,
+                                     timer() - started)
+
+            if not (self.retry and
+                    self.retry.is_retryable(method, attempt, response=response)):
+                return response
+
+            self.retry.sleep(self.retry.backoff(attempt, response))
+            attempt += 1
+
+    def _lookup(self, method, url, kwargs):
+        """ Returns the cache key of a GET request, its cached response if
+        still fresh, and its ``conditional`` cache entry, if any. The request
+        headers in ``kwargs`` are updated to revalidate that entry. """
+        if method != 'get' or (self.cache is None and self.conditional is None):
+            return None, None, None
+
+        key = ResponseCache.key(url, kwargs.get('params'), self.api_key)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return key, cached, None
+
+        validated = None
+        if self.conditional is not None:
+            validated = self.conditional.get(key)
+            if validated is not None:
+                kwargs['headers'] = validated.request_headers(kwargs.get('headers'))
+
+        return key, None, validated
+
+    def _complete(self, key, validated, response, model=None, method=None,
+                  url=None):
+        """ Processes ``response`` to the ``method`` request of ``url`` and
+        stores it in the caches. A 304 Not Modified response returns the
+        ``validated`` response instead, without decoding anything. """
+        if validated is not None and response.status_code == 304:
+            result = self.conditional.not_modified(validated)
+        else:
+            if self.hooks is not None:
+                started = timer()
+                result = self.process(response, model)
+                self.hooks.after_process(method, url, response, result,
+                                         timer() - started)
+            else:
+                result = self.process(response, model)
+            if key is not None and self.conditional is not None:
+                self.conditional.store(key, response, result)
+
+        if key is not None and self.cache is not None:
+            self.cache.set(self.resource_name, key, result)
+        return result
+
+    def invalidate(self, url):
+        """ Drops cached responses for ``url`` and the URLs below it. """
+        if self.cache is not None:
+            self.cache.invalidate(url)
+
+    def _mutate(self, send, url, invalidated):
+        """ Sends a request changing a resource with ``send`` and, once it
+        succeeded, invalidates the cached responses of ``invalidated``.
+        Invalidating before would let a concurrent read cache the old
+        state again. """
+        response = send(url)
+        if 200 <= response.code < 300:
+            self.invalidate(invalidated)
+        return response
+
+    def process(self, response, model=None):
+        """ Returns HTTP backend agnostic ``Response`` data. ``model`` is the
+        class of the response's lazily built ``model``. """
 
         try:
             code = response.status_code
@@ -135,9 +521,16 @@ class HTTPBackend(object):
                     "status": "error"
                 }
             else:
-                body = response.json()
+                body = self.codec.loads(response.content)
+
+            if self.slim_responses:
+                headers = getattr(response, 'headers', None) or {}
+                headers = dict((name, headers[name])
+                               for name in self.response_headers
+                               if name in headers)
+                return SlimResponse(code, body, headers, model)
 
-            return Response(code, body, response.content, response)
+            return Response(code, body, response.content, response, model)
         except ValueError:
             raise ZencoderResponseError(response, response.content)
 
@@ -154,6 +547,42 @@ class Zencoder(object):
 
     ``timeout``, ``proxies`` and ``verify`` can be set to control the
     underlying HTTP requests that are made.
+
+    All resources share a single connection pool. ``pool_connections``,
+    ``pool_maxsize``, ``pool_block``, ``keep_alive`` and ``adapter`` tune it
+    (see ``build_session``), or pass an existing ``session`` to reuse it.
+    Pass a ``zencoder.transport.Transport`` as ``transport`` to send requests
+    with another HTTP library instead of requests.
+
+    Set ``slim_responses=True`` to get lightweight ``SlimResponse`` objects
+    keeping only the ``response_headers`` you need.
+
+    ``codec`` selects the JSON library (``'orjson'``, ``'ujson'`` or
+    ``'json'``); the fastest one installed is used by default.
+
+    Pass a ``zencoder.retry.RetryPolicy`` as ``retry`` (or ``retry=True`` for
+    the default policy) to retry rate-limited and failed requests.
+
+    Pass a ``zencoder.ratelimit.RateLimiter`` as ``rate_limiter`` to throttle
+    the requests of all resources (and threads) using this client.
+
+    Pass a ``zencoder.cache.ResponseCache`` as ``cache`` (or ``cache=True``
+    for the defaults) to cache the responses of read-only calls.
+
+    Pass a ``zencoder.cache.ConditionalCache`` as ``conditional`` (or
+    ``conditional=True``) to send conditional GET requests, reusing the
+    previous response when the API answers 304 Not Modified.
+
+    Set ``single_flight=True`` to let concurrent identical GET requests (from
+    several threads) share one HTTP request and response.
+
+    Set ``prepared_requests=True`` to prepare repeated GET requests (progress
+    polls) once, see ``PreparedRequests``.
+
+    Pass a list of ``zencoder.hooks.Hook`` objects as ``hooks`` to run code
+    around every request. Pass a ``zencoder.metrics.MetricsCollector`` as
+    ``metrics`` (or ``metrics=True``) to record request metrics in
+    ``metrics``.
     """
     def __init__(self,
                  api_key=None,
@@ -163,7 +592,25 @@ class Zencoder(object):
                  test=False,
                  proxies=None,
                  cert=None,
-                 verify=True):
+                 verify=True,
+                 pool_connections=10,
+                 pool_maxsize=10,
+                 pool_block=False,
+                 keep_alive=True,
+                 adapter=None,
+                 session=None,
+                 slim_responses=False,
+                 response_headers=SLIM_RESPONSE_HEADERS,
+                 codec=None,
+                 retry=None,
+                 rate_limiter=None,
+                 cache=None,
+                 conditional=None,
+                 single_flight=None,
+                 hooks=None,
+                 metrics=None,
+                 transport=None,
+                 prepared_requests=None):
 
         if base_url and api_version:
             raise ZencoderError('Cannot set both `base_url` and `api_version`.')
@@ -189,6 +636,46 @@ class Zencoder(object):
 
         self.test = test
 
+        # a session or transport passed in may serve other accounts too
+        shared_session = session is not None or transport is not None
+        if transport is not None:
+            session = transport
+        elif session is None:
+            session = self._build_session(pool_connections=pool_connections,
+                                          pool_maxsize=pool_maxsize,
+                                          pool_block=pool_block,
+                                          keep_alive=keep_alive,
+                                          adapter=adapter)
+        self.session = session
+
+        if retry is True:
+            retry = RetryPolicy()
+        self.retry = retry
+        self.rate_limiter = rate_limiter
+
+        if cache is True:
+            cache = ResponseCache()
+        self.cache = cache
+
+        if conditional is True:
+            conditional = ConditionalCache()
+        self.conditional = conditional
+
+        if single_flight is True:
+            single_flight = SingleFlight()
+        self.single_flight = single_flight
+
+        if prepared_requests is True:
+            prepared_requests = PreparedRequests()
+        self.prepared_requests = prepared_requests
+
+        if metrics is True:
+            metrics = MetricsCollector()
+        self.metrics = metrics
+        hooks = list(hooks or [])
+        if metrics is not None:
+            hooks.append(metrics)
+
         args = (self.base_url, self.api_key)
 
         kwargs = dict(timeout=timeout,
@@ -196,26 +683,101 @@ class Zencoder(object):
                       version=api_version,
                       proxies=proxies,
                       cert=cert,
-                      verify=verify)
-
+                      verify=verify,
+                      session=self.session,
+                      slim_responses=slim_responses,
+                      response_headers=response_headers,
+                      codec=get_codec(codec),
+                      retry=self.retry,
+                      rate_limiter=self.rate_limiter,
+                      cache=self.cache,
+                      conditional=self.conditional,
+                      single_flight=self.single_flight,
+                      hooks=HookChain(hooks) if hooks else None,
+                      prepared=self.prepared_requests,
+                      shared_session=shared_session)
+
+        self._create_resources(args, kwargs)
+
+    def _build_session(self, **kwargs):
+        """ Returns the session of the client when none is passed, see
+        ``build_session``. """
+        return build_session(**kwargs)
+
+    def _create_resources(self, args, kwargs):
+        """ Creates the API resources, all sharing the same settings. """
         self.job = Job(*args, **kwargs)
         self.account = Account(*args, **kwargs)
         self.output = Output(*args, **kwargs)
         self.input = Input(*args, **kwargs)
         self.report = None
-        if api_version == 'v2':
+        if kwargs['version'] == 'v2':
             self.report = Report(*args, **kwargs)
+        self.job.waiter = JobWaiter(self)
+
+    def pool_stats(self):
+        """ Returns usage statistics for the shared connection pool.
+        See ``pool_stats``. """
+        return pool_stats(self.session)
+
+    def close(self):
+        """ Closes all pooled connections and stops waiting for jobs. """
+        if self.job.waiter is not None:
+            self.job.waiter.stop()
+        self.session.close()
+
+class ModelMixin(object):
+    """ Adds the lazily built ``model`` to responses. """
+    __slots__ = ()
 
-class Response(object):
+    @property
+    def model(self):
+        """ The body as ``model_class`` instances (see ``zencoder.models``),
+        built on first access. ``None`` for error responses and calls
+        without a model. """
+        if (self._model is None and self.model_class is not None and
+                self.body is not None and 200 <= self.code < 300):
+            self._model = self.model_class.from_body(self.body)
+        return self._model
+
+class Response(ModelMixin):
     """ The Response object stores the details of an API request.
 
     `Response.body` contains the loaded JSON response from the API.
     """
-    def __init__(self, code, body, raw_body, raw_response):
+    def __init__(self, code, body, raw_body, raw_response, model_class=None):
         self.code = code
         self.body = body
         self.raw_body = raw_body
         self.raw_response = raw_response
+        self.model_class = model_class
+        self._model = None
+
+class SlimResponse(ModelMixin):
+    """ A lightweight ``Response`` that only keeps the status ``code``, the
+    loaded JSON ``body`` and a few selected ``headers``.
+
+    ``raw_body`` is re-encoded from ``body`` when accessed, and
+    ``raw_response`` is always ``None``.
+    """
+    __slots__ = ('code', 'body', 'headers', 'model_class', '_model')
+
+    def __init__(self, code, body, headers=None, model_class=None):
+        self.code = code
+        self.body = body
+        self.headers = headers or {}
+        self.model_class = model_class
+        self._model = None
+
+    @property
+    def raw_body(self):
+        if self.body is None:
+            return None
+        return json.dumps(self.body).encode('utf-8')
+
+    @property
+    def raw_response(self):
+        return None
 
 class Account(HTTPBackend):
     """ Contains all API methods relating to Accounts.
@@ -223,6 +785,8 @@ class Account(HTTPBackend):
     https://app.zencoder.com/docs/api/inputs
 
     """
+    URLS = {'integration': '/integration', 'live': '/live'}
+
     def __init__(self, *args, **kwargs):
         kwargs['resource_name'] = 'account'
         super(Account, self).__init__(*args, **kwargs)
@@ -238,7 +802,7 @@ class Account(HTTPBackend):
         if options:
             data.update(options)
 
-        return self.post(self.base_url, body=json.dumps(data))
+        return self.post(self.base_url, body=self.codec.dumps(data))
 
     def details(self):
         """ Gets account details.
@@ -254,7 +818,7 @@ class Account(HTTPBackend):
         https://app.zencoder.com/docs/api/accounts/integration
 
         """
-        return self.put(self.base_url + '/integration')
+        return self.put(self.urls['integration']())
 
     def live(self):
         """ Puts the account into live mode.
@@ -262,7 +826,7 @@ class Account(HTTPBackend):
         https://app.zencoder.com/docs/api/accounts/integration
 
         """
-        return self.put(self.base_url + '/live')
+        return self.put(self.urls['live']())
 
 class Output(HTTPBackend):
     """ Contains all API methods relating to Outputs.
@@ -270,6 +834,8 @@ class Output(HTTPBackend):
     https://app.zencoder.com/docs/api/outputs
 
     """
+    URLS = {'details': '/{0}', 'progress': '/{0}/progress'}
+
     def __init__(self, *args, **kwargs):
         kwargs['resource_name'] = 'outputs'
         super(Output, self).__init__(*args, **kwargs)
@@ -280,7 +846,8 @@ class Output(HTTPBackend):
         https://app.zencoder.com/docs/api/outputs/progress
 
         """
-        return self.get(self.base_url + '/%s/progress' % str(output_id))
+        return self.get(self.urls['progress'](output_id),
+                        model=ProgressInfo)
 
     def details(self, output_id):
         """ Returns the details of the given ``output_id``.
@@ -288,7 +855,8 @@ class Output(HTTPBackend):
         https://app.zencoder.com/docs/api/outputs/show
 
         """
-        return self.get(self.base_url + '/%s' % str(output_id))
+        return self.get(self.urls['details'](output_id),
+                        model=OutputMediaFile)
 
 class Input(HTTPBackend):
     """ Contains all API methods relating to Inputs.
@@ -296,6 +864,8 @@ class Input(HTTPBackend):
     https://app.zencoder.com/docs/api/inputs
 
     """
+    URLS = {'details': '/{0}', 'progress': '/{0}/progress'}
+
     def __init__(self, *args, **kwargs):
         kwargs['resource_name'] = 'inputs'
         super(Input, self).__init__(*args, **kwargs)
@@ -306,15 +876,17 @@ class Input(HTTPBackend):
         https://app.zencoder.com/docs/api/inputs/progress
 
         """
-        return self.get(self.base_url + '/%s/progress' % str(input_id))
+        return self.get(self.urls['progress'](input_id),
+                        model=ProgressInfo)
 
     def details(self, input_id):
-        """ Returns the detials of the given ``input_id``.
+        """ Returns the details of the given ``input_id``.
 
         https://app.zencoder.com/docs/api/inputs/show
 
         """
-        return self.get(self.base_url + '/%s' % str(input))
+        return self.get(self.urls['details'](input_id),
+                        model=InputMediaFile)
 
 class Job(HTTPBackend):
     """ Contains all API methods relating to transcoding Jobs.
@@ -322,9 +894,15 @@ class Job(HTTPBackend):
     https://app.zencoder.com/docs/api/jobs
 
     """
+    URLS = {'details': '/{0}', 'progress': '/{0}/progress',
+            'resubmit': '/{0}/resubmit', 'cancel': '/{0}/cancel',
+            'finish': '/{0}/finish'}
+
     def __init__(self, *args, **kwargs):
         kwargs['resource_name'] = 'jobs'
         super(Job, self).__init__(*args, **kwargs)
+        # ``JobWaiter`` shared by ``wait`` and ``wait_many``, set by ``Zencoder``
+        self.waiter = None
 
     def create(self, input=None, live_stream=False, outputs=None, options=None):
         """ Creates a transcoding job. Here are some examples::
@@ -347,17 +925,117 @@ class Job(HTTPBackend):
         if live_stream:
             data['live_stream'] = live_stream
 
-        return self.post(self.base_url, body=json.dumps(data))
+        return self.post(self.base_url, body=self.codec.dumps(data))
+
+    def create_many(self, specs, concurrency=8):
+        """ Creates a job for every spec in ``specs``, with at most
+        ``concurrency`` requests in flight. A spec is an input URL or a
+        dictionary of ``create`` arguments::
 
-    def list(self, page=1, per_page=50):
+            batch = job.create_many(['s3://bucket/a.mov',
+                                     {'input': 's3://bucket/b.mov',
+                                      'outputs': ({'label': 'web'},)}],
+                                    concurrency=16)
+            for result in batch:
+                print(result.index, result.ok, result.elapsed)
+            print(batch.stats.as_dict())
+
+        Returns a ``zencoder.batch.Batch``, which yields a ``BatchResult``
+        for each job as its request completes.
+        """
+        return Batch(self, specs, concurrency=concurrency)
+
+    def list(self, page=1, per_page=50, stream=False):
         """ Lists Jobs.
 
+        With ``stream=True``, returns a ``StreamingResponse`` yielding the
+        jobs while they are decoded::
+
+            for item in job.list(per_page=1000, stream=True):
+                print(item['job']['id'])
+
         https://app.zencoder.com/docs/api/jobs/list
 
         """
         data = {"page": page,
                 "per_page": per_page}
-        return self.get(self.base_url, data=data)
+        if stream:
+            return self.get_stream(self.base_url, data=data)
+        return self.get(self.base_url, data=data, model=JobInfo)
+
+    def iter_all(self, per_page=50, prefetch=1, start_page=1):
+        """ Iterates over every job of the account, newest first, yielding
+        the job dictionaries one at a time::
+
+            for job in job.iter_all(per_page=100, prefetch=2):
+                print(job['id'], job['state'])
+
+        The next ``prefetch`` pages are fetched in the background while the
+        current one is consumed; at most ``prefetch + 1`` pages are held in
+        memory. Iteration stops at the first empty page; a short page does
+        not end it, as the API may cap ``per_page``.
+
+        Raises ``ZencoderResponseError`` if a page cannot be fetched.
+        """
+        executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+        pages = collections.deque()
+        next_page = start_page
+
+        try:
+            while True:
+                while len(pages) <= prefetch:
+                    pages.append(executor.submit(self.list, next_page, per_page))
+                    next_page += 1
+
+                response = pages.popleft().result()
+                if response.code != 200:
+                    raise ZencoderResponseError(response.raw_response,
+                                                response.raw_body)
+
+                jobs = response.body or []
+                del response
+
+                if not jobs:
+                    return
+
+                for item in jobs:
+                    yield item.get('job', item)
+        finally:
+            for future in pages:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def wait(self, job_id, timeout=None):
+        """ Returns a ``concurrent.futures.Future`` resolved with the final
+        ``zencoder.progress.ProgressEvent`` of ``job_id`` once the job is
+        finished, failed or cancelled::
+
+            event = job.wait(1234, timeout=3600).result()
+            print(event.state)
+
+        The future fails with ``concurrent.futures.TimeoutError`` after
+        ``timeout`` seconds. All waits of a client share one background
+        poller, see ``zencoder.progress.JobWaiter``.
+        """
+        return self._get_waiter().wait(job_id, timeout)
+
+    def wait_many(self, job_ids, timeout=None, return_when=ALL_COMPLETED):
+        """ Waits for many jobs like ``concurrent.futures.wait``, and returns
+        a ``(done, not_done)`` tuple of sets of futures (see ``wait``)::
+
+            done, not_done = job.wait_many([1, 2, 3],
+                                           return_when=FIRST_COMPLETED)
+            for future in done:
+                print(future.job_id, future.result().state)
+
+        ``return_when`` is ``ALL_COMPLETED`` or ``FIRST_COMPLETED``.
+        """
+        return self._get_waiter().wait_many(job_ids, timeout, return_when)
+
+    def _get_waiter(self):
+        if self.waiter is None:
+            raise ZencoderError('waiting for jobs requires a Zencoder client')
+        return self.waiter
 
     def details(self, job_id):
         """ Returns details of the given ``job_id``.
@@ -365,7 +1043,7 @@ class Job(HTTPBackend):
         https://app.zencoder.com/docs/api/jobs/show
 
         """
-        return self.get(self.base_url + '/%s' % str(job_id))
+        return self.get(self.urls['details'](job_id), model=JobInfo)
 
     def progress(self, job_id):
         """ Returns the progress of the given ``job_id``.
@@ -373,7 +1051,8 @@ class Job(HTTPBackend):
         https://app.zencoder.com/docs/api/jobs/progress
 
         """
-        return self.get(self.base_url + '/%s/progress' % str(job_id))
+        return self.get(self.urls['progress'](job_id),
+                        model=ProgressInfo)
 
     def resubmit(self, job_id):
         """ Resubmits the given ``job_id``.
@@ -381,8 +1060,8 @@ class Job(HTTPBackend):
         https://app.zencoder.com/docs/api/jobs/resubmit
 
         """
-        url = self.base_url + '/%s/resubmit' % str(job_id)
-        return self.put(url)
+        return self._mutate(self.put, self.urls['resubmit'](job_id),
+                            self.urls['details'](job_id))
 
     def cancel(self, job_id):
         """ Cancels the given ``job_id``.
@@ -395,8 +1074,8 @@ class Job(HTTPBackend):
         else:
             verb = self.put
 
-        url = self.base_url + '/%s/cancel' % str(job_id)
-        return verb(url)
+        return self._mutate(verb, self.urls['cancel'](job_id),
+                            self.urls['details'](job_id))
 
     def delete(self, job_id):
         """ Deletes the given ``job_id``.
@@ -412,14 +1091,29 @@ class Job(HTTPBackend):
         https://app.zencoder.com/docs/api/jobs/finish
 
         """
-        return self.put(self.base_url + '/%s/finish' % str(job_id))
+        return self._mutate(self.put, self.urls['finish'](job_id),
+                            self.urls['details'](job_id))
+
+# arrays of report rows, streamed with ``stream=True``
+REPORT_ROWS = (('statistics',),)
+REPORT_ALL_ROWS = (('statistics', 'vod'), ('statistics', 'live'))
 
 class Report(HTTPBackend):
+    URLS = {'minutes': '/minutes', 'vod': '/vod', 'live': '/live',
+            'all': '/all'}
+
     def __init__(self, *args, **kwargs):
         """ Contains all API methods relating to Reports.
 
             https://app.zencoder.com/docs/api/reports
 
+            With ``stream=True``, the report methods return a
+            ``StreamingResponse`` yielding the statistics rows while they
+            are decoded; ``all`` rows come from the ``('statistics', 'vod')``
+            and ``('statistics', 'live')`` arrays (see
+            ``StreamingResponse.items``). The ``total`` is in ``body`` once
+            all rows were read.
+
         """
         kwargs['resource_name'] = 'reports'
         super(Report, self).__init__(*args, **kwargs)
@@ -439,7 +1133,13 @@ class Report(HTTPBackend):
 
         return data
 
-    def minutes(self, start_date=None, end_date=None, grouping=None):
+    def __get(self, url, data, stream, paths):
+        if stream:
+            return self.get_stream(url, data=data, paths=paths)
+        return self.get(url, data=data)
+
+    def minutes(self, start_date=None, end_date=None, grouping=None,
+                stream=False):
         """ Gets a detailed Report of encoded minutes and billable minutes for a
         date range.
 
@@ -456,12 +1156,12 @@ class Report(HTTPBackend):
 
         """
 
-        data = self.__format(start_date, end_date)
+        data = self.__format(start_date, end_date, grouping)
 
-        url = self.base_url + '/minutes'
-        return self.get(url, data=data)
+        return self.__get(self.urls['minutes'](), data, stream, REPORT_ROWS)
 
-    def vod(self, start_date=None, end_date=None, grouping=None):
+    def vod(self, start_date=None, end_date=None, grouping=None,
+            stream=False):
         """ Returns a report of VOD usage.
 
          https://app.zencoder.com/docs/api/reports/vod
@@ -469,10 +1169,10 @@ class Report(HTTPBackend):
         """
         data = self.__format(start_date, end_date, grouping)
 
-        url = self.base_url + '/vod'
-        return self.get(url, data=data)
+        return self.__get(self.urls['vod'](), data, stream, REPORT_ROWS)
 
-    def live(self, start_date=None, end_date=None, grouping=None):
+    def live(self, start_date=None, end_date=None, grouping=None,
+            stream=False):
         """ Returns a report of Live usage.
 
         https://app.zencoder.com/docs/api/reports/vod
@@ -480,10 +1180,10 @@ class Report(HTTPBackend):
         """
         data = self.__format(start_date, end_date, grouping)
 
-        url = self.base_url + '/live'
-        return self.get(url, data=data)
+        return self.__get(self.urls['live'](), data, stream, REPORT_ROWS)
 
-    def all(self, start_date=None, end_date=None, grouping=None):
+    def all(self, start_date=None, end_date=None, grouping=None,
+            stream=False):
         """ Returns a report of both VOD and Live usage.
 
         https://app.zencoder.com/docs/api/reports/all
@@ -491,6 +1191,26 @@ class Report(HTTPBackend):
         """
         data = self.__format(start_date, end_date, grouping)
 
-        url = self.base_url + '/all'
-        return self.get(url, data=data)
+        return self.__get(self.urls['all'](), data, stream, REPORT_ALL_ROWS)
+
+    def columns(self, report='all', start_date=None, end_date=None,
+                grouping=None, account=None):
+        """ Returns the rows of a ``report`` (``'minutes'``, ``'vod'``,
+        ``'live'`` or ``'all'``) as ``zencoder.export.ReportColumns``,
+        appended while the response is streamed. ``account`` fills the
+        account column, to concatenate the reports of several accounts::
+
+            columns = z.report.columns('vod', start, end, account='main')
+            columns.extend(other.report.columns('vod', start, end,
+                                                account='other'))
+
+        Raises ``ZencoderResponseError`` if the report cannot be fetched.
+        """
+        columns = ReportColumns(report)
+        response = getattr(self, report)(start_date, end_date, grouping,
+                                         stream=True)
+        columns.add_stream(response, account)
+        if response.code != 200:
+            raise ZencoderResponseError(response.raw_response, response.body)
+        return columns
 
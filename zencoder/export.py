@@ -0,0 +1,213 @@
+""" Exporting reports to columnar formats.
+
+Report rows are appended straight into column arrays (``ReportColumns``),
+one list per field, with a fixed schema per report, so tables of many
+chunks or accounts can be concatenated or written one after the other::
+
+    columns = zen.report.columns('all', start, end, account='main')
+    columns.to_arrow()                 # a pyarrow.Table, with pyarrow
+
+    with open_writer('usage.parquet') as writer:
+        for name, client in clients.items():
+            writer.write(client.report.columns('all', start, end, account=name))
+
+``open_writer`` picks the format from the file extension: ``.csv``, or
+``.parquet`` and ``.arrow`` when ``pyarrow`` is installed.
+"""
+
+import csv
+import os
+import sys
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# statistics arrays of each report, by kind of rows
+REPORT_STATISTICS = {
+    'minutes': {'minutes': ('statistics',)},
+    'vod': {'vod': ('statistics',)},
+    'live': {'live': ('statistics',)},
+    'all': {'vod': ('statistics', 'vod'), 'live': ('statistics', 'live')},
+}
+
+VOD_METRICS = ('encoded_minutes', 'billable_minutes')
+LIVE_METRICS = ('encoded_hours', 'stream_hours', 'total_hours',
+                'billable_encoded_hours', 'billable_stream_hours',
+                'total_billable_hours')
+
+REPORT_METRICS = {
+    'minutes': VOD_METRICS,
+    'vod': VOD_METRICS,
+    'live': LIVE_METRICS,
+    'all': VOD_METRICS + LIVE_METRICS,
+}
+
+KEY_COLUMNS = ('account', 'kind', 'collected_on', 'grouping')
+
+class ReportColumns(object):
+    """ The rows of ``report`` reports (``'minutes'``, ``'vod'``,
+    ``'live'`` or ``'all'``) as columns: ``names`` and one list per name in
+    ``arrays``.
+
+    The columns are the ``account`` given when adding rows, the ``kind`` of
+    row (``'vod'``, ``'live'`` or ``'minutes'``), ``collected_on``,
+    ``grouping`` and the report's metrics; other fields are ignored.
+    """
+    def __init__(self, report):
+        if report not in REPORT_STATISTICS:
+            raise ValueError('unknown report {0!r}'.format(report))
+        self.report = report
+        self.names = KEY_COLUMNS + REPORT_METRICS[report]
+        self.arrays = [[] for _ in self.names]
+        self._metrics = list(zip(REPORT_METRICS[report],
+                                 self.arrays[len(KEY_COLUMNS):]))
+
+    def append(self, kind, row, account=None):
+        """ Appends a statistics ``row`` of ``kind``. """
+        account_column, kind_column, collected_on, grouping = \
+            self.arrays[:len(KEY_COLUMNS)]
+        account_column.append(account)
+        kind_column.append(kind)
+        collected_on.append(row.get('collected_on'))
+        grouping.append(row.get('grouping'))
+        for name, array in self._metrics:
+            array.append(row.get(name))
+
+    def add_body(self, body, account=None):
+        """ Appends the rows of a decoded report ``body``. """
+        for kind, path in REPORT_STATISTICS[self.report].items():
+            rows = body
+            for key in path:
+                rows = rows.get(key) if isinstance(rows, dict) else None
+            for row in rows if isinstance(rows, list) else []:
+                self.append(kind, row, account)
+
+    def add_stream(self, response, account=None):
+        """ Appends the rows of a report ``StreamingResponse`` as they are
+        decoded. """
+        kinds = dict((path, kind) for kind, path
+                     in REPORT_STATISTICS[self.report].items())
+        for path, row in response.items():
+            self.append(kinds[path], row, account)
+
+    def extend(self, other):
+        """ Appends the rows of ``other``, from the same report. """
+        if other.names != self.names:
+            raise ValueError('cannot concatenate {0} and {1} reports'.format(
+                self.report, other.report))
+        for array, more in zip(self.arrays, other.arrays):
+            array.extend(more)
+
+    def columns(self):
+        """ Returns a dictionary of the columns. """
+        return dict(zip(self.names, self.arrays))
+
+    def rows(self):
+        """ Returns the rows as tuples, in ``names`` order. """
+        return zip(*self.arrays)
+
+    def __len__(self):
+        return len(self.arrays[0])
+
+    def schema(self):
+        """ Returns the ``pyarrow`` schema of the columns. """
+        fields = [pyarrow.field(name, pyarrow.string()) for name in KEY_COLUMNS]
+        fields += [pyarrow.field(name, pyarrow.float64())
+                   for name in REPORT_METRICS[self.report]]
+        return pyarrow.schema(fields)
+
+    def to_arrow(self):
+        """ Returns a ``pyarrow.Table`` of the columns. Requires pyarrow. """
+        require_pyarrow()
+        schema = self.schema()
+        arrays = [pyarrow.array(array, type=field.type)
+                  for array, field in zip(self.arrays, schema)]
+        return pyarrow.Table.from_arrays(arrays, schema=schema)
+
+def require_pyarrow():
+    if pyarrow is None:
+        raise ImportError('pyarrow is required for Arrow and Parquet exports')
+
+class CSVWriter(object):
+    """ Writes ``ReportColumns`` to a CSV ``file`` (a path or a text file
+    object), the header first. """
+    def __init__(self, file):
+        self.owned = not hasattr(file, 'write')
+        if self.owned:
+            if sys.version_info[0] >= 3:
+                file = open(file, 'w', newline='')
+            else:
+                file = open(file, 'wb')
+        self.file = file
+        self.writer = csv.writer(file)
+        self.names = None
+
+    def write(self, columns):
+        if self.names is None:
+            self.names = columns.names
+            self.writer.writerow(self.names)
+        elif columns.names != self.names:
+            raise ValueError('cannot mix {0} reports'.format(columns.report))
+        self.writer.writerows(columns.rows())
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ArrowWriter(object):
+    """ Writes ``ReportColumns`` to an Arrow IPC file, or a Parquet file with
+    ``parquet=True``, one record batch or row group per ``write``. The
+    schema is set by the first write. Requires pyarrow. """
+    def __init__(self, path, parquet=False):
+        require_pyarrow()
+        self.path = path
+        self.parquet = parquet
+        self.writer = None
+        self.report = None
+
+    def write(self, columns):
+        table = columns.to_arrow()
+        if self.writer is None:
+            self.report = columns.report
+            if self.parquet:
+                self.writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            else:
+                self.writer = pyarrow.ipc.new_file(self.path, table.schema)
+        elif columns.report != self.report:
+            raise ValueError('cannot mix {0} reports'.format(columns.report))
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_writer(path):
+    """ Returns a writer for ``path``: ``CSVWriter`` for ``.csv`` files,
+    ``ArrowWriter`` for ``.parquet`` and ``.arrow`` (or ``.feather``)
+    files. """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        return CSVWriter(path)
+    if extension == '.parquet':
+        return ArrowWriter(path, parquet=True)
+    if extension in ('.arrow', '.feather'):
+        return ArrowWriter(path)
+    raise ValueError('unsupported export format {0!r}'.format(extension))
@@ -0,0 +1,63 @@
+""" Hooks around the requests of a client.
+
+Pass a list of ``Hook`` objects as ``hooks`` to ``Zencoder`` to be called
+for every HTTP request (each retry included) and every decoded response::
+
+    class Logger(Hook):
+        def after_response(self, method, url, kwargs, response, elapsed):
+            log.info('%s %s %s %.3fs', method.upper(), url,
+                     response.status_code, elapsed)
+
+    zen = Zencoder('API_KEY', hooks=[Logger()])
+
+Hooks run in order before a request, and in reverse order afterwards, like
+middleware. ``before_request`` may change the request's ``kwargs``
+(``headers``, ``params``, ``data``, ...). Without hooks, requests do not go
+through this module at all.
+"""
+
+try:
+    from time import perf_counter as timer
+except ImportError:
+    from time import time as timer
+
+class Hook(object):
+    """ Base class of hooks, doing nothing. Override the methods needed. """
+
+    def before_request(self, method, url, kwargs):
+        """ Called before sending a request with the ``kwargs`` of the
+        session's ``method`` function. """
+
+    def after_response(self, method, url, kwargs, response, elapsed):
+        """ Called with the raw ``response`` of a request, received after
+        ``elapsed`` seconds. """
+
+    def on_error(self, method, url, kwargs, error, elapsed):
+        """ Called when sending a request raised ``error``. """
+
+    def after_process(self, method, url, response, result, elapsed):
+        """ Called once ``response`` was decoded into ``result`` (a
+        ``Response``) in ``elapsed`` seconds. Not called for cached and
+        streamed responses. """
+
+class HookChain(object):
+    """ Calls a list of ``hooks`` in turn. """
+    def __init__(self, hooks):
+        self.hooks = list(hooks)
+        self._reversed = self.hooks[::-1]
+
+    def before_request(self, method, url, kwargs):
+        for hook in self.hooks:
+            hook.before_request(method, url, kwargs)
+
+    def after_response(self, method, url, kwargs, response, elapsed):
+        for hook in self._reversed:
+            hook.after_response(method, url, kwargs, response, elapsed)
+
+    def on_error(self, method, url, kwargs, error, elapsed):
+        for hook in self._reversed:
+            hook.on_error(method, url, kwargs, error, elapsed)
+
+    def after_process(self, method, url, response, result, elapsed):
+        for hook in self._reversed:
+            hook.after_process(method, url, response, result, elapsed)
@@ -0,0 +1,287 @@
+""" Client-side metrics of the requests to the API.
+
+A ``MetricsCollector`` is a hook (see ``zencoder.hooks``) recording, per
+endpoint, the latency of requests, the bytes sent and received, the time
+spent decoding JSON, and the status codes and errors::
+
+    zen = Zencoder('API_KEY', metrics=True)
+    zen.job.list()
+
+    zen.metrics.snapshot()['GET /api/v2/jobs']['latency']['p99']
+    prometheus_text(zen.metrics)    # Prometheus text exposition format
+
+Endpoints are named by method and path, with ids replaced by ``:id``.
+``OpenTelemetryHook`` records the same metrics with OpenTelemetry
+instruments instead, if ``opentelemetry-api`` is installed.
+"""
+
+import bisect
+import re
+import threading
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+from .hooks import Hook
+
+# upper bounds of the histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+                   10.0)
+DECODE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                  0.05, 0.1)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+ID = re.compile(r'/\d+(?=/|$)')
+
+def endpoint(method, url):
+    """ Returns the name of the endpoint of a request, e.g.
+    ``GET /api/v2/jobs/:id/progress``. """
+    return '{0} {1}'.format(method.upper(), ID.sub('/:id', urlsplit(url).path))
+
+def request_size(kwargs):
+    """ Returns the size of the body of a request, in bytes. """
+    data = kwargs.get('data')
+    if not data:
+        return 0
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return len(data)
+
+def response_size(kwargs, response):
+    """ Returns the size of the body of ``response``, in bytes. The body of
+    streamed responses is not read; their ``Content-Length`` is used. """
+    if kwargs.get('stream'):
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            return int(headers.get('Content-Length') or 0)
+        except ValueError:
+            return 0
+    return len(getattr(response, 'content', None) or b'')
+
+class Histogram(object):
+    """ Counts observations into buckets with upper bounds ``buckets``
+    (plus an unbounded last bucket). """
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """ Returns an estimate of the ``q`` quantile: the upper bound of
+        the bucket it falls in (``None`` without observations, infinity
+        past the last bound). """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def cumulative(self):
+        """ Returns ``(upper bound, count)`` pairs of cumulative counts, the
+        last bound being infinity. """
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def as_dict(self):
+        mean = self.sum / self.count if self.count else None
+        return {'count': self.count, 'sum': self.sum, 'mean': mean,
+                'p50': self.quantile(0.5), 'p90': self.quantile(0.9),
+                'p99': self.quantile(0.99)}
+
+class EndpointMetrics(object):
+    """ The metrics of one endpoint. """
+    __slots__ = ('latency', 'decode_time', 'bytes_in', 'bytes_out',
+                 'status', 'errors')
+
+    def __init__(self, latency_buckets, decode_buckets):
+        self.latency = Histogram(latency_buckets)
+        self.decode_time = Histogram(decode_buckets)
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.status = {}
+        self.errors = {}
+
+    def as_dict(self):
+        return {'requests': self.latency.count,
+                'latency': self.latency.as_dict(),
+                'decode_time': self.decode_time.as_dict(),
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'status': dict(self.status),
+                'errors': dict(self.errors)}
+
+class MetricsCollector(Hook):
+    """ Records the metrics of every request by endpoint, see ``snapshot``.
+    Thread-safe; one collector can be shared by several clients. """
+    def __init__(self, latency_buckets=LATENCY_BUCKETS,
+                 decode_buckets=DECODE_BUCKETS):
+        self.latency_buckets = latency_buckets
+        self.decode_buckets = decode_buckets
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def after_response(self, method, url, kwargs, response, elapsed):
+        bytes_in = response_size(kwargs, response)
+        bytes_out = request_size(kwargs)
+        with self._lock:
+            metrics = self._metrics(method, url)
+            metrics.latency.observe(elapsed)
+            metrics.bytes_in += bytes_in
+            metrics.bytes_out += bytes_out
+            code = response.status_code
+            metrics.status[code] = metrics.status.get(code, 0) + 1
+
+    def on_error(self, method, url, kwargs, error, elapsed):
+        name = type(error).__name__
+        bytes_out = request_size(kwargs)
+        with self._lock:
+            metrics = self._metrics(method, url)
+            metrics.bytes_out += bytes_out
+            metrics.errors[name] = metrics.errors.get(name, 0) + 1
+
+    def after_process(self, method, url, response, result, elapsed):
+        with self._lock:
+            self._metrics(method, url).decode_time.observe(elapsed)
+
+    def snapshot(self):
+        """ Returns the metrics of every endpoint: the number of
+        ``requests`` answered, their ``latency`` and ``decode_time``
+        (``count``, ``sum``, ``mean`` and estimated ``p50``, ``p90`` and
+        ``p99``, in seconds), ``bytes_in`` and ``bytes_out``, the number of
+        responses by ``status`` code, and ``errors`` by exception name. """
+        with self._lock:
+            return dict((name, metrics.as_dict())
+                        for name, metrics in self.endpoints.items())
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def _metrics(self, method, url):
+        name = endpoint(method, url)
+        metrics = self.endpoints.get(name)
+        if metrics is None:
+            metrics = self.endpoints[name] = EndpointMetrics(
+                self.latency_buckets, self.decode_buckets)
+        return metrics
+
+def prometheus_text(collector, prefix='zencoder'):
+    """ Returns the metrics of ``collector`` in the Prometheus text
+    exposition format (see ``PROMETHEUS_CONTENT_TYPE``). """
+    with collector._lock:
+        endpoints = sorted(collector.endpoints.items())
+        lines = []
+
+        def histogram(name, help, attribute):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix, name, help))
+            lines.append('# TYPE {0}_{1} histogram'.format(prefix, name))
+            for label, metrics in endpoints:
+                hist = getattr(metrics, attribute)
+                labels = labels_of(label)
+                for bound, count in hist.cumulative():
+                    lines.append('{0}_{1}_bucket{{{2},le="{3}"}} {4}'.format(
+                        prefix, name, labels, format_bound(bound), count))
+                lines.append('{0}_{1}_sum{{{2}}} {3!r}'.format(
+                    prefix, name, labels, hist.sum))
+                lines.append('{0}_{1}_count{{{2}}} {3}'.format(
+                    prefix, name, labels, hist.count))
+
+        def counter(name, help, values):
+            lines.append('# HELP {0}_{1} {2}'.format(prefix, name, help))
+            lines.append('# TYPE {0}_{1} counter'.format(prefix, name))
+            for labels, value in values:
+                lines.append('{0}_{1}{{{2}}} {3}'.format(prefix, name, labels,
+                                                         value))
+
+        histogram('request_duration_seconds',
+                  'Latency of the API requests.', 'latency')
+        histogram('decode_duration_seconds',
+                  'Time spent decoding responses.', 'decode_time')
+        counter('responses_total', 'Responses by status code.',
+                [('{0},code="{1}"'.format(labels_of(label), code), count)
+                 for label, metrics in endpoints
+                 for code, count in sorted(metrics.status.items())])
+        counter('request_errors_total', 'Requests that raised, by exception.',
+                [('{0},error="{1}"'.format(labels_of(label), name), count)
+                 for label, metrics in endpoints
+                 for name, count in sorted(metrics.errors.items())])
+        counter('request_bytes_total', 'Bytes sent in request bodies.',
+                [(labels_of(label), metrics.bytes_out)
+                 for label, metrics in endpoints])
+        counter('response_bytes_total', 'Bytes received in response bodies.',
+                [(labels_of(label), metrics.bytes_in)
+                 for label, metrics in endpoints])
+
+    return '\n'.join(lines) + '\n'
+
+def labels_of(name):
+    method, path = name.split(' ', 1)
+    return 'method="{0}",endpoint="{1}"'.format(method, path.replace('"', '\\"'))
+
+def format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+class OpenTelemetryHook(Hook):
+    """ Records the metrics of ``MetricsCollector`` with OpenTelemetry
+    instruments of ``meter`` (by default the ``zencoder`` meter of the
+    global meter provider). Requires ``opentelemetry-api``. """
+    def __init__(self, meter=None):
+        if meter is None:
+            # imported here so that clients without it never load
+            # OpenTelemetry
+            from opentelemetry import metrics
+            meter = metrics.get_meter('zencoder')
+        self.latency = meter.create_histogram(
+            'zencoder.request.duration', unit='s',
+            description='Latency of the API requests.')
+        self.decode_time = meter.create_histogram(
+            'zencoder.decode.duration', unit='s',
+            description='Time spent decoding responses.')
+        self.errors = meter.create_counter(
+            'zencoder.request.errors',
+            description='Requests that raised, by exception.')
+        self.bytes_in = meter.create_counter(
+            'zencoder.response.size', unit='By',
+            description='Bytes received in response bodies.')
+        self.bytes_out = meter.create_counter(
+            'zencoder.request.size', unit='By',
+            description='Bytes sent in request bodies.')
+
+    def after_response(self, method, url, kwargs, response, elapsed):
+        attributes = self._attributes(method, url)
+        self.bytes_out.add(request_size(kwargs), attributes)
+        self.bytes_in.add(response_size(kwargs, response), attributes)
+        attributes = dict(attributes)
+        attributes['http.status_code'] = response.status_code
+        self.latency.record(elapsed, attributes)
+
+    def on_error(self, method, url, kwargs, error, elapsed):
+        attributes = self._attributes(method, url)
+        self.bytes_out.add(request_size(kwargs), attributes)
+        attributes = dict(attributes)
+        attributes['error.type'] = type(error).__name__
+        self.errors.add(1, attributes)
+
+    def after_process(self, method, url, response, result, elapsed):
+        self.decode_time.record(elapsed, self._attributes(method, url))
+
+    def _attributes(self, method, url):
+        return {'http.method': method.upper(),
+                'zencoder.endpoint': endpoint(method, url).split(' ', 1)[1]}
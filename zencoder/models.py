@@ -0,0 +1,244 @@
+""" Compact, typed models of API responses.
+
+Responses of ``Job.details``, ``Job.list``, ``Output.details``,
+``Input.details`` and the ``progress`` methods have a ``model`` attribute,
+built from the response body on first access::
+
+    job = zen.job.details(1234).model
+    for output in job.output_media_files:
+        print(output.id, output.state, output.url)
+
+    for job in zen.job.list().model:
+        print(job.id, job.created_at)
+
+Models use ``__slots__`` and only keep the documented fields, so they take
+about half the memory of the decoded dictionaries. Nested objects
+(``input_media_file``, ``output_media_files``, ...) are models too, built
+with their parent so that no raw dictionary is kept. Timestamps are parsed
+when first accessed. Unknown fields are not kept; use the response ``body``
+for those.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+try:
+    string_types = basestring
+except NameError:
+    string_types = str
+
+try:
+    from sys import intern
+except ImportError:
+    pass
+
+TIMESTAMP = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)'
+                       r'(?:\.(\d+))?'
+                       r'(Z|([+-])(\d\d)(?::?(\d\d))?)?$')
+
+def parse_timestamp(value):
+    """ Parses an API timestamp (``2013-05-04T21:36:39-07:00``, with
+    optional fractional seconds, and a ``Z``, ``+HH:MM``, ``+HHMM`` or
+    ``+HH`` offset) to a naive UTC ``datetime``. Other values are returned
+    unchanged. Raises ``ValueError`` for malformed timestamps. """
+    if not isinstance(value, string_types):
+        return value
+
+    match = TIMESTAMP.match(value)
+    if match is None:
+        raise ValueError('invalid timestamp: {0!r}'.format(value))
+    (year, month, day, hour, minute, second, fraction, offset, sign,
+     offset_hours, offset_minutes) = match.groups()
+
+    microsecond = int((fraction or '0')[:6].ljust(6, '0'))
+    parsed = datetime(int(year), int(month), int(day), int(hour), int(minute),
+                      int(second), microsecond)
+    if offset and offset != 'Z':
+        delta = timedelta(hours=int(offset_hours),
+                          minutes=int(offset_minutes or 0))
+        parsed = parsed + delta if sign == '-' else parsed - delta
+    return parsed
+
+class lazy(object):
+    """ A model attribute decoded by ``decode`` on first access. The raw
+    value is kept in the ``_<name>`` slot, and replaced with the decoded one.
+    ``decode`` returns already decoded values unchanged. """
+    def __init__(self, decode):
+        self.decode = decode
+        self.slot = None
+
+    def __get__(self, obj, cls):
+        if obj is None:
+            return self
+
+        value = getattr(obj, self.slot)
+        decoded = self.decode(value)
+        if decoded is not value:
+            setattr(obj, self.slot, decoded)
+        return decoded
+
+def model_of(cls):
+    """ Returns a ``lazy`` decoder of dictionaries into ``cls`` instances. """
+    def decode(value):
+        if isinstance(value, dict):
+            return cls(value)
+        return value
+    return decode
+
+def list_of(cls):
+    """ Returns a ``lazy`` decoder of lists of dictionaries into lists of
+    ``cls`` instances. """
+    def decode(value):
+        if value and isinstance(value[0], dict):
+            return [cls(item) for item in value]
+        return value
+    return decode
+
+class Model(object):
+    """ Base class of the models. ``fields`` are copied from the data
+    dictionary as is, and the strings of ``interned`` fields (states, codecs,
+    ...) shared between instances; ``nested`` fields are decoded right away
+    by their decoder, and ``lazy`` attributes on first access. """
+    __slots__ = ()
+
+    fields = ()
+    lazy_fields = ()
+    # (name, decoder) pairs
+    nested = ()
+    interned = ('state',)
+
+    def __init__(self, data):
+        for name in self.fields:
+            setattr(self, name, data.get(name))
+        for name in self.interned:
+            value = getattr(self, name)
+            if isinstance(value, str):
+                setattr(self, name, intern(value))
+        for name in self.lazy_fields:
+            setattr(self, '_' + name, data.get(name))
+        for name, decode in self.nested:
+            setattr(self, name, decode(data.get(name)))
+
+    @classmethod
+    def from_body(cls, body):
+        """ Returns a model, or a list of models, from a response body. """
+        if isinstance(body, list):
+            return [cls(item) for item in body]
+        return cls(body)
+
+    def as_dict(self):
+        """ Returns the fields as a dictionary (nested models included). """
+        data = {}
+        names = self.fields + self.lazy_fields + tuple(
+            name for name, _ in self.nested)
+        for name in names:
+            value = getattr(self, name)
+            if isinstance(value, Model):
+                value = value.as_dict()
+            elif isinstance(value, list):
+                value = [item.as_dict() if isinstance(item, Model) else item
+                         for item in value]
+            data[name] = value
+        return data
+
+    def __repr__(self):
+        return '<{0} {1} {2}>'.format(type(self).__name__,
+                                      getattr(self, 'id', None),
+                                      getattr(self, 'state', None))
+
+def slots(fields, lazy_fields=(), nested=()):
+    """ Returns the ``__slots__`` of a model with ``fields``,
+    ``lazy_fields`` and ``nested`` field names. """
+    return (tuple(fields) + tuple('_' + name for name in lazy_fields) +
+            tuple(nested))
+
+def bind(cls):
+    """ Class decorator pointing the ``lazy`` attributes of ``cls`` to their
+    slots. """
+    for name in cls.lazy_fields:
+        getattr(cls, name).slot = '_' + name
+    return cls
+
+MEDIA_FILE_FIELDS = (
+    'id', 'state', 'url', 'format', 'video_codec', 'audio_codec', 'width',
+    'height', 'frame_rate', 'duration_in_ms', 'file_size_bytes',
+    'total_bitrate_in_kbps', 'video_bitrate_in_kbps', 'audio_bitrate_in_kbps',
+    'audio_sample_rate', 'channels', 'md5_checksum', 'test', 'privacy',
+    'error_class', 'error_message')
+
+TIMESTAMP_FIELDS = ('created_at', 'updated_at', 'finished_at')
+
+@bind
+class MediaFile(Model):
+    """ Fields shared by input and output media files. """
+    fields = MEDIA_FILE_FIELDS
+    lazy_fields = TIMESTAMP_FIELDS
+    interned = ('state', 'format', 'video_codec', 'audio_codec', 'channels')
+    __slots__ = slots(fields, lazy_fields)
+
+    created_at = lazy(parse_timestamp)
+    updated_at = lazy(parse_timestamp)
+    finished_at = lazy(parse_timestamp)
+
+    def __init__(self, data):
+        super(MediaFile, self).__init__(data)
+        # ``Output.details`` and ``Input.details`` name it differently
+        if self.file_size_bytes is None:
+            self.file_size_bytes = data.get('file_size_in_bytes')
+
+@bind
+class OutputMediaFile(MediaFile):
+    """ An output, from ``Output.details`` or ``JobInfo.output_media_files``. """
+    fields = MediaFile.fields + ('label',)
+    __slots__ = ('label',)
+
+@bind
+class InputMediaFile(MediaFile):
+    """ An input, from ``Input.details`` or ``JobInfo.input_media_file``. """
+    fields = MediaFile.fields + ('job_id',)
+    __slots__ = ('job_id',)
+
+@bind
+class JobInfo(Model):
+    """ A job, from ``Job.details`` or ``Job.list``. """
+    fields = ('id', 'state', 'test', 'privacy', 'pass_through', 'stream',
+              'thumbnails')
+    lazy_fields = ('submitted_at',) + TIMESTAMP_FIELDS
+    nested = (('input_media_file', model_of(InputMediaFile)),
+              ('output_media_files', list_of(OutputMediaFile)))
+    __slots__ = slots(fields, lazy_fields, [name for name, _ in nested])
+
+    submitted_at = lazy(parse_timestamp)
+    created_at = lazy(parse_timestamp)
+    updated_at = lazy(parse_timestamp)
+    finished_at = lazy(parse_timestamp)
+
+    @classmethod
+    def from_body(cls, body):
+        # jobs are wrapped in a ``{"job": {...}}`` object
+        if isinstance(body, list):
+            return [cls(item.get('job', item)) for item in body]
+        return cls(body.get('job', body))
+
+def parse_progress(value):
+    """ Returns ``value`` as a float, or ``None``. """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class ProgressInfo(Model):
+    """ The progress of a job, output or input, from the ``progress``
+    methods. ``progress`` is a float. Job progress has the ``input`` and
+    ``outputs`` progress. """
+    fields = ('id', 'state', 'current_event')
+    lazy_fields = ('progress', 'current_event_progress')
+    __slots__ = slots(fields, lazy_fields, ('input', 'outputs'))
+
+    progress = lazy(parse_progress)
+    current_event_progress = lazy(parse_progress)
+
+# nested progress has the same shape
+ProgressInfo.nested = (('input', model_of(ProgressInfo)),
+                       ('outputs', list_of(ProgressInfo)))
+bind(ProgressInfo)
@@ -0,0 +1,175 @@
+""" Clients for many accounts sharing one connection pool.
+
+A ``ZencoderPool`` creates a ``Zencoder`` client per API key on first use.
+The clients share the connections of one ``HTTPAdapter``, and each has its
+own ``Quota``, so a tenant sending too many requests waits for its own turn
+instead of taking the connections of the others::
+
+    pool = ZencoderPool(max_concurrency=4, rate=10, max_clients=500)
+
+    def create_job(tenant, input_url):
+        return pool.get(tenant.api_key).job.create(input_url)
+
+    pool.stats()['requests']
+
+Clients unused for ``idle_timeout`` seconds, and the least recently used
+ones beyond ``max_clients``, are dropped; they are created again when
+needed.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from requests.adapters import HTTPAdapter
+
+from .core import Zencoder
+from .core import build_session
+from .core import pool_stats
+from .ratelimit import Quota
+
+class PooledClient(object):
+    """ A client of the pool with its ``quota`` and usage. """
+    __slots__ = ('client', 'quota', 'created', 'last_used')
+
+    def __init__(self, client, quota):
+        self.client = client
+        self.quota = quota
+        self.created = self.last_used = time.time()
+
+class ZencoderPool(object):
+    """ Creates and keeps ``Zencoder`` clients by API key.
+
+    Each client may have ``max_concurrency`` requests in flight, and send
+    ``rate`` requests per second with bursts of up to ``burst``; requests
+    over quota wait, for at most ``quota_timeout`` seconds if set, then
+    raise ``RateLimitExceeded``. ``quotas`` overrides these limits for some
+    API keys, e.g. ``{key: {'max_concurrency': 16}}``.
+
+    At most ``max_clients`` clients are kept, and clients unused for
+    ``idle_timeout`` seconds are dropped. ``pool_connections``,
+    ``pool_maxsize`` and ``pool_block`` size the shared connection pool
+    (see ``build_session``). Other keyword arguments are passed to every
+    ``Zencoder`` client.
+    """
+    def __init__(self, max_clients=100, idle_timeout=300, max_concurrency=None,
+                 rate=None, burst=None, quota_timeout=None, quotas=None,
+                 pool_connections=10, pool_maxsize=50, pool_block=True,
+                 **client_kwargs):
+        self.max_clients = max_clients
+        self.idle_timeout = idle_timeout
+        self.quota = {'max_concurrency': max_concurrency, 'rate': rate,
+                      'burst': burst, 'timeout': quota_timeout}
+        self.quotas = quotas or {}
+        self.client_kwargs = client_kwargs
+
+        self.adapter = HTTPAdapter(pool_connections=pool_connections,
+                                   pool_maxsize=pool_maxsize,
+                                   pool_block=pool_block)
+        self.session = build_session(adapter=self.adapter)
+
+        self.created = 0
+        self.evicted = 0
+        self._clients = OrderedDict()
+        # totals of the evicted clients
+        self._retired = {'requests': 0, 'rejected': 0, 'throttled': 0}
+        self._lock = threading.Lock()
+
+    def get(self, api_key):
+        """ Returns the client of ``api_key``, creating it if needed. """
+        now = time.time()
+        with self._lock:
+            pooled = self._clients.pop(api_key, None)
+            if pooled is None:
+                pooled = self._create(api_key)
+            pooled.last_used = now
+            self._clients[api_key] = pooled
+            self._evict(now)
+            return pooled.client
+
+    __getitem__ = get
+
+    def evict(self, api_key):
+        """ Drops the client of ``api_key``. Returns ``False`` if there was
+        none. """
+        with self._lock:
+            pooled = self._clients.pop(api_key, None)
+            if pooled is not None:
+                self._retire(pooled)
+            return pooled is not None
+
+    def __contains__(self, api_key):
+        return api_key in self._clients
+
+    def __len__(self):
+        return len(self._clients)
+
+    def stats(self, api_key=None):
+        """ Returns the requests sent, ``in_flight``, ``rejected`` over quota
+        and ``throttled`` (429) of all clients, with the number of
+        ``clients`` kept, ``created`` and ``evicted``, and the statistics of
+        the shared connection ``pools`` (see ``pool_stats``).
+
+        With ``api_key``, returns the quota statistics of its client, or
+        ``None``. """
+        with self._lock:
+            if api_key is not None:
+                pooled = self._clients.get(api_key)
+                return pooled.quota.stats() if pooled else None
+
+            stats = dict(self._retired, in_flight=0)
+            for pooled in self._clients.values():
+                for name, value in pooled.quota.stats().items():
+                    stats[name] += value
+            stats.update(clients=len(self._clients), created=self.created,
+                         evicted=self.evicted)
+
+        stats['pools'] = pool_stats(self.session)
+        return stats
+
+    def close(self):
+        """ Drops all clients and closes the shared connections. """
+        with self._lock:
+            while self._clients:
+                self._retire(self._clients.popitem(last=False)[1])
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _create(self, api_key):
+        options = dict(self.quota, **self.quotas.get(api_key, {}))
+        quota = Quota(**options)
+        client = Zencoder(api_key, adapter=self.adapter, rate_limiter=quota,
+                          **self.client_kwargs)
+        self.created += 1
+        return PooledClient(client, quota)
+
+    def _evict(self, now):
+        """ Drops idle clients, and the least recently used ones beyond
+        ``max_clients``. Clients with requests in flight are kept. """
+        excess = len(self._clients) - self.max_clients
+        for api_key, pooled in list(self._clients.items()):
+            idle = (self.idle_timeout is not None and
+                    now - pooled.last_used > self.idle_timeout)
+            if not (excess > 0 or idle):
+                # the rest were used more recently
+                break
+            if pooled.quota.stats()['in_flight']:
+                continue
+            del self._clients[api_key]
+            self._retire(pooled)
+            excess -= 1
+
+    def _retire(self, pooled):
+        stats = pooled.quota.stats()
+        for name in self._retired:
+            self._retired[name] += stats[name]
+        self.evicted += 1
+
+        # closing the client would close the shared adapter
+        if pooled.client.job.waiter is not None:
+            pooled.client.job.waiter.stop()
@@ -0,0 +1,446 @@
+""" Multiplexed, adaptive progress polling.
+
+A ``ProgressTracker`` polls the progress of many jobs, outputs and inputs
+from one scheduler thread and a small worker pool, instead of one loop per
+item::
+
+    tracker = ProgressTracker(zen)
+    for job_id in job_ids:
+        tracker.track_job(job_id)
+
+    for event in tracker.events():
+        print(event.kind, event.id, event.state, event.progress)
+
+Each item is polled at its own rate: slowly while it waits in a queue,
+faster as its progress approaches 100%. Items are dropped once they reach a
+terminal state.
+
+A ``JobWaiter`` builds on a tracker to hand out futures that resolve when
+jobs finish; it backs ``Job.wait`` and ``Job.wait_many``.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import (ThreadPoolExecutor, Future, TimeoutError,
+                                ALL_COMPLETED)
+from concurrent.futures import wait as wait_futures
+
+try:
+    from concurrent.futures import InvalidStateError
+except ImportError:
+    # before Python 3.8, resolving a cancelled future did not raise
+    class InvalidStateError(Exception):
+        pass
+
+try:
+    from queue import Queue, Empty
+except ImportError:
+    from Queue import Queue, Empty
+
+log = logging.getLogger(__name__)
+
+TERMINAL_STATES = ('finished', 'failed', 'cancelled', 'no input')
+WAITING_STATES = ('pending', 'waiting', 'queued', 'assigning')
+
+class ProgressEvent(object):
+    """ A change in the progress of a tracked item.
+
+    ``kind`` is ``'job'``, ``'output'`` or ``'input'``. ``state`` and
+    ``progress`` come from the progress response (``progress`` as a float,
+    or ``None``). ``response`` is the ``Response`` of the poll, and
+    ``error`` the exception raised by it, if any.
+    """
+    def __init__(self, kind, id, state=None, progress=None, response=None,
+                 error=None):
+        self.kind = kind
+        self.id = id
+        self.state = state
+        self.progress = progress
+        self.response = response
+        self.error = error
+
+    @property
+    def finished(self):
+        """ ``True`` if the item reached a terminal state. """
+        return self.state in TERMINAL_STATES
+
+    def __repr__(self):
+        return '<ProgressEvent {0} {1} {2} {3}>'.format(
+            self.kind, self.id, self.state, self.progress)
+
+class _Item(object):
+    def __init__(self, kind, id):
+        self.kind = kind
+        self.id = id
+        self.state = None
+        self.progress = None
+        self.failures = 0
+
+def _parse_progress(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def poll_interval(state, progress, min_interval, max_interval):
+    """ See ``ProgressTracker.next_interval``. """
+    if state in WAITING_STATES:
+        return max_interval
+
+    if progress is None:
+        return (min_interval + max_interval) / 2.0
+
+    remaining = min(max(100.0 - progress, 0.0), 100.0) / 100.0
+    return min_interval + (max_interval - min_interval) * remaining
+
+class ProgressTracker(object):
+    """ Polls the progress of many jobs, outputs and inputs of a ``Zencoder``
+    client from a shared scheduler.
+
+    Items are polled every ``min_interval`` to ``max_interval`` seconds,
+    see ``next_interval``. At most ``workers`` polls run at once.
+    ``callback``, if given, is called with every ``ProgressEvent``. Set
+    ``buffer_events=False`` if you only use callbacks and never ``events``.
+    """
+    def __init__(self, zencoder, min_interval=1.0, max_interval=30.0,
+                 workers=4, callback=None, buffer_events=True):
+        self.resources = {'job': zencoder.job,
+                          'output': zencoder.output,
+                          'input': zencoder.input}
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.workers = workers
+        self.callbacks = [callback] if callback else []
+        self.buffer_events = buffer_events
+
+        self._items = {}
+        self._schedule = []
+        self._counter = itertools.count()
+        self._events = Queue()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._executor = None
+        self._stopped = False
+
+    def add_callback(self, callback):
+        """ Calls ``callback`` with every ``ProgressEvent``. """
+        self.callbacks.append(callback)
+
+    def track(self, kind, id):
+        """ Starts tracking item ``id`` of ``kind`` (``'job'``, ``'output'``
+        or ``'input'``). Tracking an item twice has no effect. """
+        if kind not in self.resources:
+            raise ValueError('cannot track {0!r}'.format(kind))
+
+        with self._cond:
+            key = (kind, id)
+            if key in self._items:
+                return
+            item = self._items[key] = _Item(kind, id)
+            self._schedule_poll(item, 0)
+            self._start()
+
+    def track_job(self, job_id):
+        self.track('job', job_id)
+
+    def track_output(self, output_id):
+        self.track('output', output_id)
+
+    def track_input(self, input_id):
+        self.track('input', input_id)
+
+    def untrack(self, kind, id):
+        """ Stops tracking item ``id`` of ``kind``. """
+        with self._cond:
+            self._items.pop((kind, id), None)
+            self._cond.notify_all()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def next_interval(self, state, progress):
+        """ Returns the number of seconds to wait before polling an item in
+        ``state`` with ``progress`` (0-100) again.
+
+        Queued items are polled every ``max_interval`` seconds; processing
+        items at a rate proportional to their remaining progress, down to
+        ``min_interval`` near completion.
+        """
+        return poll_interval(state, progress, self.min_interval,
+                             self.max_interval)
+
+    def events(self, timeout=None):
+        """ Yields ``ProgressEvent`` objects as they happen, until no items
+        are tracked anymore, or no event arrived for ``timeout`` seconds. """
+        while True:
+            waited = 0.0
+            while True:
+                try:
+                    event = self._events.get(timeout=0.1)
+                    break
+                except Empty:
+                    if not self._items and self._events.empty():
+                        return
+                    waited += 0.1
+                    if timeout is not None and waited >= timeout:
+                        return
+            yield event
+
+    def stop(self):
+        """ Stops polling. """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def _start(self):
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _schedule_poll(self, item, delay):
+        heapq.heappush(self._schedule,
+                       (time.time() + delay, next(self._counter), item))
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.time()
+                    if self._schedule and self._schedule[0][0] <= now:
+                        break
+                    timeout = self._schedule[0][0] - now if self._schedule else None
+                    self._cond.wait(timeout)
+
+                if self._stopped:
+                    return
+
+                due, _, item = heapq.heappop(self._schedule)
+                tracked = self._items.get((item.kind, item.id)) is item
+
+            if tracked:
+                self._executor.submit(self._poll, item)
+
+    def _poll(self, item):
+        resource = self.resources[item.kind]
+        response = None
+        error = None
+        try:
+            response = resource.progress(item.id)
+        except Exception as e:
+            error = e
+
+        if error is not None or response.code == 429 or response.code >= 500:
+            # transient failure: back off exponentially
+            item.failures += 1
+            delay = min(self.min_interval * 2 ** item.failures, self.max_interval)
+            try:
+                self._emit(ProgressEvent(item.kind, item.id, item.state,
+                                         item.progress, response, error))
+            finally:
+                self._reschedule(item, delay)
+            return
+
+        item.failures = 0
+        if response.code >= 400:
+            # the item doesn't exist (anymore), stop tracking it
+            try:
+                self._emit(ProgressEvent(item.kind, item.id, item.state,
+                                         item.progress, response))
+            finally:
+                self.untrack(item.kind, item.id)
+            return
+
+        body = response.body or {}
+        self.update(item.kind, item.id, body.get('state'),
+                    _parse_progress(body.get('progress')), response)
+
+    def update(self, kind, id, state, progress=None, response=None):
+        """ Records the ``state`` and ``progress`` of a tracked item, emitting
+        an event if they changed, and schedules its next poll. Items in a
+        terminal state are no longer tracked. """
+        with self._cond:
+            item = self._items.get((kind, id))
+        if item is None:
+            return
+
+        if state in TERMINAL_STATES and progress is None:
+            progress = 100.0
+
+        changed = state != item.state or progress != item.progress
+        item.state = state
+        item.progress = progress
+
+        try:
+            if changed:
+                self._emit(ProgressEvent(kind, id, state, progress, response))
+        finally:
+            if state in TERMINAL_STATES:
+                self.untrack(kind, id)
+            elif response is not None:
+                self._reschedule(item, self.next_interval(state, progress))
+
+    def _reschedule(self, item, delay):
+        with self._cond:
+            if self._items.get((item.kind, item.id)) is item:
+                self._schedule_poll(item, delay)
+
+    def _emit(self, event):
+        if self.buffer_events:
+            self._events.put(event)
+        for callback in self.callbacks:
+            # a failing callback must not stop the polling of the item
+            try:
+                callback(event)
+            except Exception:
+                log.exception('progress callback %r failed on %r',
+                              callback, event)
+
+class JobWaiter(object):
+    """ Resolves futures when jobs reach a terminal state.
+
+    All waits share one ``ProgressTracker``, created with ``tracker_kwargs``,
+    so any number of waiters costs one scheduler thread and its worker pool.
+    Pushed states are picked up as soon as the waiter is bridged to a
+    ``zencoder.notifications.NotificationReceiver``::
+
+        receiver.bridge(zen.job.waiter)
+
+    A shared deadline thread is started for waits with a timeout.
+    """
+    def __init__(self, zencoder, **tracker_kwargs):
+        self.tracker = ProgressTracker(zencoder, buffer_events=False,
+                                       **tracker_kwargs)
+        self.tracker.add_callback(self._on_event)
+
+        self._waiters = {}
+        self._deadlines = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stopped = False
+
+    def wait(self, job_id, timeout=None):
+        """ Returns a ``concurrent.futures.Future`` resolved with the final
+        ``ProgressEvent`` of job ``job_id``: once it reaches a terminal
+        state, or with the failed response if the job can't be polled
+        (e.g. a 404). After ``timeout`` seconds the future fails with
+        ``concurrent.futures.TimeoutError``. Cancel the future to stop
+        waiting. """
+        future = Future()
+        future.job_id = job_id
+
+        with self._cond:
+            self._waiters.setdefault(job_id, []).append(future)
+            if timeout is not None:
+                heapq.heappush(self._deadlines, (time.time() + timeout,
+                                                 next(self._counter), future))
+                self._start()
+                self._cond.notify_all()
+
+        self.tracker.track_job(job_id)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def wait_many(self, job_ids, timeout=None, return_when=ALL_COMPLETED):
+        """ Waits for the jobs ``job_ids``, like
+        ``concurrent.futures.wait``: returns a ``(done, not_done)`` tuple of
+        sets of futures (see ``wait``) once the first job or all jobs
+        completed, depending on ``return_when``, or after ``timeout``
+        seconds. Each future has a ``job_id`` attribute.
+
+        Futures that are not done keep waiting; cancel them to stop.
+        """
+        futures = [self.wait(job_id) for job_id in job_ids]
+        return wait_futures(futures, timeout=timeout, return_when=return_when)
+
+    def update(self, kind, id, state, progress=None, response=None):
+        """ Forwards a pushed state to the tracker, see
+        ``ProgressTracker.update``. """
+        self.tracker.update(kind, id, state, progress, response)
+
+    def __len__(self):
+        return len(self._waiters)
+
+    def stop(self):
+        """ Stops polling and cancels the pending futures. """
+        with self._cond:
+            waiters, self._waiters = self._waiters, {}
+            self._deadlines = []
+            self._stopped = True
+            self._cond.notify_all()
+        self.tracker.stop()
+        for futures in waiters.values():
+            for future in futures:
+                future.cancel()
+
+    def _on_event(self, event):
+        if event.kind != 'job':
+            return
+        failed = (event.response is not None and event.error is None and
+                  400 <= event.response.code < 500 and event.response.code != 429)
+        if not (event.finished or failed):
+            return
+
+        with self._cond:
+            futures = self._waiters.pop(event.id, [])
+        for future in futures:
+            if not future.done():
+                try:
+                    future.set_result(event)
+                except InvalidStateError:
+                    # cancelled meanwhile
+                    pass
+
+    def _on_done(self, future):
+        if future.cancelled():
+            self._discard(future)
+
+    def _discard(self, future):
+        """ Forgets ``future``; stops tracking its job if nobody else waits
+        for it. """
+        with self._cond:
+            futures = self._waiters.get(future.job_id, [])
+            if future in futures:
+                futures.remove(future)
+            idle = not futures
+            if idle:
+                self._waiters.pop(future.job_id, None)
+        if idle:
+            self.tracker.untrack('job', future.job_id)
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped:
+                    now = time.time()
+                    if self._deadlines and self._deadlines[0][0] <= now:
+                        break
+                    timeout = self._deadlines[0][0] - now if self._deadlines else None
+                    self._cond.wait(timeout)
+
+                if self._stopped:
+                    return
+
+                due, _, future = heapq.heappop(self._deadlines)
+
+            if not future.done():
+                future.set_exception(TimeoutError(
+                    'job {0} did not finish in time'.format(future.job_id)))
+                self._discard(future)
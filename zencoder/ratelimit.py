@@ -0,0 +1,255 @@
+""" Client-side rate limiting.
+
+A ``RateLimiter`` is a set of thread-safe token buckets shared by every
+resource of a client: one for all requests, and optionally one per
+endpoint (``'jobs'``, ``'outputs'``, ``'inputs'``, ``'account'`` or
+``'reports'``)::
+
+    limiter = RateLimiter(rate=20, burst=40, endpoints={'reports': 1})
+    zen = Zencoder('API_KEY', rate_limiter=limiter)
+
+When a bucket is empty, requests wait for a token, or raise
+``RateLimitExceeded`` with ``block=False``. Every 429 response halves the
+rates, which then recover gradually as requests succeed.
+
+A ``Quota`` also caps the number of requests in flight; it is used by
+``zencoder.pool.ZencoderPool`` to isolate tenants from each other.
+"""
+
+import threading
+import time
+
+from .core import ZencoderError
+
+class RateLimitExceeded(ZencoderError):
+    """ Raised when a request would exceed the rate limit and the limiter
+    doesn't block. """
+    pass
+
+class TokenBucket(object):
+    """ A bucket of up to ``burst`` tokens, refilled at ``rate`` tokens per
+    second. Not thread-safe on its own. """
+    def __init__(self, rate, burst=None):
+        self.base_rate = float(rate)
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.tokens = self.burst
+        self.updated_at = time.time()
+
+    def refill(self, now):
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self):
+        """ Returns the seconds until a token is available. """
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class RateLimiter(object):
+    """ Limits requests to ``rate`` per second (with bursts of up to ``burst``
+    requests), and the requests of each endpoint named in ``endpoints`` to
+    its own rate. ``endpoints`` maps endpoint names to a rate, or to a
+    ``(rate, burst)`` tuple. Leave ``rate`` unset to only limit endpoints.
+
+    With ``block=True`` requests wait for a token (for at most ``timeout``
+    seconds, if set); otherwise ``RateLimitExceeded`` is raised right away.
+
+    With ``adaptive=True``, a 429 response multiplies the rates of the
+    buckets it went through by ``decrease``; every successful response then
+    adds back ``increase`` times their configured rate.
+    """
+    def __init__(self,
+                 rate=None,
+                 burst=None,
+                 endpoints=None,
+                 block=True,
+                 timeout=None,
+                 adaptive=True,
+                 decrease=0.5,
+                 increase=0.05,
+                 min_rate=0.1):
+        self.bucket = TokenBucket(rate, burst) if rate else None
+        self.endpoints = {}
+        for endpoint, limit in (endpoints or {}).items():
+            if not isinstance(limit, tuple):
+                limit = (limit,)
+            self.endpoints[endpoint] = TokenBucket(*limit)
+
+        self.block = block
+        self.timeout = timeout
+        self.adaptive = adaptive
+        self.decrease = decrease
+        self.increase = increase
+        self.min_rate = min_rate
+
+        self.requests = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.wait_time = 0.0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _buckets(self, endpoint):
+        buckets = []
+        if self.bucket is not None:
+            buckets.append(self.bucket)
+        if endpoint in self.endpoints:
+            buckets.append(self.endpoints[endpoint])
+        return buckets
+
+    def reserve(self, endpoint=None):
+        """ Reserves a token for a request to ``endpoint`` and returns the
+        number of seconds to wait before sending it.
+
+        Raises ``RateLimitExceeded`` if the request would have to wait and
+        the limiter doesn't block, or longer than ``timeout``.
+        """
+        now = time.time()
+        with self._lock:
+            buckets = self._buckets(endpoint)
+            for bucket in buckets:
+                bucket.refill(now)
+
+            delay = max([bucket.delay() for bucket in buckets] or [0.0])
+            if delay and (not self.block or
+                          (self.timeout is not None and delay > self.timeout)):
+                self.rejected += 1
+                raise RateLimitExceeded(
+                    'Rate limit exceeded for {0}, retry in {1:.2f}s'.format(
+                        endpoint or 'requests', delay))
+
+            # tokens may go negative: later requests queue up behind this one
+            for bucket in buckets:
+                bucket.tokens -= 1
+
+            self.requests += 1
+            if delay:
+                self.delayed += 1
+                self.wait_time += delay
+
+        return delay
+
+    def acquire(self, endpoint=None):
+        """ Waits until a request to ``endpoint`` may be sent. """
+        delay = self.reserve(endpoint)
+        if delay:
+            time.sleep(delay)
+
+    def release(self, endpoint=None, response=None):
+        """ Adjusts the rates after a request to ``endpoint`` completed with
+        ``response`` (``None`` if it raised). """
+        if not self.adaptive or response is None:
+            return
+
+        with self._lock:
+            buckets = self._buckets(endpoint)
+            if response.status_code == 429:
+                self.throttled += 1
+                for bucket in buckets:
+                    bucket.rate = max(bucket.rate * self.decrease, self.min_rate)
+            elif response.status_code < 400:
+                for bucket in buckets:
+                    if bucket.rate < bucket.base_rate:
+                        bucket.rate = min(bucket.base_rate,
+                                          bucket.rate + bucket.base_rate * self.increase)
+
+    def rates(self):
+        """ Returns the current rate of the global bucket (``None`` key) and of
+        every endpoint bucket. """
+        with self._lock:
+            rates = dict((endpoint, bucket.rate)
+                         for endpoint, bucket in self.endpoints.items())
+            if self.bucket is not None:
+                rates[None] = self.bucket.rate
+            return rates
+
+    def stats(self):
+        """ Returns counters: ``requests`` let through, how many were
+        ``delayed`` and for how long in total (``wait_time``), how many were
+        ``rejected``, and the number of 429 responses (``throttled``). """
+        with self._lock:
+            return {'requests': self.requests,
+                    'delayed': self.delayed,
+                    'rejected': self.rejected,
+                    'wait_time': self.wait_time,
+                    'throttled': self.throttled}
+
+class Quota(object):
+    """ Limits the requests of a client to ``max_concurrency`` in flight at
+    once, and to ``rate`` per second (with bursts of up to ``burst``), see
+    ``RateLimiter``. Either limit can be left unset. Pass it as a client's
+    ``rate_limiter``.
+
+    Requests wait for their turn, for at most ``timeout`` seconds if set,
+    then raise ``RateLimitExceeded``. Blocks the calling thread, so it is
+    meant for the synchronous client; ``AsyncZencoder`` rejects it.
+    """
+    def __init__(self, max_concurrency=None, rate=None, burst=None,
+                 timeout=None, endpoints=None):
+        self.max_concurrency = max_concurrency
+        self.semaphore = None
+        if max_concurrency:
+            self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.limiter = None
+        if rate or endpoints:
+            self.limiter = RateLimiter(rate, burst, endpoints=endpoints,
+                                       timeout=timeout)
+        self.timeout = timeout
+
+        self.in_flight = 0
+        self.requests = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint=None):
+        """ Waits until a request to ``endpoint`` may be sent. """
+        if self.semaphore is not None:
+            if self.timeout is None:
+                acquired = self.semaphore.acquire()
+            else:
+                acquired = self.semaphore.acquire(True, self.timeout)
+            if not acquired:
+                with self._lock:
+                    self.rejected += 1
+                raise RateLimitExceeded(
+                    'More than {0} concurrent requests'.format(
+                        self.max_concurrency))
+
+        try:
+            if self.limiter is not None:
+                self.limiter.acquire(endpoint)
+        except RateLimitExceeded:
+            if self.semaphore is not None:
+                self.semaphore.release()
+            with self._lock:
+                self.rejected += 1
+            raise
+
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+
+    def release(self, endpoint=None, response=None):
+        """ Marks a request to ``endpoint`` as completed with ``response``
+        (``None`` if it raised). """
+        with self._lock:
+            self.in_flight -= 1
+        if self.semaphore is not None:
+            self.semaphore.release()
+        if self.limiter is not None:
+            self.limiter.release(endpoint, response)
+
+    def stats(self):
+        """ Returns the requests ``in_flight``, the ``requests`` let through,
+        how many were ``rejected``, and the number of 429 responses
+        (``throttled``). """
+        with self._lock:
+            stats = {'in_flight': self.in_flight,
+                     'requests': self.requests,
+                     'rejected': self.rejected,
+                     'throttled': 0}
+        if self.limiter is not None:
+            stats['throttled'] = self.limiter.stats()['throttled']
+        return stats
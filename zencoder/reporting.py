@@ -0,0 +1,254 @@
+""" Aggregated reports over long date ranges.
+
+The report endpoints take one date range, and large ranges are slow. A
+``ReportAggregator`` splits a range into chunks (calendar months by
+default), fetches them concurrently, and merges them into totals and
+per-day series::
+
+    aggregator = ReportAggregator(zen.report, cache_dir='~/.zencoder-reports')
+    result = aggregator.fetch('all', date(2013, 1, 1), date.today())
+
+    result.totals['vod']['billable_minutes']
+    for day, minutes in zip(result.days, result.series['vod']['encoded_minutes']):
+        print(day, minutes)
+
+Series are NumPy arrays when NumPy is installed, lists otherwise. Chunks
+that ended before today never change; with a ``cache_dir`` they are kept on
+disk, so a year-to-date report only fetches the current month again.
+"""
+
+import calendar
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .core import ZencoderResponseError
+from .export import REPORT_STATISTICS
+from .export import ReportColumns
+
+def month_chunks(start_date, end_date):
+    """ Splits ``start_date`` to ``end_date`` (inclusive) into
+    ``(start, end)`` calendar month ranges. """
+    chunks = []
+    start = start_date
+    while start <= end_date:
+        last_day = calendar.monthrange(start.year, start.month)[1]
+        end = min(date(start.year, start.month, last_day), end_date)
+        chunks.append((start, end))
+        start = end + timedelta(days=1)
+    return chunks
+
+def day_chunks(days):
+    """ Returns a function splitting a range into chunks of ``days`` days. """
+    def split(start_date, end_date):
+        chunks = []
+        start = start_date
+        while start <= end_date:
+            end = min(start + timedelta(days=days - 1), end_date)
+            chunks.append((start, end))
+            start = end + timedelta(days=1)
+        return chunks
+    return split
+
+def get_path(body, path):
+    for key in path:
+        if not isinstance(body, dict):
+            return None
+        body = body.get(key)
+    return body
+
+def add_totals(totals, total):
+    """ Adds the numbers of the nested ``total`` dictionary to ``totals``. """
+    for name, value in (total or {}).items():
+        if isinstance(value, dict):
+            add_totals(totals.setdefault(name, {}), value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            totals[name] = totals.get(name, 0) + value
+
+def zeros(size):
+    if numpy is not None:
+        return numpy.zeros(size)
+    return [0.0] * size
+
+def accumulate(array, indexes, values):
+    """ Adds ``values`` to ``array`` at ``indexes`` (``numpy.add.at``). """
+    if numpy is not None:
+        numpy.add.at(array, indexes, values)
+    else:
+        for index, value in zip(indexes, values):
+            array[index] += value
+
+class ReportChunk(object):
+    """ The report of one chunk of the range. ``cached`` is ``True`` if it
+    was loaded from the disk cache. """
+    def __init__(self, start, end, grouping, body, cached=False):
+        self.start = start
+        self.end = end
+        self.grouping = grouping
+        self.body = body
+        self.cached = cached
+
+    def rows(self, path):
+        """ Returns the statistics rows at ``path``. """
+        rows = get_path(self.body, path)
+        return rows if isinstance(rows, list) else []
+
+class AggregatedReport(object):
+    """ The merged report of a date range.
+
+    ``days`` lists the dates of the range. ``series[kind][metric]`` is an
+    array with the sum of ``metric`` for each day, ``kind`` being ``'vod'``
+    or ``'live'`` (``'minutes'`` for minutes reports). ``totals`` adds up
+    the ``total`` of every chunk. ``chunks`` are the ``ReportChunk``
+    objects merged.
+    """
+    def __init__(self, report, start_date, end_date, chunks):
+        self.report = report
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chunks = chunks
+        self.days = [start_date + timedelta(days=i)
+                     for i in range((end_date - start_date).days + 1)]
+        self.series = {}
+        self.totals = {}
+
+        for chunk in chunks:
+            add_totals(self.totals, chunk.body.get('total'))
+            for kind, path in REPORT_STATISTICS[report].items():
+                self._add_rows(kind, chunk.rows(path))
+
+    def columns(self, account=None):
+        """ Returns the rows of all chunks as ``ReportColumns``. """
+        columns = ReportColumns(self.report)
+        for chunk in self.chunks:
+            columns.add_body(chunk.body, account)
+        return columns
+
+    def _add_rows(self, kind, rows):
+        series = self.series.setdefault(kind, {})
+        columns = {}
+        for row in rows:
+            try:
+                day = datetime.strptime(row['collected_on'], '%Y-%m-%d').date()
+            except (KeyError, TypeError, ValueError):
+                continue
+            index = (day - self.start_date).days
+            if not 0 <= index < len(self.days):
+                continue
+
+            for name, value in row.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    indexes, values = columns.setdefault(name, ([], []))
+                    indexes.append(index)
+                    values.append(value)
+
+        for name, (indexes, values) in columns.items():
+            if name not in series:
+                series[name] = zeros(len(self.days))
+            accumulate(series[name], indexes, values)
+
+class ReportAggregator(object):
+    """ Fetches reports of ``report`` (a ``Report`` resource) over long
+    ranges, ``workers`` chunks at a time.
+
+    ``chunks`` splits a range into ``(start, end)`` chunks, see
+    ``month_chunks`` and ``day_chunks``. Past chunks are cached in
+    ``cache_dir``, if given. ``today`` returns the current date (UTC).
+    """
+    def __init__(self, report, workers=4, cache_dir=None, chunks=month_chunks,
+                 today=None):
+        self.report = report
+        self.workers = workers
+        self.cache_dir = cache_dir and os.path.expanduser(cache_dir)
+        self.chunks = chunks
+        self.today = today or (lambda: datetime.utcnow().date())
+
+        if self.cache_dir and not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def fetch(self, report, start_date, end_date, grouping=None):
+        """ Returns the ``AggregatedReport`` of ``report`` (``'minutes'``,
+        ``'vod'``, ``'live'`` or ``'all'``) from ``start_date`` to
+        ``end_date``. ``grouping`` can be a list of groupings, fetched
+        separately and merged.
+
+        Raises ``ZencoderResponseError`` if a chunk cannot be fetched.
+        """
+        tasks = self._tasks(report, start_date, end_date, grouping)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            chunks = list(executor.map(lambda task: self.fetch_chunk(*task),
+                                       tasks))
+
+        return AggregatedReport(report, start_date, end_date, chunks)
+
+    def export(self, writer, report, start_date, end_date, grouping=None,
+               account=None):
+        """ Fetches a report like ``fetch``, and writes the rows of each
+        chunk to ``writer`` (see ``zencoder.export.open_writer``) as soon as
+        it arrives, in order. Returns the number of rows written. """
+        tasks = self._tasks(report, start_date, end_date, grouping)
+
+        written = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for chunk in executor.map(lambda task: self.fetch_chunk(*task),
+                                      tasks):
+                columns = ReportColumns(report)
+                columns.add_body(chunk.body, account)
+                writer.write(columns)
+                written += len(columns)
+        return written
+
+    def fetch_chunk(self, report, start, end, grouping=None):
+        """ Returns the ``ReportChunk`` of ``report`` from ``start`` to
+        ``end``, from the cache if possible. """
+        immutable = end < self.today()
+        path = self.cache_path(report, start, end, grouping)
+        if immutable and path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                body = json.loads(f.read().decode('utf-8'))
+            return ReportChunk(start, end, grouping, body, cached=True)
+
+        response = getattr(self.report, report)(start, end, grouping)
+        if response.code != 200:
+            raise ZencoderResponseError(response.raw_response, response.raw_body)
+
+        if immutable and path:
+            self._write(path, response.body)
+        return ReportChunk(start, end, grouping, response.body)
+
+    def _tasks(self, report, start_date, end_date, grouping):
+        """ Returns the ``fetch_chunk`` arguments of every chunk. """
+        if report not in REPORT_STATISTICS:
+            raise ValueError('unknown report {0!r}'.format(report))
+
+        groupings = grouping if isinstance(grouping, (list, tuple)) else [grouping]
+        return [(report, start, end, g)
+                for start, end in self.chunks(start_date, end_date)
+                for g in groupings]
+
+    def cache_path(self, report, start, end, grouping=None):
+        """ Returns the cache file of a chunk, or ``None`` without a
+        ``cache_dir``. Files are per account (API key). """
+        if not self.cache_dir:
+            return None
+        key = '{0}:{1}:{2}:{3}:{4}'.format(self.report.api_key, report,
+                                           start.isoformat(), end.isoformat(),
+                                           grouping or '')
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, '{0}-{1}.json'.format(report, name))
+
+    def _write(self, path, body):
+        # write atomically, concurrent runs may share the cache
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(body).encode('utf-8'))
+        os.rename(tmp, path)
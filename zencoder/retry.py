@@ -0,0 +1,122 @@
+""" Automatic retries with capped exponential backoff.
+
+Pass a ``RetryPolicy`` to ``Zencoder`` (or ``retry=True`` for the defaults)
+to retry rate-limited (429) and failed (5xx) requests, and requests that
+could not connect or timed out::
+
+    zen = Zencoder('API_KEY', retry=RetryPolicy(max_retries=5))
+    ...
+    zen.retry.stats()    # {'retries': 3, 'backoff_time': 2.4}
+
+Only idempotent requests (GET, PUT and DELETE) are retried by default. A
+retried POST may create a job twice, so add ``'POST'`` to ``methods`` only if
+you can tolerate duplicates.
+"""
+
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+# errors worth retrying: the request could not be sent, or timed out
+RETRYABLE_ERRORS = (requests.exceptions.ConnectionError,
+                    requests.exceptions.Timeout)
+try:
+    RETRYABLE_ERRORS += (ConnectionError, TimeoutError)
+except NameError:
+    # python 2
+    pass
+
+class RetryPolicy(object):
+    """ Retries a request up to ``max_retries`` times when it returns one of
+    ``status_codes``, or raises a connection error or timeout.
+
+    The n-th retry waits a random time between 0 and
+    ``min(max_backoff, backoff_factor * 2 ** n)`` seconds ("full jitter"),
+    or exactly ``backoff_factor * 2 ** n`` with ``jitter=False``. A
+    ``Retry-After`` response header, if present, is honored instead (up to
+    ``max_retry_after`` seconds).
+
+    Counters are shared by every request made with the policy, see ``stats``.
+    """
+    def __init__(self,
+                 max_retries=3,
+                 backoff_factor=0.5,
+                 max_backoff=30.0,
+                 jitter=True,
+                 status_codes=(429, 500, 502, 503, 504),
+                 methods=('GET', 'PUT', 'DELETE'),
+                 respect_retry_after=True,
+                 max_retry_after=120.0):
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_codes = frozenset(status_codes)
+        self.methods = frozenset(method.upper() for method in methods)
+        self.respect_retry_after = respect_retry_after
+        self.max_retry_after = max_retry_after
+
+        self.retries = 0
+        self.backoff_time = 0.0
+        self._lock = threading.Lock()
+
+    def is_retryable(self, method, attempt, response=None, error=None):
+        """ Returns ``True`` if a ``method`` request that returned
+        ``response`` (or raised ``error``) on its ``attempt``-th retry should
+        be retried. """
+        if attempt >= self.max_retries or method.upper() not in self.methods:
+            return False
+
+        if error is not None:
+            return isinstance(error, RETRYABLE_ERRORS)
+
+        return response.status_code in self.status_codes
+
+    def backoff(self, attempt, response=None):
+        """ Returns the number of seconds to wait before retry ``attempt``. """
+        if self.respect_retry_after and response is not None:
+            retry_after = parse_retry_after(
+                (getattr(response, 'headers', None) or {}).get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_retry_after)
+
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+    def record(self, seconds):
+        """ Counts a retry after a backoff of ``seconds``. """
+        with self._lock:
+            self.retries += 1
+            self.backoff_time += seconds
+
+    def sleep(self, seconds):
+        """ Waits ``seconds`` before a retry, and counts it. """
+        self.record(seconds)
+        time.sleep(seconds)
+
+    def stats(self):
+        """ Returns the number of ``retries`` made and the total
+        ``backoff_time`` spent waiting, in seconds. """
+        with self._lock:
+            return {'retries': self.retries, 'backoff_time': self.backoff_time}
+
+def parse_retry_after(value):
+    """ Returns the number of seconds a ``Retry-After`` header value asks to
+    wait, or ``None``. """
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    date = email.utils.parsedate_tz(value)
+    if date is None:
+        return None
+    return max(email.utils.mktime_tz(date) - time.time(), 0.0)
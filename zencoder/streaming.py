@@ -0,0 +1,217 @@
+""" Incremental decoding of large JSON responses.
+
+``Job.list`` and the ``Report`` methods accept ``stream=True`` to return a
+``StreamingResponse`` instead of a ``Response``. The body is read from the
+connection in chunks, and the elements of its arrays (jobs, report rows)
+are yielded as soon as they are parsed, so memory stays bounded by the size
+of one element and one chunk, whatever the page size::
+
+    response = zen.job.list(per_page=1000, stream=True)
+    for item in response:
+        print(item['job']['id'])
+"""
+
+import codecs
+import json
+
+WHITESPACE = ' \t\n\r'
+NUMBER_CHARS = '0123456789+-.eE'
+
+# bytes read from the connection at a time
+CHUNK_SIZE = 64 * 1024
+
+class JSONStream(object):
+    """ Parses a JSON document from an iterable of byte ``chunks``.
+
+    ``items`` yields ``(path, element)`` for every element of the arrays
+    found at ``paths`` (tuples of object keys, ``()`` being the document
+    itself) without keeping them. All other values are decoded whole into
+    ``body``, with the streamed arrays left empty.
+    """
+    def __init__(self, chunks, paths=((),)):
+        self.chunks = iter(chunks)
+        self.paths = set(paths)
+        self.prefixes = set(path[:i] for path in paths
+                            for i in range(len(path) + 1))
+        self.body = None
+
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+
+    def items(self):
+        self._skip()
+        for item in self._walk((), None, None):
+            yield item
+        self._skip()
+        if self._pos < len(self._buffer):
+            raise ValueError('extra data after JSON document')
+
+    def _walk(self, path, parent, key):
+        char = self._peek()
+        if char == '[' and path in self.paths:
+            self._store(parent, key, [])
+            self._pos += 1
+            for element in self._sequence(']'):
+                yield path, self._value()
+        elif char == '{' and path in self.prefixes:
+            obj = self._store(parent, key, {})
+            self._pos += 1
+            for _ in self._sequence('}'):
+                name = self._value()
+                if not isinstance(name, type(u'')):
+                    raise ValueError('expected an object key')
+                self._skip()
+                self._expect(':')
+                self._skip()
+                for item in self._walk(path + (name,), obj, name):
+                    yield item
+        else:
+            self._store(parent, key, self._value())
+
+    def _sequence(self, end):
+        """ Yields once per element of an array or object, positioned on
+        the element, and consumes the separators and the ``end`` bracket. """
+        self._skip()
+        if self._peek() == end:
+            self._pos += 1
+            return
+        while True:
+            yield
+            self._skip()
+            char = self._peek()
+            self._pos += 1
+            if char == end:
+                return
+            if char != ',':
+                raise ValueError('expected "," or "{0}"'.format(end))
+            self._skip()
+
+    def _store(self, parent, key, value):
+        if parent is None:
+            self.body = value
+        else:
+            parent[key] = value
+        return value
+
+    def _value(self):
+        """ Decodes the next complete value, reading more chunks until it
+        is complete. """
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+
+            # a number may continue in the next chunk ("-1." of "-1.5")
+            if (isinstance(value, (int, float)) and
+                    (end == len(self._buffer) or
+                     self._buffer[end] in NUMBER_CHARS) and
+                    self._fill()):
+                continue
+
+            self._pos = end
+            return value
+
+    def _peek(self):
+        if self._pos >= len(self._buffer) and not self._fill():
+            raise ValueError('unexpected end of JSON document')
+        return self._buffer[self._pos]
+
+    def _expect(self, char):
+        if self._peek() != char:
+            raise ValueError('expected "{0}"'.format(char))
+        self._pos += 1
+
+    def _skip(self):
+        while True:
+            while (self._pos < len(self._buffer) and
+                   self._buffer[self._pos] in WHITESPACE):
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _fill(self):
+        """ Appends the next chunk to the buffer, dropping what was already
+        parsed. Returns ``False`` at the end of the document. """
+        if self._eof:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self._eof = True
+            text = self._text.decode(b'', final=True)
+        else:
+            text = self._text.decode(chunk)
+
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        return True
+
+class StreamingResponse(object):
+    """ A ``Response`` whose array elements are decoded while they are read.
+
+    Iterate over it to get the elements (see ``items`` to also get the
+    array they belong to). Afterwards ``body`` holds the rest of the
+    document, e.g. the ``total`` of a report. Error responses are decoded
+    whole into ``body`` and yield nothing.
+
+    The connection is released when iteration ends; call ``close`` (or use
+    the response as a context manager) to stop early.
+    """
+    def __init__(self, code, raw_response, paths=((),), headers=None,
+                 chunk_size=CHUNK_SIZE):
+        self.code = code
+        self.raw_response = raw_response
+        self.headers = headers or {}
+        self.body = None
+        self.paths = paths
+        self.chunk_size = chunk_size
+
+    def items(self):
+        """ Yields ``(path, element)`` tuples, ``path`` being the keys of the
+        array of each element, e.g. ``('statistics', 'vod')``. """
+        try:
+            chunks = self.raw_response.iter_content(self.chunk_size)
+            if not 200 <= self.code < 300:
+                self.body = self._error_body(b''.join(chunks))
+                return
+
+            stream = JSONStream(chunks, self.paths)
+            for item in stream.items():
+                self.body = stream.body
+                yield item
+            self.body = stream.body
+        finally:
+            self.close()
+
+    def _error_body(self, content):
+        """ Decodes the body of an error response like
+        ``HTTPBackend.process``, raising ``ZencoderResponseError`` if it is
+        not JSON (e.g. the HTML page of a 502). """
+        # imported here, zencoder.core imports this module
+        from .core import ZencoderResponseError
+
+        if self.code == 402:
+            return {'message': 'Payment Required', 'status': 'error'}
+        try:
+            return json.loads(content.decode('utf-8'))
+        except ValueError:
+            raise ZencoderResponseError(self.raw_response, content)
+
+    def __iter__(self):
+        for path, item in self.items():
+            yield item
+
+    def close(self):
+        self.raw_response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
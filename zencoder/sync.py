@@ -0,0 +1,214 @@
+""" A local, incrementally synced index of the jobs of an account.
+
+``JobSync`` mirrors jobs into a SQLite database, so dashboards can query
+them without hitting the API::
+
+    sync = JobSync(zen, 'jobs.db')
+    sync.sync()                       # run periodically
+
+    failed = sync.jobs(state='failed', since=datetime(2013, 5, 1))
+    sync.counts()                     # {'finished': 120, 'processing': 3}
+
+The first ``sync`` walks ``Job.list`` through to the oldest job, saving the
+last page walked, so that an interrupted walk resumes where it stopped.
+Once a walk completed, each ``sync`` stops at the first job already indexed
+in a terminal state. Jobs indexed in a non-terminal state are then
+refreshed with ``Job.details``, in parallel.
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .models import parse_timestamp
+from .progress import TERMINAL_STATES
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    state TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    input_url TEXT,
+    synced_at REAL,
+    data BLOB
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS jobs_input_url ON jobs (input_url);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+'''
+
+def timestamp(value):
+    """ Returns the sortable form of an API timestamp or ``datetime`` stored
+    in the index (ISO 8601, UTC). """
+    value = parse_timestamp(value)
+    if value is None:
+        return None
+    return value.strftime('%Y-%m-%dT%H:%M:%S')
+
+class JobSync(object):
+    """ Keeps a SQLite index of the jobs of ``zencoder`` at ``path``
+    (in memory by default).
+
+    ``per_page`` jobs are listed per request, and at most ``workers``
+    non-terminal jobs are refreshed at once.
+    """
+    def __init__(self, zencoder, path=':memory:', per_page=50, workers=8):
+        self.job = zencoder.job
+        self.codec = zencoder.job.codec
+        self.per_page = per_page
+        self.workers = workers
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        # job id -> exception or response of the jobs the last sync could
+        # not refresh
+        self.failures = {}
+
+    def sync(self):
+        """ Brings the index up to date. Returns the number of jobs
+        ``listed`` and ``refreshed``, how many were ``new``, and how many
+        could not be refreshed (``failed``, see ``failures``). """
+        stats = {'listed': 0, 'new': 0, 'refreshed': 0, 'failed': 0}
+        seen = set()
+
+        walked = self._meta('walked')
+        if walked == 'complete':
+            self._walk(stats, seen, stop_at_terminal=True)
+        else:
+            walked = int(walked or 0)
+            if walked:
+                # jobs created since the interrupted walk
+                self._walk(stats, seen, stop_at_terminal=True)
+            self._walk(stats, seen, start_page=walked + 1)
+            self._set_meta('walked', 'complete')
+
+        self.failures = {}
+        pending = [job_id for job_id in self.pending() if job_id not in seen]
+        if pending:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = [(job_id, executor.submit(self.job.details, job_id))
+                           for job_id in pending]
+                for job_id, future in futures:
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        self.failures[job_id] = e
+                        continue
+                    if response.code == 200:
+                        self.store(response.body.get('job', response.body))
+                        stats['refreshed'] += 1
+                    else:
+                        self.failures[job_id] = response
+            stats['failed'] = len(self.failures)
+
+        return stats
+
+    def _walk(self, stats, seen, start_page=1, stop_at_terminal=False):
+        """ Indexes the jobs listed from ``start_page``. Without
+        ``stop_at_terminal``, walks to the oldest job and saves the number of
+        pages fully walked; new jobs only shift older ones to later pages, so
+        resuming from there skips none. """
+        count = 0
+        for job in self.job.iter_all(per_page=self.per_page, prefetch=0,
+                                     start_page=start_page):
+            known = self.state(job['id'])
+            if stop_at_terminal and known in TERMINAL_STATES:
+                return
+            if job['id'] not in seen:
+                self.store(job)
+                seen.add(job['id'])
+                stats['listed'] += 1
+                stats['new'] += known is None
+
+            count += 1
+            if not stop_at_terminal and count % self.per_page == 0:
+                self._set_meta('walked',
+                               str(start_page - 1 + count // self.per_page))
+
+    def store(self, job):
+        """ Adds or updates ``job`` (a job dictionary) in the index. """
+        input_url = (job.get('input_media_file') or {}).get('url')
+        row = (job['id'], job.get('state'), timestamp(job.get('created_at')),
+               timestamp(job.get('updated_at')), input_url, time.time(),
+               self.codec.dumps(job))
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO jobs VALUES '
+                             '(?, ?, ?, ?, ?, ?, ?)', row)
+
+    def state(self, job_id):
+        """ Returns the indexed state of ``job_id``, or ``None``. """
+        rows = self._query('SELECT state FROM jobs WHERE id = ?', (job_id,))
+        return rows[0][0] if rows else None
+
+    def pending(self):
+        """ Returns the ids of the indexed jobs in a non-terminal state. """
+        marks = ', '.join('?' * len(TERMINAL_STATES))
+        rows = self._query('SELECT id FROM jobs WHERE state IS NULL OR '
+                           'state NOT IN ({0})'.format(marks), TERMINAL_STATES)
+        return [row[0] for row in rows]
+
+    def get(self, job_id):
+        """ Returns the indexed job dictionary of ``job_id``, or ``None``. """
+        rows = self._query('SELECT data FROM jobs WHERE id = ?', (job_id,))
+        return self.codec.loads(rows[0][0]) if rows else None
+
+    def jobs(self, state=None, since=None, until=None, input_url=None,
+             limit=None, offset=0):
+        """ Returns the indexed job dictionaries, newest first, filtered by
+        ``state`` (a state or a list of states), creation time
+        (``since <= created_at < until``, as ``datetime`` objects in UTC or
+        API timestamps) and ``input_url``. """
+        where = []
+        params = []
+        if state is not None:
+            states = [state] if isinstance(state, str) else list(state)
+            where.append('state IN ({0})'.format(', '.join('?' * len(states))))
+            params.extend(states)
+        if since is not None:
+            where.append('created_at >= ?')
+            params.append(timestamp(since))
+        if until is not None:
+            where.append('created_at < ?')
+            params.append(timestamp(until))
+        if input_url is not None:
+            where.append('input_url = ?')
+            params.append(input_url)
+
+        sql = 'SELECT data FROM jobs'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?'
+        params.extend([-1 if limit is None else limit, offset])
+
+        return [self.codec.loads(row[0]) for row in self._query(sql, params)]
+
+    def counts(self):
+        """ Returns the number of indexed jobs by state. """
+        return dict(self._query('SELECT state, COUNT(*) FROM jobs '
+                                'GROUP BY state'))
+
+    def __len__(self):
+        return self._query('SELECT COUNT(*) FROM jobs')[0][0]
+
+    def close(self):
+        self._db.close()
+
+    def _meta(self, key):
+        rows = self._query('SELECT value FROM meta WHERE key = ?', (key,))
+        return rows[0][0] if rows else None
+
+    def _set_meta(self, key, value):
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)',
+                             (key, value))
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, list(params)).fetchall()
@@ -0,0 +1,324 @@
+""" HTTP transports of the synchronous client.
+
+By default ``Zencoder`` sends requests with a ``requests.Session``. Pass a
+``Transport`` as ``transport`` to use another HTTP library::
+
+    from zencoder.transport import Urllib3Transport, HttpxTransport
+
+    zen = Zencoder('API_KEY', transport=Urllib3Transport(pool_maxsize=32))
+    zen = Zencoder('API_KEY', transport=HttpxTransport(http2=True))
+
+``Urllib3Transport`` skips the request preparation of requests (sessions,
+cookies, hooks, proxy environment lookups), the bulk of the per-request
+overhead of the client. ``HttpxTransport`` can multiplex all the requests
+to the API over a few HTTP/2 connections (requires ``httpx[http2]``).
+
+Transports offer the subset of the ``requests.Session`` interface the client
+uses: ``headers`` and ``get``, ``post``, ``put`` and ``delete`` methods
+taking the same arguments. Connection errors and timeouts are raised as
+``requests.exceptions.ConnectionError`` and ``requests.exceptions.Timeout``
+whatever the library, so retries behave the same.
+"""
+
+import json
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+import requests
+import urllib3
+
+from .core import USER_AGENT
+from .core import build_session
+from .core import pool_stats
+from .core import poolmanager_stats
+
+# bytes read from the connection at a time by ``content``
+CHUNK_SIZE = 64 * 1024
+
+def iter_slices(content, size):
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+def add_params(url, params):
+    """ Returns ``url`` with ``params`` in its query string, ``None`` values
+    left out. """
+    if not params:
+        return url
+    query = urlencode([(name, value) for name, value in params.items()
+                       if value is not None], doseq=True)
+    if not query:
+        return url
+    return url + ('&' if '?' in url else '?') + query
+
+def reject_proxies(name, url, proxies, hint):
+    """ Raises ``ValueError`` if ``proxies`` has a proxy for ``url``, for
+    transports that cannot use per-request proxies, rather than silently
+    bypassing it. """
+    if proxies and proxies.get(url.split(':', 1)[0]):
+        raise ValueError('{0} does not support per-request proxies, {1}'
+                         .format(name, hint))
+
+class TransportResponse(object):
+    """ A minimal HTTP response, compatible with ``HTTPBackend.process``.
+
+    The body is either given as ``content``, or read on demand with
+    ``stream(chunk_size)``, an iterator of byte chunks; ``release`` is then
+    called once it was read or the response closed.
+    """
+    def __init__(self, status_code, headers, content=None, stream=None,
+                 release=None):
+        self.status_code = status_code
+        self.headers = headers
+        self._content = content
+        self._stream = stream
+        self._release = release
+
+    @property
+    def content(self):
+        if self._content is None and self._stream is not None:
+            try:
+                self._content = b''.join(self._stream(CHUNK_SIZE))
+            finally:
+                self.close()
+        return self._content
+
+    def iter_content(self, chunk_size=1):
+        """ Yields the body in chunks of up to ``chunk_size`` bytes. """
+        if self._content is not None or self._stream is None:
+            for chunk in iter_slices(self._content or b'', chunk_size):
+                yield chunk
+            return
+
+        try:
+            for chunk in self._stream(chunk_size):
+                yield chunk
+        finally:
+            self.close()
+
+    def json(self):
+        return json.loads(self.content.decode('utf-8'))
+
+    def close(self):
+        self._stream = None
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+class Transport(object):
+    """ Base class for transports.
+
+    ``headers`` are sent with every request. Subclasses implement
+    ``request`` and may override ``close`` and ``pool_stats``.
+    """
+    def __init__(self):
+        self.headers = {}
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, proxies=None, cert=None, verify=True,
+                stream=False):
+        """ Sends a request and returns a response with ``status_code``,
+        ``headers``, ``content``, ``iter_content``, ``json()`` and
+        ``close()``. With ``stream=True`` the body is read on demand. """
+        raise NotImplementedError
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        """ Releases any pooled connections. """
+        pass
+
+    def pool_stats(self):
+        """ Returns connection pool statistics, see ``zencoder.core.pool_stats``. """
+        return []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class RequestsTransport(Transport):
+    """ A transport backed by a ``requests.Session`` (by default one created
+    by ``build_session`` with the keyword arguments). This is what clients
+    use without a ``transport``. """
+    def __init__(self, session=None, **kwargs):
+        self.session = session if session is not None else build_session(**kwargs)
+
+    @property
+    def headers(self):
+        return self.session.headers
+
+    def request(self, method, url, **kwargs):
+        return getattr(self.session, method.lower())(url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def pool_stats(self):
+        return pool_stats(self.session)
+
+def urllib3_timeout(timeout):
+    if timeout is None:
+        return urllib3.Timeout(connect=None, read=None)
+    if isinstance(timeout, tuple):
+        return urllib3.Timeout(connect=timeout[0], read=timeout[1])
+    return urllib3.Timeout(connect=timeout, read=timeout)
+
+class Urllib3Transport(Transport):
+    """ A transport calling ``urllib3`` directly, with pools of up to
+    ``pool_maxsize`` connections for ``pool_connections`` hosts (see
+    ``build_session``). Redirects are not followed. """
+    def __init__(self, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True):
+        super(Urllib3Transport, self).__init__()
+        self.pool_options = dict(num_pools=pool_connections,
+                                 maxsize=pool_maxsize, block=pool_block)
+        self.manager = urllib3.PoolManager(**self.pool_options)
+        self.proxy_managers = {}
+        self.headers.update({
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip, deflate',
+        })
+        if not keep_alive:
+            self.headers['Connection'] = 'close'
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, proxies=None, cert=None, verify=True,
+                stream=False):
+        url = add_params(url, params)
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        if data is not None and not isinstance(data, bytes):
+            data = data.encode('utf-8')
+
+        # TLS settings are per pool, pools are created on demand
+        pool_kwargs = {}
+        if url.startswith('https:'):
+            pool_kwargs['cert_reqs'] = 'CERT_REQUIRED' if verify else 'CERT_NONE'
+            if isinstance(verify, str):
+                pool_kwargs['ca_certs'] = verify
+            if isinstance(cert, tuple):
+                pool_kwargs.update(cert_file=cert[0], key_file=cert[1])
+            elif cert:
+                pool_kwargs['cert_file'] = cert
+
+        options = dict(body=data, headers=request_headers,
+                       timeout=urllib3_timeout(timeout), retries=False,
+                       redirect=False, preload_content=not stream,
+                       decode_content=True)
+        proxy = (proxies or {}).get(url.split(':', 1)[0])
+        try:
+            if proxy:
+                manager = self._proxy_manager(proxy, pool_kwargs)
+                response = manager.urlopen(method, url, **options)
+            else:
+                pool = self.manager.connection_from_url(url,
+                                                        pool_kwargs=pool_kwargs)
+                response = pool.urlopen(method,
+                                        urllib3.util.parse_url(url).request_uri,
+                                        assert_same_host=False, **options)
+        except urllib3.exceptions.NewConnectionError as e:
+            # a subclass of ConnectTimeoutError
+            raise requests.exceptions.ConnectionError(e)
+        except urllib3.exceptions.TimeoutError as e:
+            raise requests.exceptions.Timeout(e)
+        except urllib3.exceptions.HTTPError as e:
+            raise requests.exceptions.ConnectionError(e)
+
+        if not stream:
+            return TransportResponse(response.status, response.headers,
+                                     response.data)
+
+        def release():
+            if response.isclosed() or response.length_remaining == 0:
+                response.release_conn()
+            else:
+                # don't pool a connection with unread data
+                response.close()
+
+        return TransportResponse(response.status, response.headers,
+                                 stream=response.stream, release=release)
+
+    def _proxy_manager(self, proxy, pool_kwargs):
+        key = (proxy, tuple(sorted(pool_kwargs.items())))
+        manager = self.proxy_managers.get(key)
+        if manager is None:
+            manager = self.proxy_managers[key] = urllib3.ProxyManager(
+                proxy, **dict(self.pool_options, **pool_kwargs))
+        return manager
+
+    def close(self):
+        self.manager.clear()
+        for manager in self.proxy_managers.values():
+            manager.clear()
+
+    def pool_stats(self):
+        stats = poolmanager_stats(self.manager)
+        for manager in self.proxy_managers.values():
+            stats.extend(poolmanager_stats(manager))
+        return stats
+
+class HttpxTransport(Transport):
+    """ A transport backed by ``httpx.Client``. Set ``http2=True`` to
+    multiplex requests over HTTP/2 (requires ``httpx[http2]``).
+
+    ``verify``, ``cert`` and ``proxies`` are client settings in httpx, pass
+    them as keyword arguments here rather than per request; requests with a
+    proxy in ``proxies`` raise ``ValueError``.
+    """
+    def __init__(self, client=None, http2=False, **kwargs):
+        super(HttpxTransport, self).__init__()
+        import httpx
+        self.httpx = httpx
+        if client is None:
+            client = httpx.Client(http2=http2, **kwargs)
+        self.client = client
+        self.headers['User-Agent'] = USER_AGENT
+
+    def request(self, method, url, params=None, data=None, headers=None,
+                timeout=None, proxies=None, cert=None, verify=True,
+                stream=False):
+        reject_proxies('HttpxTransport', url, proxies,
+                       'configure them on the httpx client')
+        request_headers = dict(self.headers)
+        if headers:
+            request_headers.update(headers)
+        if params:
+            params = dict((name, value) for name, value in params.items()
+                          if value is not None)
+
+        httpx = self.httpx
+        try:
+            request = self.client.build_request(method, url, params=params,
+                                                content=data,
+                                                headers=request_headers,
+                                                timeout=timeout)
+            response = self.client.send(request, stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(e)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(e)
+
+        if not stream:
+            return TransportResponse(response.status_code, response.headers,
+                                     response.content)
+        return TransportResponse(response.status_code, response.headers,
+                                 stream=response.iter_bytes,
+                                 release=response.close)
+
+    def close(self):
+        self.client.close()